@@ -0,0 +1,80 @@
+"""
+Materialized /stats aggregates.
+
+The counts behind /stats are computed once when the store is built and then
+updated in place as alerts are added or change status, so serving /stats is
+a read of a ready-made response instead of a scan of every alert. Each change
+bumps `generation`, which is returned to clients so they can tell whether the
+numbers moved since their last poll.
+"""
+from collections import Counter
+from threading import Lock
+from typing import Optional
+
+from time_index import SECONDS_PER_DAY, iso_day
+
+
+class StatsAggregates:
+    """Counts by severity / status / source / day, plus a change generation."""
+
+    def __init__(self):
+        self.generation = 0
+        self.total = 0
+        self.by_severity = Counter()
+        self.by_status = Counter()
+        self.by_source = Counter()
+        self.by_day = Counter()
+        self._lock = Lock()
+        self._snapshot = None
+
+    @classmethod
+    def from_store(cls, store) -> "StatsAggregates":
+        aggregates = cls()
+        aggregates.total = len(store)
+        aggregates.by_severity.update(store.value_counts("severity"))
+        aggregates.by_status.update(store.value_counts("status"))
+        aggregates.by_source.update(store.value_counts("source"))
+        days, counts = store.time_index.bucket_counts(SECONDS_PER_DAY)
+        aggregates.by_day.update(dict(zip(days.tolist(), counts.tolist())))
+        return aggregates
+
+    def add_counts(self, total: int, by_severity: dict, by_status: dict, by_source: dict, by_day: dict) -> None:
+        """Account for a batch of newly added alerts, given their counts."""
+        with self._lock:
+            self.total += total
+            self.by_severity.update(by_severity)
+            self.by_status.update(by_status)
+            self.by_source.update(by_source)
+            self.by_day.update(by_day)
+            self._changed()
+
+    def change_status(self, old_status, new_status, count: int = 1) -> None:
+        """Move `count` alerts from `old_status` to `new_status`."""
+        if old_status == new_status or count <= 0:
+            return
+        with self._lock:
+            self.by_status[old_status] -= count
+            if self.by_status[old_status] <= 0:
+                del self.by_status[old_status]
+            self.by_status[new_status] += count
+            self._changed()
+
+    def _changed(self) -> None:
+        self.generation += 1
+        self._snapshot = None
+
+    def snapshot(self) -> dict:
+        """The /stats response for the current generation (rebuilt only after a change)."""
+        snapshot: Optional[dict] = self._snapshot
+        if snapshot is None:
+            with self._lock:
+                snapshot = {
+                    "total_alerts": self.total,
+                    "by_severity": dict(self.by_severity),
+                    "by_status": dict(self.by_status),
+                    "by_source": dict(self.by_source),
+                    "by_day": {iso_day(day): count for day, count in sorted(self.by_day.items())},
+                    "generation": self.generation,
+                }
+                self._snapshot = snapshot
+        return snapshot
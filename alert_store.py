@@ -0,0 +1,779 @@
+"""
+Columnar in-memory alert store.
+
+Instead of keeping every alert as a nested dict, the fields the API filters and
+aggregates on are pulled out at load time into typed NumPy arrays:
+
+- low-cardinality strings (severity, status, source, ...) are dictionary-encoded
+  into small integer code arrays
+- numeric fields and pre-parsed epoch timestamps live in float/int arrays
+- the original alert JSON is kept as one compact bytes buffer and only turned
+  back into a dict when an endpoint actually returns the alert
+"""
+from array import array
+from datetime import datetime, timezone
+from copy import copy
+from itertools import count
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+import hashlib
+import json
+
+import numpy as np
+
+from aggregates import StatsAggregates
+from bitmaps import Bitmap, BitmapIndex
+from campaigns import CampaignIndex
+from geo_grid import GeoGrid
+from rollups import HourlyRollups
+from sketches import HyperLogLog, Reservoir, hash32
+from sort_index import SEVERITY_ORDER, SortIndex
+from text_index import TextIndex, TextIndexBuilder
+from time_index import NO_TIMESTAMP, SECONDS_PER_DAY, TimeIndex
+
+# Bit flags recording which nested sections an alert has (non-empty dicts only,
+# mirroring the `if section:` checks the analytics rely on)
+SECTION_RESOURCE = 1
+SECTION_THREAT = 2
+SECTION_RISK = 4
+SECTION_COMPLIANCE = 8
+SECTION_COST = 16
+
+SECTIONS = {
+    "resource": SECTION_RESOURCE,
+    "threat_intelligence": SECTION_THREAT,
+    "risk_analysis": SECTION_RISK,
+    "compliance": SECTION_COMPLIANCE,
+    "cost_impact": SECTION_COST,
+}
+
+# Dictionary-encoded fields: column name -> (path in the alert, array typecode)
+CATEGORICAL_FIELDS = {
+    "severity": (("severity",), "H"),
+    "status": (("status",), "H"),
+    "source": (("source",), "H"),
+    "type": (("type",), "H"),
+    "region": (("resource", "region"), "H"),
+    "country": (("resource", "country"), "H"),
+    "threat_actor": (("threat_intelligence", "threat_actor"), "H"),
+    "threat_actor_country": (("threat_intelligence", "threat_actor_country"), "H"),
+    "attack_stage": (("threat_intelligence", "attack_stage"), "H"),
+    "ioc_type": (("threat_intelligence", "ioc_type"), "H"),
+    "exploitability": (("risk_analysis", "exploitability"), "H"),
+    "violation_severity": (("compliance", "violation_severity"), "H"),
+    "data_classification": (("compliance", "data_classification"), "H"),
+    # High cardinality, but still far cheaper as codes than as repeated strings
+    "correlation_id": (("metadata", "correlation_id"), "i"),
+}
+
+# Numeric fields: column name -> (path in the alert, array typecode).
+# Missing values are stored as 0, which matches the `.get(..., 0)` defaults
+# used by the analytics.
+NUMERIC_FIELDS = {
+    "risk_score": (("risk_analysis", "risk_score"), "d"),
+    "confidence": (("risk_analysis", "confidence"), "d"),
+    "estimated_cost_usd": (("cost_impact", "estimated_cost_usd"), "d"),
+    "downtime_minutes": (("cost_impact", "downtime_minutes"), "q"),
+    "data_loss_mb": (("cost_impact", "data_loss_mb"), "q"),
+    "latitude": (("resource", "latitude"), "d"),
+    "longitude": (("resource", "longitude"), "d"),
+}
+
+# Hashed fields (see sketches.hash32), kept only for distinct counts:
+# column name -> path in the alert
+HASHED_FIELDS = {
+    "source_ip_hash": ("network", "source_ip"),
+    "user_id_hash": ("user_context", "user_id"),
+}
+
+# Columns the /alerts filters use, each backed by a per-value bitmap index
+INDEXED_FIELDS = ("severity", "status", "source")
+
+# Dataset versions are unique across every store built in this process, so a
+# reloaded store never reuses the version of the store it replaced
+_VERSIONS = count(1)
+
+_NUMPY_TYPES = {"H": np.uint16, "i": np.int32, "I": np.uint32, "d": np.float64, "q": np.int64, "B": np.uint8}
+_INTEGER_RANGES = {
+    typecode: (int(np.iinfo(dtype).min), int(np.iinfo(dtype).max))
+    for typecode, dtype in _NUMPY_TYPES.items() if np.issubdtype(dtype, np.integer)
+}
+
+# Typecode of the column holding each dictionary's codes
+_CODE_TYPECODES = {name: typecode for name, (_, typecode) in CATEGORICAL_FIELDS.items()}
+_CODE_TYPECODES["framework"] = "H"
+
+# Separators between the searchable fields of one alert, and after each alert,
+# in the UTF-8 search text (never part of a needle)
+FIELD_SEPARATOR = "\x00"
+DOC_SEPARATOR = b"\x01"
+
+
+class Dictionary:
+    """
+    Two-way mapping between the distinct values of a column and integer codes.
+
+    Code 0 is always reserved for None / missing values. Codes are handed out
+    in first-seen order.
+    """
+
+    def __init__(self, values: Optional[List] = None):
+        self.values = [None] if values is None else list(values)
+        self.codes = {value: code for code, value in enumerate(self.values)}
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def encode(self, value) -> int:
+        code = self.codes.get(value)
+        if code is None:
+            code = len(self.values)
+            self.values.append(value)
+            self.codes[value] = code
+        return code
+
+    def decode(self, code: int):
+        return self.values[code]
+
+    def truncate(self, length: int) -> None:
+        """Forget the values with codes >= `length`."""
+        for value in self.values[length:]:
+            del self.codes[value]
+        del self.values[length:]
+
+
+def _checked(value: int, typecode: str) -> int:
+    """`value`, if it fits a column of `typecode`; raises OverflowError otherwise."""
+    low, high = _INTEGER_RANGES[typecode]
+    if not low <= value <= high:
+        raise OverflowError(f"{value} doesn't fit in a {_NUMPY_TYPES[typecode].__name__} column")
+    return value
+
+
+def _merge_dictionaries(dictionaries: Dict[str, Dictionary], others: Dict[str, Dictionary]) -> Dict[str, np.ndarray]:
+    """
+    For each of `others`, the codes its values have in the dictionary of the
+    same name in `dictionaries` (indexed by the other's codes), adding the
+    values missing there. If a code doesn't fit its column, raises
+    OverflowError and leaves `dictionaries` as they were.
+    """
+    lengths = {name: len(dictionary) for name, dictionary in dictionaries.items()}
+    try:
+        remaps = {}
+        for name, other in others.items():
+            dictionary = dictionaries[name]
+            remaps[name] = np.array([dictionary.encode(value) for value in other.values], dtype=np.int64)
+            _checked(len(dictionary) - 1, _CODE_TYPECODES[name])
+    except Exception:
+        for name, length in lengths.items():
+            dictionaries[name].truncate(length)
+        raise
+    return remaps
+
+
+def parse_timestamp(value) -> int:
+    """
+    Parse an ISO-8601 timestamp (e.g. "2025-11-17T14:23:00Z") into epoch seconds.
+
+    Naive timestamps are treated as UTC. Returns NO_TIMESTAMP if the value is
+    missing or can't be parsed.
+    """
+    if not value:
+        return NO_TIMESTAMP
+    try:
+        dt = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    except ValueError:
+        return NO_TIMESTAMP
+    return to_epoch(dt)
+
+
+def to_epoch(dt: Optional[datetime]) -> Optional[int]:
+    """Epoch seconds of a datetime (naive datetimes are treated as UTC)."""
+    if dt is None:
+        return None
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return int(dt.timestamp())
+
+
+def alert_identifier(alert: dict):
+    """Return the ID an alert is addressed by in the API."""
+    return alert.get("id") or alert.get("alert_id") or alert.get("uuid")
+
+
+def search_text(alert: dict) -> str:
+    """Lower-cased text of the fields the `search` parameter looks at."""
+    resource = alert.get("resource") or {}
+    return FIELD_SEPARATOR.join((
+        str(alert.get("message", "")).lower(),
+        str(alert.get("type", "")).lower(),
+        str(resource.get("name", "")).lower(),
+    ))
+
+
+def _lookup(alert: dict, path):
+    value = alert
+    for key in path:
+        if not isinstance(value, dict):
+            return None
+        value = value.get(key)
+    return value
+
+
+class AlertStoreBuilder:
+    """
+    Accumulates alerts one at a time and produces an AlertStore.
+
+    Columns are collected in compact `array.array` buffers so building never
+    holds more than one parsed alert dict at a time.
+    """
+
+    def __init__(self):
+        self.dictionaries = {name: Dictionary() for name in CATEGORICAL_FIELDS}
+        self.dictionaries["framework"] = Dictionary()
+        self._codes = {name: array(typecode) for name, (_, typecode) in CATEGORICAL_FIELDS.items()}
+        self._numbers = {name: array(typecode) for name, (_, typecode) in NUMERIC_FIELDS.items()}
+        self._hashes = {name: array("I") for name in HASHED_FIELDS}
+        self._sections = array("B")
+        self._timestamps = array("q")
+        self._framework_offsets = array("q", [0])
+        self._frameworks = array("H")
+        self._docs = bytearray()
+        self._doc_offsets = array("q", [0])
+        self._text = bytearray()
+        self._text_offsets = array("q", [0])
+        self._text_index = TextIndexBuilder()
+        self._ids = []
+
+    def add(self, alert: dict, raw: Optional[bytes] = None) -> None:
+        """
+        Add one alert. `raw` is the alert's JSON encoding if the caller already
+        has it (e.g. the line it was parsed from).
+        """
+        if not isinstance(alert, dict):
+            raise TypeError(f"an alert must be a JSON object, not {type(alert).__name__}")
+
+        # Everything that can fail on a malformed alert happens before any
+        # column is appended to, so a rejected alert leaves no partial row
+        # (and the values it added to the dictionaries are taken out again)
+        lengths = [len(dictionary) for dictionary in self.dictionaries.values()]
+        try:
+            codes = [
+                _checked(self.dictionaries[name].encode(_lookup(alert, path)), typecode)
+                for name, (path, typecode) in CATEGORICAL_FIELDS.items()
+            ]
+            numbers = [
+                _checked(int(value), typecode) if typecode == "q" else float(value)
+                for value, typecode in (
+                    (_lookup(alert, path) or 0, typecode) for path, typecode in NUMERIC_FIELDS.values()
+                )
+            ]
+            hashes = [hash32(_lookup(alert, path)) for path in HASHED_FIELDS.values()]
+            framework_dictionary = self.dictionaries["framework"]
+            frameworks = [
+                _checked(framework_dictionary.encode(framework), "H")
+                for framework in _lookup(alert, ("compliance", "frameworks")) or []
+            ]
+            if raw is None:
+                raw = json.dumps(alert, separators=(",", ":")).encode("utf-8")
+            text = search_text(alert).encode("utf-8")
+        except Exception:
+            for dictionary, length in zip(self.dictionaries.values(), lengths):
+                dictionary.truncate(length)
+            raise
+
+        for name, code in zip(CATEGORICAL_FIELDS, codes):
+            self._codes[name].append(code)
+        for name, number in zip(NUMERIC_FIELDS, numbers):
+            self._numbers[name].append(number)
+        for name, value in zip(HASHED_FIELDS, hashes):
+            self._hashes[name].append(value)
+
+        sections = 0
+        for key, flag in SECTIONS.items():
+            section = alert.get(key)
+            if isinstance(section, dict) and section:
+                sections |= flag
+        self._sections.append(sections)
+
+        self._timestamps.append(parse_timestamp(alert.get("timestamp") or alert.get("time")))
+
+        self._frameworks.extend(frameworks)
+        self._framework_offsets.append(len(self._frameworks))
+
+        self._docs += raw
+        self._doc_offsets.append(len(self._docs))
+
+        self._text_index.add(len(self._ids), text)
+        self._text += text
+        self._text += DOC_SEPARATOR
+        self._text_offsets.append(len(self._text))
+        self._ids.append(alert_identifier(alert))
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def extend(self, other: "AlertStoreBuilder") -> None:
+        """
+        Append every alert collected by `other` (e.g. a chunk parsed in another
+        process), translating its dictionary codes into this builder's.
+        Raises OverflowError, appending nothing, if a translated code doesn't
+        fit its column.
+        """
+        remaps = _merge_dictionaries(self.dictionaries, other.dictionaries)
+        self._extend_offsets(self._framework_offsets, other._framework_offsets, len(self._frameworks))
+        self._extend_offsets(self._doc_offsets, other._doc_offsets, len(self._docs))
+        self._extend_offsets(self._text_offsets, other._text_offsets, len(self._text))
+
+        for name, remap in remaps.items():
+            target = self._frameworks if name == "framework" else self._codes[name]
+            source = other._frameworks if name == "framework" else other._codes[name]
+            self._extend_array(target, remap[np.frombuffer(source, dtype=_NUMPY_TYPES[source.typecode])])
+        for name, numbers in other._numbers.items():
+            self._numbers[name].extend(numbers)
+        for name, hashes in other._hashes.items():
+            self._hashes[name].extend(hashes)
+        self._sections.extend(other._sections)
+        self._timestamps.extend(other._timestamps)
+        self._docs += other._docs
+        self._text += other._text
+
+        self._text_index.extend(other._text_index, len(self._ids))
+        self._ids.extend(other._ids)
+
+    @staticmethod
+    def _extend_array(target: array, values: np.ndarray) -> None:
+        target.frombytes(values.astype(_NUMPY_TYPES[target.typecode]).tobytes())
+
+    @staticmethod
+    def _extend_offsets(target: array, offsets: array, shift: int) -> None:
+        """Append `offsets` (without their leading 0) shifted by `shift`."""
+        AlertStoreBuilder._extend_array(target, np.frombuffer(offsets, dtype=np.int64)[1:] + shift)
+
+    def columns(self) -> Dict[str, np.ndarray]:
+        """The collected columns as NumPy arrays (codes are this builder's)."""
+        columns = {}
+        for name, (_, typecode) in CATEGORICAL_FIELDS.items():
+            columns[name] = np.frombuffer(self._codes[name], dtype=_NUMPY_TYPES[typecode]).copy()
+        for name, (_, typecode) in NUMERIC_FIELDS.items():
+            columns[name] = np.frombuffer(self._numbers[name], dtype=_NUMPY_TYPES[typecode]).copy()
+        for name in HASHED_FIELDS:
+            columns[name] = np.frombuffer(self._hashes[name], dtype=np.uint32).copy()
+        columns["sections"] = np.frombuffer(self._sections, dtype=np.uint8).copy()
+        columns["timestamp"] = np.frombuffer(self._timestamps, dtype=np.int64).copy()
+        columns["framework_offsets"] = np.frombuffer(self._framework_offsets, dtype=np.int64).copy()
+        columns["frameworks"] = np.frombuffer(self._frameworks, dtype=np.uint16).copy()
+        return columns
+
+    def build(self) -> "AlertStore":
+        return AlertStore(
+            columns=self.columns(),
+            dictionaries=self.dictionaries,
+            docs=bytes(self._docs),
+            doc_offsets=np.frombuffer(self._doc_offsets, dtype=np.int64).copy(),
+            text=bytes(self._text),
+            text_offsets=np.frombuffer(self._text_offsets, dtype=np.int64).copy(),
+            text_index=self._text_index.build(),
+            ids=IdIndex.build(self._ids),
+        )
+
+
+class IdIndex:
+    """
+    Alert ID -> position, as the IDs in sorted order (one fixed-width bytes
+    array) plus the matching positions, looked up by binary search. Unlike a
+    dict it holds no per-alert Python objects and can be memory-mapped.
+    """
+
+    def __init__(self, keys: np.ndarray, positions: np.ndarray):
+        self.keys = keys
+        self.positions = positions
+        # IDs of alerts appended after the index was built
+        self.recent: Dict[str, int] = {}
+
+    @classmethod
+    def build(cls, ids: List) -> "IdIndex":
+        present = [(str(alert_id).encode("utf-8"), position) for position, alert_id in enumerate(ids) if alert_id]
+        keys = np.array([key for key, _ in present], dtype=bytes) if present else np.empty(0, dtype="S1")
+        positions = np.array([position for _, position in present], dtype=np.int64)
+        # Stable, so when an ID repeats the last alert with it sorts last and wins
+        order = np.argsort(keys, kind="stable")
+        return cls(keys[order], positions[order])
+
+    def add(self, alert_id, position: int) -> None:
+        self.recent[str(alert_id)] = position
+
+    def fingerprint(self) -> str:
+        """Hash of which ID is at which position, among the alerts the index was built with."""
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(np.ascontiguousarray(self.keys).view(np.uint8))
+        digest.update(np.ascontiguousarray(self.positions, dtype=np.int64))
+        return digest.hexdigest()
+
+    def get(self, alert_id, size: Optional[int] = None) -> Optional[int]:
+        """Position of the alert with `alert_id`, among the first `size` alerts (default: all)."""
+        position = self.recent.get(str(alert_id))
+        if position is not None and (size is None or position < size):
+            return position
+        key = str(alert_id).encode("utf-8")
+        if not key or len(key) > self.keys.itemsize:
+            return None
+        i = int(np.searchsorted(self.keys, key, side="right")) - 1
+        if i < 0 or self.keys[i] != key:
+            return None
+        return int(self.positions[i])
+
+
+class _Growable:
+    """
+    Append-only array that grows by doubling. Views of the filled part stay
+    valid after it grows (they keep the old buffer alive). New buffers come
+    from `allocate(length, dtype)`.
+    """
+
+    def __init__(self, values: np.ndarray, allocate: Callable = np.empty):
+        self.data = values
+        self.size = len(values)
+        self.allocate = allocate
+
+    def extend(self, values: np.ndarray) -> None:
+        end = self.size + len(values)
+        if end > len(self.data):
+            grown = self.allocate(max(end, 2 * len(self.data), 1024), self.data.dtype)
+            grown[:self.size] = self.data[:self.size]
+            self.data = grown
+        self.data[self.size:end] = values
+        self.size = end
+
+    def view(self) -> np.ndarray:
+        return self.data[:self.size]
+
+
+class _Blob:
+    """
+    One byte string per alert: a base buffer with offsets (built at load time
+    or mapped from a snapshot), then a growable tail for alerts appended later.
+    """
+
+    def __init__(self, base, base_offsets: np.ndarray):
+        self.base = base
+        self.base_offsets = base_offsets
+        self.base_count = len(base_offsets) - 1
+        self.tail = _Growable(np.empty(0, dtype=np.uint8))
+        self.tail_offsets = _Growable(np.zeros(1, dtype=np.int64))
+
+    def get(self, position: int) -> bytes:
+        if position < self.base_count:
+            return self.base[self.base_offsets[position]:self.base_offsets[position + 1]]
+        offsets = self.tail_offsets.data
+        position -= self.base_count
+        return self.tail.data[offsets[position]:offsets[position + 1]].tobytes()
+
+    def extend(self, data, offsets: np.ndarray) -> None:
+        """Append the strings data[offsets[i]:offsets[i + 1]]."""
+        self.tail_offsets.extend(offsets[1:] + self.tail.size)
+        self.tail.extend(np.frombuffer(data, dtype=np.uint8))
+
+    def tail_below(self, size: int):
+        """(bytes, offsets) of the appended strings of the alerts below `size`."""
+        offsets = self.tail_offsets.data[:max(size - self.base_count, 0) + 1]
+        return self.tail.data[:offsets[-1]].tobytes(), offsets
+
+
+class AlertStore:
+    """
+    Read-mostly columnar view of the loaded alerts.
+
+    Alerts are addressed by their position (0..len-1) in load order. A store
+    is never modified in place by appends: append() returns a new store with
+    the extra alerts, sharing this one's (append-only) buffers, so requests
+    that already hold a store keep a consistent view without any locking.
+    Status changes are the exception (see update_status()).
+    """
+
+    def __init__(
+        self,
+        columns: Dict[str, np.ndarray],
+        dictionaries: Dict[str, Dictionary],
+        docs: bytes,
+        doc_offsets: np.ndarray,
+        text: bytes,
+        text_offsets: np.ndarray,
+        text_index: TextIndex,
+        ids: IdIndex,
+        indexes: Optional[Dict[str, BitmapIndex]] = None,
+        time_index: Optional[TimeIndex] = None,
+    ):
+        self._buffers = {name: _Growable(values) for name, values in columns.items()}
+        self.columns = columns
+        self.dictionaries = dictionaries
+        self._docs = _Blob(docs, doc_offsets)
+        self.size = len(doc_offsets) - 1
+        self.version = next(_VERSIONS)
+
+        # All searchable text in one buffer: used to verify token index
+        # candidates, and as a C-level scan for needles the index can't narrow.
+        # Alert p's text is text[text_offsets[p]:text_offsets[p + 1] - 1].
+        # The token index covers the alerts loaded at startup; appended ones
+        # are scanned.
+        self.text_index = text_index
+        self._text = _Blob(text, text_offsets)
+        self.ids = ids
+        # Positions whose status was changed after loading: their stored JSON
+        # still has the old one
+        self._restatused = set()
+
+        # Indexes can be handed in prebuilt (e.g. mapped from a snapshot)
+        if indexes is None:
+            indexes = {name: BitmapIndex.build(columns[name]) for name in INDEXED_FIELDS}
+        self.indexes = indexes
+        self.time_index = time_index if time_index is not None else TimeIndex(columns["timestamp"])
+        self.stats = StatsAggregates.from_store(self)
+        self.rollups = HourlyRollups.build(columns["timestamp"], self.rollup_values())
+        self.geo_grid = GeoGrid.build(*self.geo_values())
+        # Sample and distinct-count sketches for the approximate analytics
+        self.sample = Reservoir(self.size)
+        self.distinct = {name[:-len("_hash")]: HyperLogLog() for name in HASHED_FIELDS}
+        for name, sketch in self.distinct.items():
+            sketch.add(columns[f"{name}_hash"])
+        self._sort_indexes: Dict[str, SortIndex] = {}
+        self._campaigns: Optional[CampaignIndex] = None
+
+    @classmethod
+    def from_alerts(cls, alerts: Iterable[dict]) -> "AlertStore":
+        builder = AlertStoreBuilder()
+        for alert in alerts:
+            builder.add(alert)
+        return builder.build()
+
+    def append(self, builder: AlertStoreBuilder) -> "AlertStore":
+        """
+        Return a new store holding this store's alerts followed by the ones
+        collected by `builder`. Only the newest store may be appended to, by
+        one thread at a time. Raises OverflowError, leaving this store as it
+        was, if a code in a merged dictionary doesn't fit its column (see
+        check_append()).
+        """
+        first = self.size
+        count = len(builder)
+        columns = builder.columns()
+        for name, remap in _merge_dictionaries(self.dictionaries, builder.dictionaries).items():
+            column = "frameworks" if name == "framework" else name
+            columns[column] = remap[columns[column]].astype(columns[column].dtype)
+        columns["framework_offsets"] = columns["framework_offsets"][1:] + self._buffers["frameworks"].size
+
+        for name, values in columns.items():
+            self._buffers[name].extend(values)
+        self._docs.extend(builder._docs, np.frombuffer(builder._doc_offsets, dtype=np.int64))
+        self._text.extend(builder._text, np.frombuffer(builder._text_offsets, dtype=np.int64))
+        for name in INDEXED_FIELDS:
+            self.indexes[name].append(columns[name])
+        for position, alert_id in enumerate(builder._ids, start=first):
+            if alert_id:
+                self.ids.add(alert_id, position)
+
+        store = copy(self)
+        store.size = first + count
+        store.version = next(_VERSIONS)
+        store.columns = {name: buffer.view() for name, buffer in self._buffers.items()}
+        store.time_index = self.time_index.appended(columns["timestamp"], first)
+        store._sort_indexes = {
+            name: index.appended(store._sort_keys(name, first), first)
+            for name, index in list(self._sort_indexes.items())
+        }
+
+        self.rollups.add(columns["timestamp"], store.rollup_values(slice(first, None)))
+        self.geo_grid.add(*store.geo_values(slice(first, None)))
+        self.sample.add(count)
+        for name, sketch in self.distinct.items():
+            sketch.add(columns[f"{name}_hash"])
+        if self._campaigns is not None:
+            self._campaigns.add(columns["correlation_id"], first)
+        days, day_counts = np.unique(
+            columns["timestamp"][columns["timestamp"] != NO_TIMESTAMP] // SECONDS_PER_DAY, return_counts=True
+        )
+        self.stats.add_counts(
+            count,
+            by_severity=store.value_counts("severity", slice(first, None)),
+            by_status=store.value_counts("status", slice(first, None)),
+            by_source=store.value_counts("source", slice(first, None)),
+            by_day=dict(zip(days.tolist(), day_counts.tolist())),
+        )
+        return store
+
+    def check_append(self, builder: AlertStoreBuilder) -> None:
+        """Raise OverflowError if appending `builder` would give a dictionary code that doesn't fit its column."""
+        for name, other in builder.dictionaries.items():
+            dictionary = self.dictionaries[name]
+            added = sum(1 for value in other.values if value not in dictionary.codes)
+            _checked(len(dictionary) + added - 1, _CODE_TYPECODES[name])
+
+    def update_status(self, positions: np.ndarray, status: str) -> Tuple["AlertStore", int]:
+        """
+        Set the status of the alerts at `positions`. The status column, its
+        bitmaps and the /stats counts are updated in place (shared with older
+        stores, so requests already running may see the change), and the
+        returned store has a new version so cached responses are recomputed.
+        Only the newest store may be updated, by the thread that appends.
+        Returns (store, number of alerts whose status actually changed).
+        """
+        dictionary = self.dictionaries["status"]
+        code = dictionary.encode(status)
+        column = self._buffers["status"].data
+        positions = np.unique(np.asarray(positions, dtype=np.int64))
+        old = column[positions]
+        changed = old != code
+        positions, old = positions[changed], old[changed]
+
+        if len(positions):
+            self.indexes["status"].move(positions, code)
+            column[positions] = code
+            self._restatused.update(positions.tolist())
+            counts = np.bincount(old, minlength=len(dictionary))
+            for old_code in np.flatnonzero(counts).tolist():
+                self.stats.change_status(dictionary.values[old_code], status, int(counts[old_code]))
+
+        store = copy(self)
+        store.version = next(_VERSIONS)
+        return store, len(positions)
+
+    def share_columns(self, names: Iterable[str], allocate: Callable) -> None:
+        """
+        Move the columns `names` into buffers from `allocate(length, dtype)`
+        (e.g. shared memory, see analytics_pool.py), where they keep growing
+        from then on. Columns mapped from a snapshot file stay mapped until
+        they grow. Only the newest store may be changed, by the thread that
+        appends.
+        """
+        for name in names:
+            buffer = self._buffers[name]
+            if not isinstance(buffer.data, np.memmap):
+                data = allocate(max(len(buffer.data), 1), buffer.data.dtype)
+                data[:buffer.size] = buffer.data[:buffer.size]
+                buffer.data = data
+            buffer.allocate = allocate
+            self.columns[name] = buffer.view()
+
+    def __len__(self) -> int:
+        return self.size
+
+    def column(self, name: str) -> np.ndarray:
+        return self.columns[name]
+
+    def code(self, name: str, value) -> Optional[int]:
+        """Code of `value` in a dictionary-encoded column, or None if it never occurs."""
+        return self.dictionaries[name].codes.get(value)
+
+    def value_counts(self, name: str, mask: Optional[np.ndarray] = None) -> dict:
+        """Count occurrences of each value of a dictionary-encoded column."""
+        codes = self.columns[name] if mask is None else self.columns[name][mask]
+        dictionary = self.dictionaries[name]
+        counts = np.bincount(codes, minlength=len(dictionary))
+        return {dictionary.values[code]: int(counts[code]) for code in np.flatnonzero(counts)}
+
+    def bitmap(self, name: str, value):
+        """Bitmap of alerts whose indexed column `name` equals `value`."""
+        return self.indexes[name].get(self.code(name, value), self.size)
+
+    def _sort_keys(self, name: str, first: int = 0) -> np.ndarray:
+        """Sort keys of the alerts from position `first` on."""
+        if name == "severity":
+            ranks = {value: rank for rank, value in enumerate(SEVERITY_ORDER)}
+            keys = np.array([ranks.get(value, -1) for value in self.dictionaries[name].values], dtype=np.int8)
+            return keys[self.columns[name][first:]]
+        return self.columns[name][first:]
+
+    def sort_index(self, name: str) -> SortIndex:
+        """Presorted index over sort key `name` (see sort_index.SORT_FIELDS), built on first use."""
+        index = self._sort_indexes.get(name)
+        if index is None:
+            index = self._sort_indexes[name] = SortIndex(self._sort_keys(name))
+        return index
+
+    def rollup_values(self, positions=slice(None)) -> np.ndarray:
+        """What the alerts at `positions` add to the hourly rollups (rows: rollups.FIELDS, a column per alert)."""
+        sections = self.columns["sections"][positions]
+        has_risk = (sections & SECTION_RISK) != 0
+        has_cost = (sections & SECTION_COST) != 0
+        return np.stack((
+            np.ones(len(sections)),
+            np.where(has_risk, self.columns["risk_score"][positions], 0),
+            has_risk,
+            np.where(has_cost, self.columns["estimated_cost_usd"][positions], 0),
+            has_cost,
+        )).astype(np.float64)
+
+    def geo_values(self, positions=slice(None)) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """(latitude, longitude, severity code) of the alerts at `positions` that have coordinates."""
+        latitude = self.columns["latitude"][positions]
+        longitude = self.columns["longitude"][positions]
+        located = ((self.columns["sections"][positions] & SECTION_RESOURCE) != 0) & (latitude != 0) & (longitude != 0)
+        return latitude[located], longitude[located], self.columns["severity"][positions][located]
+
+    def campaign_index(self) -> CampaignIndex:
+        """Index of the alerts by correlation ID (see campaigns.py), built on first use."""
+        if self._campaigns is None:
+            self._campaigns = CampaignIndex(self.columns["correlation_id"])
+        return self._campaigns
+
+    def time_range(self, start: Optional[int] = None, end: Optional[int] = None) -> Bitmap:
+        """Bitmap of alerts with start <= timestamp <= end (epoch seconds)."""
+        return Bitmap.from_positions(self.time_index.range(start, end), self.size)
+
+    def position(self, alert_id) -> Optional[int]:
+        return self.ids.get(alert_id, self.size)
+
+    def raw(self, position: int) -> bytes:
+        """JSON encoding of the alert at `position`."""
+        raw = self._docs.get(position)
+        if position in self._restatused:
+            alert = json.loads(raw)
+            alert["status"] = self.dictionaries["status"].values[self.columns["status"][position]]
+            raw = json.dumps(alert, separators=(",", ":")).encode("utf-8")
+        return raw
+
+    def materialize(self, position: int) -> dict:
+        """Rebuild the full alert dict at `position`."""
+        return json.loads(self.raw(position))
+
+    def materialize_many(self, positions: Iterable[int]) -> List[dict]:
+        return [self.materialize(int(position)) for position in positions]
+
+    def search(self, needle: str) -> np.ndarray:
+        """
+        Positions (ascending) of alerts whose message, type or resource name
+        contains `needle` (case-insensitive).
+        """
+        needle = needle.lower().encode("utf-8")
+        if FIELD_SEPARATOR.encode() in needle or DOC_SEPARATOR in needle:
+            return np.empty(0, dtype=np.int64)
+
+        text, offsets = self._text.base, self._text.base_offsets
+        candidates, exact = self.text_index.lookup(needle)
+        if candidates is None:
+            found = _scan(text, offsets, needle)
+        elif exact:
+            found = candidates
+        else:
+            # Verify candidates against the text, without copying it
+            starts = offsets[candidates]
+            ends = offsets[candidates + 1] - 1
+            found = np.array([
+                position
+                for position, start, end in zip(candidates.tolist(), starts.tolist(), ends.tolist())
+                if text.find(needle, start, end) != -1
+            ], dtype=np.int64)
+
+        if self.size > self._text.base_count:
+            tail, tail_offsets = self._text.tail_below(self.size)
+            found = np.concatenate((found, _scan(tail, tail_offsets, needle) + self._text.base_count))
+        return found
+
+
+def _scan(text, offsets: np.ndarray, needle: bytes) -> np.ndarray:
+    """Search by scanning a whole text buffer, one hit per alert."""
+    starts = []
+    start = text.find(needle)
+    while start != -1:
+        starts.append(start)
+        start = text.find(needle, text.find(DOC_SEPARATOR, start) + 1)
+    return np.searchsorted(offsets, starts, side="right") - 1
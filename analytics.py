@@ -0,0 +1,288 @@
+"""
+Vectorized analytics engine for /analytics/advanced.
+
+Every section of the response is computed from the store's columns with
+NumPy group-by operations (bincount over dictionary codes, weighted bincount
+per severity, digitize for score bands) instead of a Python loop over alerts.
+Section masks, per-severity groups and histograms are each computed once and
+shared by every part of the response that needs them.
+
+With approx=True the same engine runs over the store's uniform sample (see
+sketches.py) instead of every alert, and counts and sums are scaled up to the
+full dataset; the response then also carries risk-score percentiles,
+distinct-value counts and the error bounds of all of these.
+"""
+from threading import Lock
+import calendar
+import weakref
+
+import numpy as np
+
+from alert_store import (
+    SECTION_COMPLIANCE,
+    SECTION_COST,
+    SECTION_RESOURCE,
+    SECTION_RISK,
+    SECTION_THREAT,
+)
+from sketches import count_margin, rank_margin
+from time_index import EPOCH_DATE, SECONDS_PER_DAY, SECONDS_PER_HOUR
+
+EPOCH_WEEKDAY = EPOCH_DATE.weekday()  # 1970-01-01 was a Thursday
+
+# Severity the per-severity breakdowns count alerts without one as
+DEFAULT_SEVERITY = "low"
+
+# Score bands, as right-open intervals: [0, 40) low, [40, 60) medium, ...
+RISK_BANDS = np.array([40, 60, 80])
+CONFIDENCE_BANDS = np.array([80, 90])
+
+HEATMAP_LIMIT = 10000  # Limit for performance
+
+# Risk-score percentiles reported in approximate mode
+RISK_PERCENTILES = (50, 90, 95, 99)
+
+# Heatmap points in approximate mode (a random sample; /geo/grid has the exact density)
+APPROX_HEATMAP_LIMIT = 2000
+
+# Gathered sample columns per reservoir, reused until the sample changes
+_SAMPLE_VIEWS = weakref.WeakKeyDictionary()
+_SAMPLE_VIEWS_LOCK = Lock()
+
+
+def _counts(
+    codes: np.ndarray, values: list, mask: np.ndarray = None, skip_empty: bool = False, scale: float = 1
+) -> dict:
+    """{value: count} for dictionary codes, optionally restricted to `mask` (counts multiplied by `scale`)."""
+    counts = np.bincount(codes if mask is None else codes[mask], minlength=len(values))
+    return {
+        values[code]: int(round(counts[code] * scale))
+        for code in np.flatnonzero(counts)
+        if not (skip_empty and not values[code])
+    }
+
+
+def _top(counts: dict, n: int) -> dict:
+    """The `n` largest entries, ties kept in first-seen order (like Counter.most_common)."""
+    return dict(sorted(counts.items(), key=lambda item: item[1], reverse=True)[:n])
+
+
+class _SeverityGroups:
+    """
+    Per-severity counts and sums over the alerts in one section mask. Alerts
+    without a severity (code 0) count as "low".
+    """
+
+    def __init__(self, severity: np.ndarray, severities: list, mask: np.ndarray):
+        severities = list(severities)
+        low = severities.index(DEFAULT_SEVERITY) if DEFAULT_SEVERITY in severities else len(severities)
+        if low == len(severities):
+            severities.append(DEFAULT_SEVERITY)
+        codes = severity[mask]
+        self._codes = np.where(codes == 0, low, codes)
+        self._mask = mask
+        self._minlength = len(severities)
+        self._severities = severities
+        self.counts = np.bincount(self._codes, minlength=self._minlength)
+        self.present = np.flatnonzero(self.counts)
+
+    def sums(self, values: np.ndarray) -> np.ndarray:
+        return np.bincount(self._codes, weights=values[self._mask], minlength=self._minlength)
+
+    def as_dict(self, per_group) -> dict:
+        return {self._severities[code]: per_group[code] for code in self.present}
+
+
+class _Sampled(dict):
+    """The store's columns restricted to sampled `positions`, each gathered on first use."""
+
+    def __init__(self, columns: dict, positions: np.ndarray):
+        super().__init__()
+        self._columns = columns
+        self._positions = positions
+        # Frameworks are a list per alert: gather the sampled alerts' lists
+        offsets = columns["framework_offsets"]
+        lengths = offsets[positions + 1] - offsets[positions]
+        self["framework_offsets"] = np.concatenate(([0], np.cumsum(lengths)))
+        starts = np.repeat(offsets[positions] - self["framework_offsets"][:-1], lengths)
+        self["frameworks"] = columns["frameworks"][starts + np.arange(len(starts))]
+
+    def __missing__(self, name):
+        values = self[name] = self._columns[name][self._positions]
+        return values
+
+
+def _sample_view(store, sample: np.ndarray) -> _Sampled:
+    """The store's columns at the `sample` positions, gathered once per state of the sample."""
+    key = (store.sample.changes, len(sample))
+    with _SAMPLE_VIEWS_LOCK:
+        cached = _SAMPLE_VIEWS.get(store.sample)
+        if cached is None or cached[0] != key:
+            # Only the status column changes in place, and the engine doesn't read it
+            cached = _SAMPLE_VIEWS[store.sample] = (key, _Sampled(store.columns, sample))
+    return cached[1]
+
+
+def advanced_analytics(store, approx: bool = False) -> dict:
+    """Compute the /analytics/advanced response from a store's columns (or its sample, if `approx`)."""
+    columns = store.columns
+    dictionaries = store.dictionaries
+    total = len(store)
+    sample = store.sample.positions(total) if approx else None
+    scale = 1
+    if sample is not None and len(sample) < total:
+        columns = _sample_view(store, sample)
+        scale = total / len(sample)
+
+    sections = columns["sections"]
+    has_threat = (sections & SECTION_THREAT) != 0
+    has_risk = (sections & SECTION_RISK) != 0
+    has_resource = (sections & SECTION_RESOURCE) != 0
+    has_compliance = (sections & SECTION_COMPLIANCE) != 0
+    has_cost = (sections & SECTION_COST) != 0
+
+    severity = columns["severity"]
+    severities = dictionaries["severity"].values
+
+    def counts(name, mask=None, skip_empty=False):
+        return _counts(columns[name], dictionaries[name].values, mask, skip_empty, scale)
+
+    def scaled(value) -> int:
+        return int(round(value * scale))
+
+    # Threat Intelligence Analysis
+    threat_actors = counts("threat_actor", has_threat)
+    attack_stages = counts("attack_stage", has_threat)
+
+    # Risk Analysis
+    risk_score = columns["risk_score"]
+    risk_groups = _SeverityGroups(severity, severities, has_risk)
+    risk_sums = risk_groups.sums(risk_score)
+    risk_count = int(risk_groups.counts.sum())
+    risk_bands = np.bincount(np.digitize(risk_score[has_risk], RISK_BANDS), minlength=4)
+
+    # Geographic Analysis
+    latitude = columns["latitude"]
+    longitude = columns["longitude"]
+    geo_positions = np.flatnonzero(has_resource & (latitude != 0) & (longitude != 0))
+    geo_positions = geo_positions[:APPROX_HEATMAP_LIMIT if approx else HEATMAP_LIMIT]
+
+    # Compliance Analysis
+    framework_counts = np.diff(columns["framework_offsets"])
+    frameworks = columns["frameworks"][np.repeat(has_compliance, framework_counts)]
+
+    # Cost Impact Analysis
+    cost_groups = _SeverityGroups(severity, severities, has_cost)
+    cost_sums = cost_groups.sums(columns["estimated_cost_usd"])
+    downtime_sums = cost_groups.sums(columns["downtime_minutes"])
+    data_loss_sums = cost_groups.sums(columns["data_loss_mb"])
+
+    # Anomaly Detection
+    confidence = columns["confidence"]
+    confidence_scores = confidence[confidence > 0]
+    confidence_bands = np.bincount(np.digitize(confidence_scores, CONFIDENCE_BANDS), minlength=3)
+    campaigns = store.campaign_index()
+    correlation_ids = dictionaries["correlation_id"].values
+
+    # Time-based patterns, counted per bucket from the time index
+    hour_buckets, hour_counts = store.time_index.bucket_counts(SECONDS_PER_HOUR)
+    hours = np.bincount(hour_buckets % 24, weights=hour_counts, minlength=24)
+    day_buckets, day_counts = store.time_index.bucket_counts(SECONDS_PER_DAY)
+    weekdays = np.bincount((day_buckets + EPOCH_WEEKDAY) % 7, weights=day_counts, minlength=7)
+
+    # Calculate statistics
+    avg_risk_score = float(risk_sums.sum()) / risk_count if risk_count else 0
+    avg_confidence = float(confidence_scores.mean()) if len(confidence_scores) else 0
+    downtime_by_severity = cost_groups.as_dict([scaled(s) for s in downtime_sums])
+    data_loss_by_severity = cost_groups.as_dict([scaled(s) for s in data_loss_sums])
+
+    result = {
+        "threat_intelligence": {
+            "top_threat_actors": _top(threat_actors, 10),
+            "threat_actor_countries": counts("threat_actor_country", has_threat),
+            "attack_stages": attack_stages,
+            "ioc_types": counts("ioc_type", has_threat),
+            "attack_chain_sequence": {k: v for k, v in attack_stages.items() if k}
+        },
+        "risk_analysis": {
+            "average_risk_score": round(avg_risk_score, 2),
+            "risk_distribution": {
+                "critical": scaled(risk_bands[3]),
+                "high": scaled(risk_bands[2]),
+                "medium": scaled(risk_bands[1]),
+                "low": scaled(risk_bands[0])
+            },
+            "risk_by_severity": risk_groups.as_dict(
+                [round(float(s) / c, 2) if c else 0 for s, c in zip(risk_sums, risk_groups.counts)]
+            ),
+            "exploitability_breakdown": counts("exploitability", has_risk),
+            "average_confidence": round(avg_confidence, 2)
+        },
+        "geographic": {
+            "countries": counts("country", has_resource, skip_empty=True),
+            "regions": counts("region", has_resource, skip_empty=True),
+            "heatmap_data": [
+                {"lat": lat, "lon": lon, "severity": severities[code]}
+                for lat, lon, code in zip(
+                    latitude[geo_positions].tolist(),
+                    longitude[geo_positions].tolist(),
+                    severity[geo_positions].tolist(),
+                )
+            ]
+        },
+        "compliance": {
+            "framework_violations": _counts(frameworks, dictionaries["framework"].values, scale=scale),
+            "violation_severities": counts("violation_severity", has_compliance),
+            "data_classifications": counts("data_classification", has_compliance),
+            "compliance_score": round((1 - np.count_nonzero(framework_counts) / len(framework_counts)) * 100, 2) if total else 0
+        },
+        "cost_impact": {
+            "total_cost_usd": round(float(cost_sums.sum()) * scale, 2),
+            "cost_by_severity": cost_groups.as_dict([round(float(s) * scale, 2) for s in cost_sums]),
+            "total_downtime_minutes": sum(downtime_by_severity.values()),
+            "total_data_loss_mb": sum(data_loss_by_severity.values()),
+            "downtime_by_severity": downtime_by_severity,
+            "data_loss_by_severity": data_loss_by_severity
+        },
+        "anomaly_detection": {
+            "correlated_alerts": campaigns.correlated,
+            "top_correlations": {
+                correlation_ids[code]: campaigns.count(code) for code in campaigns.top(10)
+            },
+            "high_confidence_alerts": scaled(confidence_bands[2]),
+            "low_confidence_alerts": scaled(confidence_bands[0])
+        },
+        "time_patterns": {
+            "by_hour": {hour: int(count) for hour, count in enumerate(hours) if count},
+            "by_day_of_week": {calendar.day_name[day]: int(count) for day, count in enumerate(weekdays) if count}
+        }
+    }
+    if approx:
+        n = total if sample is None or len(sample) >= total else len(sample)
+        scores = risk_score[has_risk]
+        if len(scores):
+            percentiles = np.percentile(scores, RISK_PERCENTILES)
+            result["risk_analysis"]["risk_percentiles"] = {
+                f"p{p}": round(float(value), 2) for p, value in zip(RISK_PERCENTILES, percentiles)
+            }
+        result["distinct_counts"] = distinct_counts(store)
+        result["approximation"] = {
+            "method": "uniform sample",
+            "sample_size": n,
+            "population": total,
+            "confidence_level": 0.95,
+            # Every count is within this of the true one; counts near 0 or
+            # near the total are much closer (see sketches.count_margin)
+            "max_count_margin": count_margin(total / 2, total, n),
+            "percentile_rank_margin": round(rank_margin(n, total), 4),
+        }
+    return result
+
+
+def distinct_counts(store) -> dict:
+    """HyperLogLog estimates of the distinct source IPs and users, with 95% margins."""
+    counts = {}
+    for name, sketch in store.distinct.items():
+        estimate = sketch.estimate()
+        counts[name] = {"estimate": estimate, "margin": int(np.ceil(estimate * sketch.relative_error()))}
+    return counts
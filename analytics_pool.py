@@ -0,0 +1,293 @@
+"""
+Bounded process pool for the exact /analytics/advanced computation.
+
+The engine in analytics.py is vectorized, but an exact pass over millions of
+alerts still holds a core for a noticeable time; computed in the server
+process, it competes with every cheap request (lookups, pages, /stats) for the
+GIL. Here it runs in a few worker processes instead:
+
+- the columns the engine reads live in shared memory (or stay mapped from the
+  snapshot file), so a task carries where to find them, not the data; workers
+  map them read-only
+- the other inputs (dictionary values, the top campaigns, the time buckets)
+  are cheap to get in the server and travel with the task
+- at most `workers` tasks run and `queue` more wait; past that, a request gets
+  AnalyticsBusy with an estimate of when to retry (429 + Retry-After in the API)
+
+Approximate analytics, /stats, rollups and lookups stay in the server process:
+they are cheap enough that shipping them to a worker would cost more than it
+saves.
+"""
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import shared_memory
+from threading import Lock
+from typing import Dict, Optional, Tuple
+import math
+import multiprocessing
+import shutil
+import time
+import weakref
+
+import numpy as np
+
+from analytics import advanced_analytics
+from time_index import SECONDS_PER_DAY, SECONDS_PER_HOUR
+
+# What advanced_analytics() reads in exact mode
+ENGINE_COLUMNS = (
+    "sections", "severity", "threat_actor", "attack_stage", "threat_actor_country", "ioc_type",
+    "risk_score", "exploitability", "latitude", "longitude", "country", "region",
+    "framework_offsets", "frameworks", "violation_severity", "data_classification",
+    "estimated_cost_usd", "downtime_minutes", "data_loss_mb", "confidence",
+)
+ENGINE_DICTIONARIES = (
+    "severity", "threat_actor", "attack_stage", "threat_actor_country", "ioc_type", "exploitability",
+    "country", "region", "framework", "violation_severity", "data_classification",
+)
+
+# Columns only go to shared memory while /dev/shm keeps this much free (a
+# full tmpfs would crash the server on write); the rest stay private, and
+# analytics over them are computed in-process
+SHM_DIR = "/dev/shm"
+SHM_HEADROOM_BYTES = 64 * 1024 * 1024
+
+# Assumed compute time of a task until one has been measured
+INITIAL_TASK_SECONDS = 1.0
+
+
+class AnalyticsBusy(Exception):
+    """The pool's queue is full; `retry_after` estimates the seconds until there's room."""
+
+    def __init__(self, retry_after: int):
+        super().__init__(f"Analytics workers are busy, retry in {retry_after}s")
+        self.retry_after = retry_after
+
+
+def _shm_free() -> Optional[int]:
+    try:
+        return shutil.disk_usage(SHM_DIR).free
+    except OSError:
+        return None
+
+
+class SharedColumns:
+    """
+    Allocates column buffers in shared memory (for AlertStore.share_columns),
+    and describes column views so a worker can map them. A segment is
+    unlinked once no store uses its buffer any more.
+    """
+
+    def __init__(self):
+        self._segments: Dict[int, str] = {}  # id of a buffer -> its segment
+        self._lock = Lock()
+
+    def allocate(self, length: int, dtype) -> np.ndarray:
+        dtype = np.dtype(dtype)
+        nbytes = max(length * dtype.itemsize, 1)
+        free = _shm_free()
+        if free is not None and free - nbytes < SHM_HEADROOM_BYTES:
+            return np.empty(length, dtype=dtype)
+        segment = shared_memory.SharedMemory(create=True, size=nbytes)
+        array = np.ndarray((length,), dtype=dtype, buffer=segment.buf)
+        with self._lock:
+            self._segments[id(array)] = segment.name
+        weakref.finalize(array, self._release, id(array), segment)
+        return array
+
+    def _release(self, key: int, segment: shared_memory.SharedMemory) -> None:
+        with self._lock:
+            self._segments.pop(key, None)
+        segment.close()
+        segment.unlink()
+
+    def describe(self, column: np.ndarray) -> Optional[tuple]:
+        """
+        Where a worker finds `column`: ("shm", segment, byte offset, dtype,
+        length), ("file", .npy path, first item, length) for a snapshot
+        mapping, or None for private memory.
+        """
+        root = column
+        while isinstance(root.base, np.ndarray):
+            root = root.base
+        start = column.__array_interface__["data"][0] - root.__array_interface__["data"][0]
+        if isinstance(root, np.memmap) and root.filename:
+            return ("file", root.filename, start // column.itemsize, len(column))
+        with self._lock:
+            name = self._segments.get(id(root))
+        if name is None:
+            return None
+        return ("shm", name, start, column.dtype.str, len(column))
+
+
+class AnalyticsPool:
+    """
+    Up to `workers` processes computing exact advanced analytics, with at
+    most `queue` more requests waiting for one. With workers=0 (or columns
+    that aren't shared) the analytics are computed in the calling thread,
+    under the same limit.
+    """
+
+    def __init__(self, workers: int, queue: int):
+        self.workers = workers
+        self.queue = queue
+        self.shared = SharedColumns()
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = Lock()
+        self._pending = 0
+        self._task_seconds = INITIAL_TASK_SECONDS  # moving average
+        self.tasks = 0  # computed by workers
+
+    def share(self, store) -> None:
+        """Move `store`'s engine columns into shared memory (only the newest store, by the thread that appends)."""
+        if self.workers:
+            store.share_columns(ENGINE_COLUMNS, self.shared.allocate)
+
+    def advanced_analytics(self, store) -> dict:
+        """advanced_analytics(store), from a worker; raises AnalyticsBusy if too many are already pending."""
+        with self._lock:
+            if self._pending >= max(self.workers, 1) + self.queue:
+                raise AnalyticsBusy(self._retry_after())
+            self._pending += 1
+        try:
+            task = self._task(store) if self.workers else None
+            result = None
+            if task is not None:
+                try:
+                    seconds, result = self._pool().submit(_run, task).result()
+                    with self._lock:
+                        self.tasks += 1
+                except BrokenProcessPool:
+                    # A worker died (e.g. killed for memory); start over next time
+                    self._reset()
+                except OSError:
+                    # The snapshot file behind a column was removed by a compaction
+                    pass
+            if result is None:
+                began = time.perf_counter()
+                result = advanced_analytics(store)
+                seconds = time.perf_counter() - began
+            with self._lock:
+                self._task_seconds += 0.2 * (seconds - self._task_seconds)
+            return result
+        finally:
+            with self._lock:
+                self._pending -= 1
+
+    def close(self) -> None:
+        self._reset(wait=True)
+
+    def _retry_after(self) -> int:
+        return max(1, math.ceil(self._task_seconds * self._pending / max(self.workers, 1)))
+
+    def _pool(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                # "spawn" keeps workers from inheriting the server's threads and locks
+                context = multiprocessing.get_context("spawn")
+                self._executor = ProcessPoolExecutor(max_workers=self.workers, mp_context=context)
+            return self._executor
+
+    def _reset(self, wait: bool = False) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait, cancel_futures=True)
+
+    def _task(self, store) -> Optional[dict]:
+        columns = {}
+        for name in ENGINE_COLUMNS:
+            columns[name] = self.shared.describe(store.columns[name])
+            if columns[name] is None:
+                return None
+        campaigns = store.campaign_index()
+        top = campaigns.top(10)
+        correlation_ids = store.dictionaries["correlation_id"].values
+        return {
+            "size": len(store),
+            "columns": columns,
+            "dictionaries": {name: list(store.dictionaries[name].values) for name in ENGINE_DICTIONARIES},
+            "correlation_ids": {code: correlation_ids[code] for code in top},
+            "campaigns": (campaigns.correlated, [(code, campaigns.count(code)) for code in top]),
+            "time_buckets": {
+                width: store.time_index.bucket_counts(width) for width in (SECONDS_PER_HOUR, SECONDS_PER_DAY)
+            },
+        }
+
+
+# Worker side: mappings kept between tasks, by ("shm", segment) or ("file", path)
+_MAPPED: Dict[tuple, object] = {}
+
+
+class _Values:
+    def __init__(self, values):
+        self.values = values
+
+
+class _Campaigns:
+    """The part of a CampaignIndex the engine reads: the correlated count and the top campaigns."""
+
+    def __init__(self, correlated: int, top):
+        self.correlated = correlated
+        self._top = top
+
+    def top(self, n: int):
+        return [code for code, _ in self._top[:n]]
+
+    def count(self, code: int) -> int:
+        return dict(self._top)[code]
+
+
+class _TimeBuckets:
+    def __init__(self, buckets):
+        self._buckets = buckets
+
+    def bucket_counts(self, width: int):
+        return self._buckets[width]
+
+
+class _StoreView:
+    """What advanced_analytics() needs of an AlertStore, rebuilt from a task."""
+
+    def __init__(self, task: dict, columns: Dict[str, np.ndarray]):
+        self.size = task["size"]
+        self.columns = columns
+        self.dictionaries = {name: _Values(values) for name, values in task["dictionaries"].items()}
+        self.dictionaries["correlation_id"] = _Values(task["correlation_ids"])
+        self.time_index = _TimeBuckets(task["time_buckets"])
+        self._campaigns = _Campaigns(*task["campaigns"])
+
+    def __len__(self) -> int:
+        return self.size
+
+    def campaign_index(self) -> _Campaigns:
+        return self._campaigns
+
+
+def _attach(ref: tuple) -> np.ndarray:
+    kind, location = ref[0], ref[1]
+    mapped = _MAPPED.get((kind, location))
+    if kind == "file":
+        if mapped is None:
+            mapped = _MAPPED[kind, location] = np.load(location, mmap_mode="r")
+        _, _, first, length = ref
+        return mapped[first:first + length]
+    if mapped is None:
+        mapped = _MAPPED[kind, location] = shared_memory.SharedMemory(name=location)
+    _, _, offset, dtype, length = ref
+    return np.ndarray((length,), dtype=dtype, buffer=mapped.buf, offset=offset)
+
+
+def _run(task: dict) -> Tuple[float, dict]:
+    """Worker entry point: (compute seconds, advanced analytics) of the store described by `task`."""
+    began = time.perf_counter()
+    used = {(ref[0], ref[1]) for ref in task["columns"].values()}
+    # Unmap what the last task used and this one doesn't (e.g. buffers that
+    # have grown since); nothing refers to them between tasks
+    for key in set(_MAPPED) - used:
+        mapped = _MAPPED.pop(key)
+        if key[0] == "shm":
+            mapped.close()
+    columns = {name: _attach(ref) for name, ref in task["columns"].items()}
+    result = advanced_analytics(_StoreView(task, columns))
+    return time.perf_counter() - began, result
@@ -0,0 +1,364 @@
+"""
+Benchmark the API endpoints in-process, on generated datasets of several sizes.
+
+Usage:
+    python benchmark_endpoints.py [--profiles 10k 1m ...] [--output FILE] [--baseline FILE]
+                                  [--repeat N] [--budget SECONDS] [--data-dir DIR]
+    python benchmark_endpoints.py --compare BASELINE CURRENT [--threshold F]
+
+For every dataset profile (see generate_large_dataset.py) the dataset is
+generated into <data-dir>/<profile>/ unless it is already there with the same
+settings. Each dataset is then measured in fresh processes:
+
+- load_alerts() parsing the JSONL file (ALERT_SNAPSHOTS=0), then again
+  mapping the snapshot the first run writes: seconds, RSS and peak RSS;
+- every endpoint case in CASES (get_alerts with common filter, search and
+  sort combinations, get_alert, get_stats, get_advanced_analytics,
+  get_predictive_analytics), called like FastAPI would with the response
+  cache cleared before each call: the first call (which builds lazy
+  indexes), p50/p95/p99 of the next ones, and the peak memory allocated
+  during a call (tracemalloc, which sees NumPy arrays). Calls computed in
+  the analytics worker pool (see analytics_pool.py) allocate in the worker,
+  which tracemalloc doesn't see: their cases add worker_peak_rss_mb, the
+  peak RSS of the pool's processes.
+
+Results are written as JSON. With --baseline (or --compare, for two result
+files) every latency, memory and load figure is compared with the baseline,
+and those worse by more than --threshold (and by more than NOISE_FLOORS) are
+reported as regressions; the exit status is then 1.
+"""
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+import argparse
+import contextlib
+import io
+import json
+import multiprocessing
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+from generate_large_dataset import PROFILES, dataset_params, generate, resolve_options, write_params
+
+DATA_FILE = "aws_like_alerts_10000.jsonl"
+
+# Endpoint cases: (endpoint, label, keyword arguments). Arguments may be
+# callables of the Context, for values that depend on the dataset.
+CASES = [
+    ("get_alerts", "", {}),
+    ("get_alerts", "offset=10000", {"offset": 10000}),
+    ("get_alerts", "severity=critical", {"severity": "critical"}),
+    ("get_alerts", "severity=high&status=open", {"severity": "high", "status": "open"}),
+    ("get_alerts", "source=AWS-GuardDuty&status=in_progress", {"source": "AWS-GuardDuty", "status": "in_progress"}),
+    ("get_alerts", "search=ransomware", {"search": "ransomware"}),
+    ("get_alerts", "search=user_42&severity=critical", {"search": "user_42", "severity": "critical"}),
+    ("get_alerts", "start=-7d", {"start": lambda c: c.end - timedelta(days=7), "end": lambda c: c.end}),
+    ("get_alerts", "sort=timestamp", {"sort": "timestamp"}),
+    ("get_alerts", "sort=risk_score&severity=critical", {"sort": "risk_score", "severity": "critical"}),
+    ("get_alerts", "sort=estimated_cost_usd&search=exfiltration",
+     {"sort": "estimated_cost_usd", "search": "exfiltration"}),
+    ("get_alert", "hit", {"alert_id": lambda c: c.next_id()}),
+    ("get_alert", "miss", {"alert_id": "no-such-alert"}),
+    ("get_stats", "", {}),
+    ("get_stats", "approx=true", {"approx": True}),
+    ("get_advanced_analytics", "", {}),
+    ("get_advanced_analytics", "approx=true", {"approx": True}),
+    ("get_predictive_analytics", "granularity=day&start=-30d",
+     {"start": lambda c: c.end - timedelta(days=30), "end": lambda c: c.end}),
+    ("get_predictive_analytics", "granularity=hour&start=-7d",
+     {"granularity": "hour", "start": lambda c: c.end - timedelta(days=7), "end": lambda c: c.end}),
+    ("get_predictive_analytics", "granularity=week&start=-365d",
+     {"granularity": "week", "start": lambda c: c.end - timedelta(days=365), "end": lambda c: c.end}),
+]
+
+# Differences below these never count as regressions, however large relatively
+NOISE_FLOORS = {"ms": 0.5, "mb": 1.0, "seconds": 0.05}
+
+
+class Context:
+    """What case arguments can depend on: the dataset's last timestamp and some alert IDs."""
+
+    def __init__(self, store, count: int = 1000):
+        from alert_store import alert_identifier
+        from time_index import NO_TIMESTAMP
+
+        timestamps = store.column("timestamp")
+        timestamps = timestamps[timestamps != NO_TIMESTAMP]
+        last = int(timestamps.max()) if len(timestamps) else int(time.time())
+        self.end = datetime.fromtimestamp(last, timezone.utc)
+        positions = np.random.default_rng(0).integers(0, len(store), min(count, len(store)))
+        self.ids = [alert_identifier(store.materialize(int(position))) for position in positions]
+        self._next = 0
+
+    def next_id(self):
+        self._next += 1
+        return self.ids[self._next % len(self.ids)]
+
+
+def _memory_mb():
+    """(RSS, peak RSS) of this process in MB, or (None, None) where /proc isn't available."""
+    try:
+        with open("/proc/self/status") as f:
+            fields = dict(line.split(":", 1) for line in f if ":" in line)
+        return round(int(fields["VmRSS"].split()[0]) / 1024, 1), round(int(fields["VmHWM"].split()[0]) / 1024, 1)
+    except (OSError, KeyError, ValueError):
+        return None, None
+
+
+def _workers_peak_rss_mb():
+    """Largest peak RSS among this process's children (the analytics workers) in MB, or None."""
+    peaks = []
+    try:
+        for task in os.listdir("/proc/self/task"):
+            with open(f"/proc/self/task/{task}/children") as f:
+                for pid in f.read().split():
+                    with open(f"/proc/{pid}/status") as status:
+                        fields = dict(line.split(":", 1) for line in status if ":" in line)
+                    peaks.append(int(fields["VmHWM"].split()[0]))
+    except (OSError, KeyError, ValueError):
+        return None
+    return round(max(peaks) / 1024, 1) if peaks else None
+
+
+def _call(main, endpoint: str, arguments: dict, context: Context) -> float:
+    """Seconds one call of `endpoint` takes, with the response cache cleared first."""
+    from fastapi import HTTPException
+
+    kwargs = {name: value(context) if callable(value) else value for name, value in arguments.items()}
+    main.RESPONSE_CACHE.clear()
+    began = time.perf_counter()
+    try:
+        getattr(main, endpoint)(**kwargs)
+    except HTTPException:
+        pass
+    return time.perf_counter() - began
+
+
+def _run_case(main, endpoint: str, arguments: dict, context: Context, repeat: int, budget: float) -> dict:
+    tasks = main.ANALYTICS_POOL.tasks
+    first = _call(main, endpoint, arguments, context)
+    timings = []
+    began = time.perf_counter()
+    while len(timings) < repeat and (len(timings) < 5 or time.perf_counter() - began < budget):
+        timings.append(_call(main, endpoint, arguments, context))
+
+    tracemalloc.start()
+    _call(main, endpoint, arguments, context)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    p50, p95, p99 = np.percentile(np.array(timings) * 1000, [50, 95, 99]).tolist()
+    figures = {
+        "first_ms": round(first * 1000, 3),
+        "p50_ms": round(p50, 3),
+        "p95_ms": round(p95, 3),
+        "p99_ms": round(p99, 3),
+        "runs": len(timings),
+        "peak_mb": round(peak / 2 ** 20, 3),
+    }
+    if main.ANALYTICS_POOL.tasks > tasks:
+        figures["worker_peak_rss_mb"] = _workers_peak_rss_mb()
+    return figures
+
+
+def _measure(directory: str, snapshots: bool, endpoints: bool, repeat: int, budget: float, connection) -> None:
+    """
+    Child process: load the dataset in `directory` with load_alerts(), then
+    benchmark the endpoints if `endpoints`. Sends the results to `connection`.
+    """
+    os.environ["ALERT_DATA_DIR"] = directory
+    os.environ["ALERT_SNAPSHOTS"] = "1" if snapshots else "0"
+    with contextlib.redirect_stdout(io.StringIO()):
+        import main
+
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            began = time.perf_counter()
+            main.load_alerts()
+            seconds = time.perf_counter() - began
+            rss, peak_rss = _memory_mb()
+            if not snapshots:
+                # For the next run to map
+                main.save_snapshot(main.STORE, Path(directory) / DATA_FILE)
+        result = {"alerts": len(main.STORE), "seconds": round(seconds, 3), "rss_mb": rss, "peak_rss_mb": peak_rss}
+        print(f"   {seconds:.2f}s, RSS {rss} MB (peak {peak_rss} MB)", flush=True)
+
+        if endpoints:
+            context = Context(main.STORE)
+            cases = {}
+            for endpoint, label, arguments in CASES:
+                name = f"{endpoint}?{label}" if label else endpoint
+                figures = cases[name] = _run_case(main, endpoint, arguments, context, repeat, budget)
+                worker = figures.get("worker_peak_rss_mb")
+                print(f"   {name:<60} p50 {figures['p50_ms']:9.2f} ms   p99 {figures['p99_ms']:9.2f} ms   "
+                      f"peak {figures['peak_mb']:8.1f} MB" + (f"   worker peak RSS {worker} MB" if worker else ""),
+                      flush=True)
+            result["endpoints"] = cases
+            result["rss_after_endpoints_mb"], result["peak_rss_after_endpoints_mb"] = _memory_mb()
+    finally:
+        # The pool's processes aren't daemons: left running, this process
+        # would wait for them forever when it exits
+        main.ANALYTICS_POOL.close()
+    connection.send(result)
+    connection.close()
+
+
+def _in_child(*args) -> dict:
+    """Run _measure() in a fresh process, so its memory figures are its own."""
+    # "spawn" as in ingest.py: nothing inherited from this process
+    context = multiprocessing.get_context("spawn")
+    receiver, sender = context.Pipe(duplex=False)
+    process = context.Process(target=_measure, args=(*args, sender))
+    process.start()
+    sender.close()
+    try:
+        result = receiver.recv()
+    except EOFError:
+        result = None
+    process.join()
+    if result is None:
+        raise RuntimeError(f"benchmark process failed (exit code {process.exitcode})")
+    return result
+
+
+def _same_settings(recorded: dict, params: dict) -> bool:
+    return {**recorded, "output": None} == {**params, "output": None}
+
+
+def prepare_dataset(profile: str, data_dir: Path, workers: int) -> dict:
+    """Generate the dataset of `profile` into data_dir/profile unless it's there already. Returns its settings."""
+    directory = data_dir / profile
+    directory.mkdir(parents=True, exist_ok=True)
+    output = directory / DATA_FILE
+    options = resolve_options(profile, output=str(output), format="jsonl")
+    params = dataset_params(options)
+    params_path = output.with_name(output.name + ".params.json")
+    # The same data, however the directory was spelled
+    if output.exists() and params_path.exists() and _same_settings(
+            json.loads(params_path.read_text(encoding="utf-8")), params):
+        print(f"Using {output} ({options['count']:,} alerts)")
+        return params
+    print(f"Generating {output} ({options['count']:,} alerts)...")
+    generate(output, options, workers)
+    write_params(output, options)
+    return params
+
+
+def benchmark_dataset(profile: str, data_dir: Path, workers: int, repeat: int, budget: float) -> dict:
+    params = prepare_dataset(profile, data_dir, workers)
+    directory = str(data_dir / profile)
+    print(f"📊 {profile}: load_alerts() parsing JSONL...")
+    parse = _in_child(directory, False, False, repeat, budget)
+    print(f"📊 {profile}: load_alerts() from the snapshot, then endpoints...")
+    mapped = _in_child(directory, True, True, repeat, budget)
+    endpoints = mapped.pop("endpoints")
+    return {
+        "alerts": parse["alerts"],
+        "params": params,
+        "load": {"parse": parse, "snapshot": mapped},
+        "endpoints": endpoints,
+    }
+
+
+def _environment() -> dict:
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "HEAD"], capture_output=True, text=True, cwd=Path(__file__).parent
+        ).stdout.strip() or None
+    except OSError:
+        commit = None
+    return {
+        "date": datetime.now(timezone.utc).replace(microsecond=0).isoformat(),
+        "commit": commit,
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+    }
+
+
+def _figures(results: dict):
+    """(dataset, name, unit, value) of every comparable figure of a result file."""
+    for profile, dataset in results.get("datasets", {}).items():
+        for phase, load in dataset.get("load", {}).items():
+            yield profile, f"load_alerts[{phase}].seconds", "seconds", load.get("seconds")
+            yield profile, f"load_alerts[{phase}].rss_mb", "mb", load.get("rss_mb")
+            yield profile, f"load_alerts[{phase}].peak_rss_mb", "mb", load.get("peak_rss_mb")
+        for case, figures in dataset.get("endpoints", {}).items():
+            for metric in ("p50_ms", "p95_ms", "p99_ms"):
+                yield profile, f"{case} {metric}", "ms", figures.get(metric)
+            yield profile, f"{case} peak_mb", "mb", figures.get("peak_mb")
+            yield profile, f"{case} worker_peak_rss_mb", "mb", figures.get("worker_peak_rss_mb")
+
+
+def compare(baseline: dict, current: dict, threshold: float) -> list:
+    """Figures of `current` worse than in `baseline` by more than `threshold` (relative) and the noise floor."""
+    before = {(profile, name): value for profile, name, _, value in _figures(baseline)}
+    regressions = []
+    for profile, name, unit, value in _figures(current):
+        old = before.get((profile, name))
+        if value is None or old is None:
+            continue
+        if value - old > NOISE_FLOORS[unit] and value > old * (1 + threshold):
+            change = (value / old - 1) * 100 if old else float("inf")
+            regressions.append({"dataset": profile, "figure": name, "baseline": old, "current": value,
+                                "change_percent": round(change, 1)})
+    return regressions
+
+
+def _report(regressions: list, threshold: float) -> int:
+    if not regressions:
+        print(f"✅ No regressions beyond {threshold:.0%}")
+        return 0
+    print(f"❌ {len(regressions)} regressions beyond {threshold:.0%}:")
+    for regression in regressions:
+        print(f"   [{regression['dataset']}] {regression['figure']}: {regression['baseline']} -> "
+              f"{regression['current']} (+{regression['change_percent']}%)")
+    return 1
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--profiles", nargs="+", default=["10k", "1m"], choices=sorted(PROFILES),
+                        help="dataset profiles to benchmark (default: 10k 1m)")
+    parser.add_argument("--data-dir", default="benchmark_data", help="where datasets are generated")
+    parser.add_argument("--output", default="benchmark_results.json", help="JSON file to write")
+    parser.add_argument("--repeat", type=int, default=50, help="timed calls per case (default: 50)")
+    parser.add_argument("--budget", type=float, default=10.0,
+                        help="seconds after which a case stops early, after 5 calls (default: 10)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="processes generating datasets")
+    parser.add_argument("--baseline", help="result file to compare the results with")
+    parser.add_argument("--compare", nargs=2, metavar=("BASELINE", "CURRENT"),
+                        help="compare two result files instead of benchmarking")
+    parser.add_argument("--threshold", type=float, default=0.2,
+                        help="relative slowdown reported as a regression (default: 0.2, i.e. 20%%)")
+    args = parser.parse_args()
+
+    if args.compare:
+        baseline, current = (json.loads(Path(path).read_text(encoding="utf-8")) for path in args.compare)
+        sys.exit(_report(compare(baseline, current, args.threshold), args.threshold))
+
+    results = {
+        "environment": _environment(),
+        "settings": {"repeat": args.repeat, "budget": args.budget},
+        "datasets": {},
+    }
+    for profile in args.profiles:
+        results["datasets"][profile] = benchmark_dataset(
+            profile, Path(args.data_dir), args.workers, args.repeat, args.budget
+        )
+    Path(args.output).write_text(json.dumps(results, indent=2) + "\n", encoding="utf-8")
+    print(f"Wrote {args.output}")
+
+    if args.baseline:
+        baseline = json.loads(Path(args.baseline).read_text(encoding="utf-8"))
+        sys.exit(_report(compare(baseline, results, args.threshold), args.threshold))
+
+
+if __name__ == "__main__":
+    main()
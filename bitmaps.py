@@ -0,0 +1,157 @@
+"""
+Packed bitmaps and per-value bitmap indexes.
+
+A Bitmap stores one bit per alert position (little-endian bit order inside
+each byte, so position p lives in byte p >> 3, bit p & 7). Combining filters
+is a bytewise AND over ~size/8 bytes, and a page of results is read straight
+out of the bitmap by rank, without materializing the full list of matches.
+"""
+from typing import Dict, Optional
+
+import numpy as np
+
+# Number of set bits in every possible byte value
+_POPCOUNT = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+
+def _nbytes(size: int) -> int:
+    return (size + 7) >> 3
+
+
+class Bitmap:
+    """Fixed-size set of alert positions backed by a packed uint8 array."""
+
+    __slots__ = ("bits", "size")
+
+    def __init__(self, bits: np.ndarray, size: int):
+        self.bits = bits
+        self.size = size
+
+    @classmethod
+    def empty(cls, size: int) -> "Bitmap":
+        return cls(np.zeros(_nbytes(size), dtype=np.uint8), size)
+
+    @classmethod
+    def full(cls, size: int) -> "Bitmap":
+        return cls.from_mask(np.ones(size, dtype=bool))
+
+    @classmethod
+    def from_mask(cls, mask: np.ndarray) -> "Bitmap":
+        return cls(np.packbits(mask, bitorder="little"), len(mask))
+
+    @classmethod
+    def from_positions(cls, positions: np.ndarray, size: int) -> "Bitmap":
+        mask = np.zeros(size, dtype=bool)
+        mask[positions] = True
+        return cls.from_mask(mask)
+
+    def __and__(self, other: "Bitmap") -> "Bitmap":
+        return Bitmap(self.bits & other.bits, self.size)
+
+    def __len__(self) -> int:
+        return self.count()
+
+    def count(self) -> int:
+        """Number of positions in the set (its cardinality)."""
+        return int(_POPCOUNT[self.bits].sum(dtype=np.int64))
+
+    def contains(self, positions: np.ndarray) -> np.ndarray:
+        """Boolean array telling which of `positions` are in the set."""
+        positions = np.asarray(positions, dtype=np.int64)
+        return ((self.bits[positions >> 3] >> (positions & 7).astype(np.uint8)) & 1).astype(bool)
+
+    def to_mask(self) -> np.ndarray:
+        return np.unpackbits(self.bits, count=self.size, bitorder="little").view(bool)
+
+    def positions(self) -> np.ndarray:
+        """All positions in the set, ascending."""
+        return np.flatnonzero(self.to_mask())
+
+    def select(self, offset: int, limit: int) -> np.ndarray:
+        """
+        Positions ranked [offset, offset + limit) in ascending order.
+
+        Only the bytes covering the requested window are unpacked.
+        """
+        if limit <= 0:
+            return np.empty(0, dtype=np.int64)
+        offset = max(offset, 0)
+        ranks = np.cumsum(_POPCOUNT[self.bits], dtype=np.int64)
+        if not len(ranks) or offset >= ranks[-1]:
+            return np.empty(0, dtype=np.int64)
+        first = int(np.searchsorted(ranks, offset, side="right"))
+        last = int(np.searchsorted(ranks, offset + limit, side="left")) + 1
+        skipped = int(ranks[first - 1]) if first else 0
+        window = np.unpackbits(self.bits[first:last], bitorder="little")
+        hits = np.flatnonzero(window) + (first << 3)
+        return hits[offset - skipped: offset - skipped + limit]
+
+
+class BitmapIndex:
+    """
+    One packed bitmap per code of a dictionary-encoded column.
+
+    Alerts can be appended: every code's buffer has room for `capacity`
+    bytes and grows by doubling. A Bitmap handed out for a given size only
+    covers the positions below it, so stores built before an append keep
+    seeing their own alerts only.
+    """
+
+    def __init__(self, bits: Dict[int, np.ndarray], size: int):
+        self._bits = bits
+        self.size = size
+        self._capacity = min((len(b) for b in bits.values()), default=_nbytes(size))
+
+    @classmethod
+    def build(cls, codes: np.ndarray) -> "BitmapIndex":
+        bits = {int(code): np.packbits(codes == code, bitorder="little") for code in np.unique(codes)}
+        return cls(bits, len(codes))
+
+    def codes(self):
+        return sorted(self._bits)
+
+    def get(self, code: Optional[int], size: Optional[int] = None) -> Bitmap:
+        """Bitmap of alerts below `size` (default: all) with `code` (empty if the code never occurs)."""
+        size = self.size if size is None else size
+        bits = self._bits.get(code) if code is not None else None
+        if bits is None:
+            return Bitmap.empty(size)
+        bits = bits[:_nbytes(size)]
+        tail = size & 7
+        if tail:
+            # The last byte is shared with alerts appended later
+            bits = bits.copy()
+            bits[-1] &= (1 << tail) - 1
+        return Bitmap(bits, size)
+
+    def move(self, positions: np.ndarray, code: int) -> None:
+        """Re-index the alerts at `positions` (all below size) under `code`, in place."""
+        byte = positions >> 3
+        bit = (1 << (positions & 7)).astype(np.uint8)
+        for other, bits in self._bits.items():
+            if other != code:
+                np.bitwise_and.at(bits, byte, ~bit)
+        bits = self._bits.get(code)
+        if bits is None:
+            bits = np.zeros(self._capacity, dtype=np.uint8)
+        np.bitwise_or.at(bits, byte, bit)
+        self._bits[code] = bits
+
+    def append(self, codes: np.ndarray) -> None:
+        """Index the alerts at positions size, size + 1, ... with the given codes."""
+        start = self.size
+        end = start + len(codes)
+        if _nbytes(end) > self._capacity:
+            self._capacity = max(_nbytes(end), 2 * self._capacity)
+            for code, bits in list(self._bits.items()):
+                grown = np.zeros(self._capacity, dtype=np.uint8)
+                grown[:len(bits)] = bits
+                self._bits[code] = grown
+        for code in np.unique(codes).tolist():
+            positions = start + np.flatnonzero(codes == code)
+            bits = self._bits.get(code)
+            if bits is None:
+                bits = np.zeros(self._capacity, dtype=np.uint8)
+            np.bitwise_or.at(bits, positions >> 3, (1 << (positions & 7)).astype(np.uint8))
+            self._bits[code] = bits
+        self.size = end
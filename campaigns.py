@@ -0,0 +1,96 @@
+"""
+Correlation-campaign index over metadata.correlation_id.
+
+Alerts sharing a correlation ID form a campaign. The index maps every
+correlation code to its member positions (one CSR array for the alerts it
+was built over, plus per-code lists for alerts appended later), keeps the
+size of every campaign, and keeps the largest campaigns in a min-heap, so
+"top campaigns" and "members of a campaign" never look at the rest of the
+dataset.
+
+Campaigns only grow (alerts are appended, never removed), so the heap stays
+exact: a campaign can only enter it by outgrowing its smallest member.
+"""
+from threading import Lock
+from typing import Dict, List
+import heapq
+
+import numpy as np
+
+# Campaigns tracked by the heap, i.e. the most /campaigns can list
+TOP_CAMPAIGNS = 100
+
+
+class CampaignIndex:
+    """Correlation code -> member positions, campaign sizes, and the largest campaigns."""
+
+    def __init__(self, codes: np.ndarray, heap_size: int = TOP_CAMPAIGNS):
+        self.size = len(codes)
+        self.heap_size = heap_size
+        self._order = np.argsort(codes, kind="stable")
+        counts = np.bincount(codes, minlength=1)
+        self._offsets = np.concatenate(([0], np.cumsum(counts)))
+        counts[0] = 0  # alerts without a correlation ID
+        self.counts = counts
+        self._recent: Dict[int, List[int]] = {}
+        # Campaigns with more than one alert
+        self.correlated = int(np.count_nonzero(counts > 1))
+        self._lock = Lock()
+
+        # Min-heap of (size, -code): ties go to the lower code, so the order
+        # matches a stable sort by decreasing size
+        largest = np.argsort(-counts, kind="stable")[:heap_size]
+        self._heap = [(int(counts[code]), -int(code)) for code in largest if counts[code]]
+        heapq.heapify(self._heap)
+        self._in_heap = {-code for _, code in self._heap}
+
+    def add(self, codes: np.ndarray, first_position: int) -> None:
+        """Index alerts first_position, first_position + 1, ... with correlation `codes`."""
+        with self._lock:
+            present = np.flatnonzero(codes)
+            for code, position in zip(codes[present].tolist(), (present + first_position).tolist()):
+                self._recent.setdefault(code, []).append(position)
+            self.size = first_position + len(codes)
+            if not len(present):
+                return
+
+            campaigns, added = np.unique(codes[present], return_counts=True)
+            if campaigns[-1] >= len(self.counts):
+                grown = np.zeros(max(int(campaigns[-1]) + 1, 2 * len(self.counts)), dtype=self.counts.dtype)
+                grown[:len(self.counts)] = self.counts
+                self.counts = grown
+            before = self.counts[campaigns]
+            self.counts[campaigns] = before + added
+            self.correlated += int(np.count_nonzero((before < 2) & (before + added >= 2)))
+
+            # Campaigns already in the heap grew in place; the others compete for its smallest slot
+            self._heap = [(int(self.counts[-code]), code) for _, code in self._heap]
+            heapq.heapify(self._heap)
+            for code in campaigns.tolist():
+                if code in self._in_heap:
+                    continue
+                entry = (int(self.counts[code]), -code)
+                if len(self._heap) < self.heap_size:
+                    heapq.heappush(self._heap, entry)
+                elif entry > self._heap[0]:
+                    _, evicted = heapq.heapreplace(self._heap, entry)
+                    self._in_heap.discard(-evicted)
+                else:
+                    continue
+                self._in_heap.add(code)
+
+    def count(self, code: int) -> int:
+        return int(self.counts[code]) if 0 < code < len(self.counts) else 0
+
+    def top(self, n: int) -> List[int]:
+        """Codes of the `n` (at most heap_size) largest campaigns, largest first."""
+        return [-code for _, code in sorted(self._heap, reverse=True)[:n]]
+
+    def members(self, code: int, size: int) -> np.ndarray:
+        """Positions (below `size`) of the alerts in campaign `code`, in load order."""
+        if 0 < code < len(self._offsets) - 1:
+            base = self._order[self._offsets[code]:self._offsets[code + 1]]
+        else:
+            base = np.empty(0, dtype=np.int64)
+        recent = [position for position in self._recent.get(code, ()) if position < size]
+        return np.concatenate((base, np.array(recent, dtype=np.int64)))
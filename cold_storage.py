@@ -0,0 +1,233 @@
+"""
+Cold storage for alerts past the retention window.
+
+With a retention window configured, alerts older than it are moved out of
+the in-memory store into time-partitioned segment files, one gzipped JSONL
+file per day (and compaction run), next to a sorted array of the alert IDs
+it holds. Each compaction also merges the new segments' IDs into one sorted
+ID index over every segment, so finding the segment of an alert (or of a
+whole batch of IDs, as POST does to reject duplicates) is one binary search
+in a memory-mapped array that touches a handful of pages, however many
+segments have accumulated. A segment's
+alerts are only read when needed (an ID lookup hit, an export) and are then
+kept, parsed into a small AlertStore of their own, in an LRU cache of a fixed
+number of segments. Memory use therefore depends on the retention window
+and the cache size, not on how much history is kept.
+
+What is where is recorded in manifest.json: the checkpoint of the in-memory
+alerts, the write-ahead log written since, the list of segments and their ID
+index. It is
+replaced atomically, which is what commits a compaction.
+"""
+from collections import OrderedDict
+from pathlib import Path
+from threading import Lock
+from typing import Iterable, List, Optional, Tuple
+import gzip
+import json
+import os
+
+import numpy as np
+
+from alert_store import AlertStore, alert_identifier
+from fast_json import decode_json
+from ingest import parse_lines
+from time_index import SECONDS_PER_DAY, iso_day
+
+MANIFEST = "manifest.json"
+
+# Parsed segments kept in memory
+DEFAULT_CACHE_SEGMENTS = 8
+
+
+def read_manifest(directory: Path) -> Optional[dict]:
+    try:
+        with (directory / MANIFEST).open("r", encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def write_manifest(directory: Path, manifest: dict) -> None:
+    """Atomically replace the manifest."""
+    tmp = directory / f"{MANIFEST}.tmp-{os.getpid()}"
+    with tmp.open("w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=1)
+        f.flush()
+        os.fsync(f.fileno())
+    tmp.replace(directory / MANIFEST)
+
+
+def write_lines(path: Path, lines: Iterable[bytes], compress: bool = False) -> None:
+    """Write JSONL to `path` via a temporary file, fsynced before it is renamed into place."""
+    tmp = path.with_name(f"{path.name}.tmp-{os.getpid()}")
+    with (gzip.open(tmp, "wb") if compress else tmp.open("wb")) as f:
+        for line in lines:
+            f.write(line + b"\n")
+    with tmp.open("rb+") as f:
+        os.fsync(f.fileno())
+    tmp.replace(path)
+
+
+def segment_groups(store: AlertStore, positions: np.ndarray) -> List[Tuple[int, np.ndarray]]:
+    """(day, positions) of each segment the alerts at `positions` (which must have timestamps) go to, oldest first."""
+    positions = np.asarray(positions, dtype=np.int64)
+    days = store.column("timestamp")[positions] // SECONDS_PER_DAY
+    order = np.argsort(days, kind="stable")
+    positions, days = positions[order], days[order]
+    bounds = np.flatnonzero(np.diff(days)) + 1
+    return list(zip(days[np.concatenate(([0], bounds))].tolist(), np.split(positions, bounds)))
+
+
+def segment_ids(store: AlertStore, positions: np.ndarray) -> np.ndarray:
+    """Sorted IDs (UTF-8 bytes) of the alerts at `positions` that have one."""
+    ids = sorted(
+        str(alert_id).encode("utf-8")
+        for alert_id in (alert_identifier(decode_json(store.raw(position))) for position in positions.tolist())
+        if alert_id
+    )
+    return np.array(ids, dtype=bytes) if ids else np.empty(0, dtype="S1")
+
+
+def write_segments(
+    store: AlertStore, groups: List[Tuple[int, np.ndarray]], ids: List[np.ndarray], directory: Path, generation: int
+) -> List[dict]:
+    """
+    Write the alerts of each of `groups` (see segment_groups()), whose IDs
+    are `ids`, into a segment. Returns the manifest entries of the new
+    segments.
+    """
+    directory.mkdir(parents=True, exist_ok=True)
+    segments = []
+    for (day, group), keys in zip(groups, ids):
+        name = f"{iso_day(day)}.{generation}"
+        write_lines(directory / f"{name}.jsonl.gz", (store.raw(position) for position in group.tolist()), compress=True)
+        np.save(directory / f"{name}.ids.npy", keys)
+        segments.append({"name": name, "day": day, "count": len(group)})
+    return segments
+
+
+def write_id_index(
+    directory: Path, earlier: List[dict], ids: List[np.ndarray], previous: Optional[str], generation: int
+) -> str:
+    """
+    Merge the `ids` of new segments, listed in the manifest after the
+    `earlier` ones, into the ID index `previous` of those (None: read their
+    ID arrays). Returns the name of the new index: sorted IDs in
+    `{name}.npy` and the number of each one's segment in `{name}.segments.npy`.
+    """
+    directory.mkdir(parents=True, exist_ok=True)
+    first = len(earlier)
+    if previous is None:
+        ids = [np.load(directory / f"{segment['name']}.ids.npy") for segment in earlier] + list(ids)
+        first = 0
+    parts = [(keys, np.full(len(keys), first + i, dtype=np.int32)) for i, keys in enumerate(ids)]
+    if previous is not None:
+        parts.insert(0, _load_id_index(directory, previous))
+    keys = np.concatenate([keys for keys, _ in parts] or [np.empty(0, dtype="S1")])
+    numbers = np.concatenate([numbers for _, numbers in parts] or [np.empty(0, dtype=np.int32)])
+    order = np.argsort(keys, kind="stable")
+    name = f"ids.{generation}"
+    np.save(directory / f"{name}.npy", keys[order])
+    np.save(directory / f"{name}.segments.npy", numbers[order])
+    return name
+
+
+def remove_id_index(directory: Path, name: str) -> None:
+    for path in (directory / f"{name}.npy", directory / f"{name}.segments.npy"):
+        path.unlink(missing_ok=True)
+
+
+def _load_id_index(directory: Path, name: str) -> Tuple[np.ndarray, np.ndarray]:
+    return (
+        np.load(directory / f"{name}.npy", mmap_mode="r"),
+        np.load(directory / f"{name}.segments.npy", mmap_mode="r"),
+    )
+
+
+class ColdStore:
+    """The cold segments, queried by alert ID or by day range."""
+
+    def __init__(
+        self,
+        directory: Path,
+        segments: List[dict],
+        cache_segments: int = DEFAULT_CACHE_SEGMENTS,
+        id_index: Optional[str] = None,
+    ):
+        """
+        `segments` in manifest order, and the name of their ID index (see
+        write_id_index()); without one (a manifest from before there were
+        indexes), it is merged in memory from the segments' ID arrays.
+        """
+        self.directory = directory
+        self._listed = list(segments)
+        self.segments = sorted(segments, key=lambda segment: (segment["day"], segment["name"]))
+        self.cache_segments = cache_segments
+        if id_index is not None:
+            self._keys, self._numbers = _load_id_index(directory, id_index)
+        else:
+            ids = [np.load(directory / f"{segment['name']}.ids.npy") for segment in self._listed]
+            numbers = [np.full(len(keys), i, dtype=np.int32) for i, keys in enumerate(ids)]
+            keys = np.concatenate(ids or [np.empty(0, dtype="S1")])
+            order = np.argsort(keys, kind="stable")
+            self._keys = keys[order]
+            self._numbers = np.concatenate(numbers or [np.empty(0, dtype=np.int32)])[order]
+        # Rank of each listed segment in (day, name) order: the newest copy of an ID wins
+        ranks = {id(segment): rank for rank, segment in enumerate(self.segments)}
+        self._ranks = np.array([ranks[id(segment)] for segment in self._listed], dtype=np.int64)
+        self._cache: "OrderedDict[str, AlertStore]" = OrderedDict()
+        self._lock = Lock()
+
+    def __len__(self) -> int:
+        return sum(segment["count"] for segment in self.segments)
+
+    def names(self, start: Optional[int] = None, end: Optional[int] = None) -> List[str]:
+        """Segments (oldest first) that may hold alerts with start <= timestamp <= end."""
+        first = None if start is None else start // SECONDS_PER_DAY
+        last = None if end is None else end // SECONDS_PER_DAY
+        return [
+            segment["name"]
+            for segment in self.segments
+            if (first is None or segment["day"] >= first) and (last is None or segment["day"] <= last)
+        ]
+
+    def find(self, alert_id) -> Optional[str]:
+        """Name of the segment holding the alert with `alert_id` (the newest, if several do)."""
+        return self.find_many([alert_id])[0]
+
+    def find_many(self, alert_ids: List) -> List[Optional[str]]:
+        """find() of each of `alert_ids`, with one binary search over the ID index for all of them."""
+        if not len(self._keys) or not alert_ids:
+            return [None] * len(alert_ids)
+        keys = np.array([str(alert_id).encode("utf-8") for alert_id in alert_ids], dtype=bytes)
+        lo = np.searchsorted(self._keys, keys, side="left")
+        hi = np.searchsorted(self._keys, keys, side="right")
+        found = [None] * len(alert_ids)
+        for i in np.flatnonzero(hi > lo).tolist():
+            numbers = self._numbers[lo[i]:hi[i]]
+            found[i] = self._listed[int(numbers[np.argmax(self._ranks[numbers])])]["name"]
+        return found
+
+    def raw(self, alert_id) -> Optional[bytes]:
+        """JSON encoding of the alert with `alert_id`, or None if no segment holds it."""
+        name = self.find(alert_id)
+        if name is None:
+            return None
+        store = self.segment(name)
+        position = store.position(alert_id)
+        return None if position is None else store.raw(position)
+
+    def segment(self, name: str) -> AlertStore:
+        """The alerts of one segment, read and parsed on first use."""
+        with self._lock:
+            store = self._cache.get(name)
+            if store is not None:
+                self._cache.move_to_end(name)
+                return store
+            with gzip.open(self.directory / f"{name}.jsonl.gz", "rb") as f:
+                builder, _ = parse_lines(f.read())
+            store = self._cache[name] = builder.build()
+            while len(self._cache) > self.cache_segments:
+                self._cache.popitem(last=False)
+            return store
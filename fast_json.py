@@ -0,0 +1,68 @@
+"""
+Fast JSON encoding for API responses.
+
+Responses are encoded with orjson when it is installed (several times faster
+than the stdlib on large nested payloads such as the analytics heatmap) and
+with the stdlib json module otherwise; both produce compact UTF-8 JSON.
+
+Alert lists are not encoded at all: the store already holds every alert's
+JSON bytes, so a page is those bytes joined with commas and spliced into the
+encoded envelope.
+"""
+from typing import Iterable
+import json
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:  # optional speedup, see requirements.txt
+    orjson = None
+
+if orjson is not None:
+    _ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+
+
+def encode_json(content) -> bytes:
+    """
+    Serialize like FastAPI's JSONResponse does. Responses are plain
+    dicts/lists already, so jsonable_encoder only runs for the odd value the
+    encoder can't handle natively.
+    """
+    if orjson is not None:
+        return orjson.dumps(content, default=jsonable_encoder, option=_ORJSON_OPTIONS)
+    return json.dumps(
+        content,
+        default=jsonable_encoder,
+        ensure_ascii=False,
+        allow_nan=False,
+        indent=None,
+        separators=(",", ":"),
+    ).encode("utf-8")
+
+
+def decode_json(data: bytes):
+    """Parse a JSON document (e.g. a request body)."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def json_array(items: Iterable[bytes]) -> bytes:
+    """A JSON array of already-encoded items."""
+    return b"[" + b",".join(items) + b"]"
+
+
+def encode_with(content: dict, key: str, encoded: bytes) -> bytes:
+    """Encode `content` with the already-encoded JSON `encoded` added as member `key`."""
+    head = encode_json(content)
+    separator = b"," if len(head) > 2 else b""
+    return head[:-1] + separator + encode_json(key) + b":" + encoded + b"}"
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse rendered with encode_json()."""
+
+    def render(self, content) -> bytes:
+        return encode_json(content)
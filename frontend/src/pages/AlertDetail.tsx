@@ -24,6 +24,7 @@ export default function AlertDetail() {
   const [alert, setAlert] = useState<Alert | null>(null);
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState<string | null>(null);
+  const [updatingStatus, setUpdatingStatus] = useState(false);
 
   useEffect(() => {
     if (id) {
@@ -46,6 +47,19 @@ export default function AlertDetail() {
     }
   };
 
+  const changeStatus = async (alertId: string, status: NonNullable<Alert['status']>) => {
+    try {
+      setUpdatingStatus(true);
+      const data = await alertsApi.updateAlertStatus(alertId, status);
+      setAlert(data);
+    } catch (err: any) {
+      setError(err?.message || 'Failed to update alert status');
+      console.error('Alert status update error:', err);
+    } finally {
+      setUpdatingStatus(false);
+    }
+  };
+
   const formatDate = (dateString?: string) => {
     if (!dateString) return 'N/A';
     try {
@@ -134,13 +148,20 @@ export default function AlertDetail() {
             >
               {severity.toUpperCase()}
             </span>
-            <span
-              className={`px-3 py-1 text-sm font-semibold rounded ${
+            <select
+              value={status}
+              disabled={updatingStatus || alertId === 'unknown'}
+              onChange={(e) => changeStatus(alertId, e.target.value as NonNullable<Alert['status']>)}
+              className={`px-3 py-1 text-sm font-semibold rounded border-0 cursor-pointer disabled:opacity-60 ${
                 STATUS_COLORS[status as keyof typeof STATUS_COLORS] || STATUS_COLORS.open
               }`}
             >
-              {status.replace('_', ' ').toUpperCase()}
-            </span>
+              {Object.keys(STATUS_COLORS).map((value) => (
+                <option key={value} value={value} className="bg-slate-800 text-white">
+                  {value.replace('_', ' ').toUpperCase()}
+                </option>
+              ))}
+            </select>
           </div>
         </div>
       </div>
@@ -1,5 +1,5 @@
 import axios, { AxiosError } from 'axios';
-import type { AlertsResponse, StatsResponse, Alert, AdvancedAnalyticsResponse, PredictiveAnalyticsResponse } from '../types';
+import type { AlertsResponse, StatsResponse, Alert, AdvancedAnalyticsResponse, PredictiveAnalyticsResponse, GeoGridResponse } from '../types';
 
 const API_BASE_URL = import.meta.env.VITE_API_URL || 'http://127.0.0.1:8000';
 
@@ -22,10 +22,28 @@ api.interceptors.request.use(
   }
 );
 
+// How many times a request is retried while the backend is still loading data
+// (or its analytics workers are busy)
+const MAX_WARMUP_RETRIES = 24;
+
 // Add response interceptor for error handling
 api.interceptors.response.use(
   (response) => response,
-  (error: AxiosError) => {
+  async (error: AxiosError) => {
+    // The backend answers 503 + Retry-After until its dataset is loaded, and
+    // 429 + Retry-After when its analytics workers are saturated: wait and
+    // retry instead of surfacing an error
+    const config = error.config as (typeof error.config & { _warmupRetries?: number }) | undefined;
+    const status = error.response?.status;
+    if ((status === 503 || status === 429) && config && (config._warmupRetries ?? 0) < MAX_WARMUP_RETRIES) {
+      config._warmupRetries = (config._warmupRetries ?? 0) + 1;
+      const retryAfter = Number(error.response?.headers['retry-after']) || 5;
+      const reason = status === 503 ? 'still loading data' : 'busy computing analytics';
+      console.warn(`Backend is ${reason}, retrying ${config.url} in ${retryAfter}s`);
+      await new Promise((resolve) => setTimeout(resolve, retryAfter * 1000));
+      return api(config);
+    }
+
     if (error.code === 'ECONNABORTED') {
       console.error('Request timeout:', error.config?.url);
     } else if (error.response) {
@@ -48,6 +66,9 @@ export const alertsApi = {
       status?: string;
       source?: string;
       search?: string;
+      sort?: 'timestamp' | 'risk_score' | 'estimated_cost_usd' | 'severity';
+      order?: 'asc' | 'desc';
+      cursor?: string;
     }
   ): Promise<AlertsResponse> => {
     try {
@@ -79,6 +100,21 @@ export const alertsApi = {
     }
   },
 
+  updateAlertStatus: async (alertId: string, status: NonNullable<Alert['status']>): Promise<Alert> => {
+    try {
+      const response = await api.patch<Alert>(`/alerts/${alertId}`, { status });
+      return response.data;
+    } catch (error) {
+      if (axios.isAxiosError(error)) {
+        if (error.code === 'ECONNREFUSED' || !error.response) {
+          throw new Error('Cannot connect to backend server. Please ensure the backend is running on http://127.0.0.1:8000');
+        }
+        throw new Error(error.response?.data?.detail || error.message || 'Failed to update alert');
+      }
+      throw error;
+    }
+  },
+
   getStats: async (): Promise<StatsResponse> => {
     try {
       const response = await api.get<StatsResponse>('/stats');
@@ -123,6 +159,23 @@ export const alertsApi = {
       throw error;
     }
   },
+
+  getGeoGrid: async (zoom: number = 2, bbox?: [number, number, number, number]): Promise<GeoGridResponse> => {
+    try {
+      const params: Record<string, string | number> = { zoom };
+      if (bbox) params.bbox = bbox.join(',');
+      const response = await api.get<GeoGridResponse>('/geo/grid', { params });
+      return response.data;
+    } catch (error) {
+      if (axios.isAxiosError(error)) {
+        if (error.code === 'ECONNREFUSED' || !error.response) {
+          throw new Error('Cannot connect to backend server. Please ensure the backend is running on http://127.0.0.1:8000');
+        }
+        throw new Error(error.response?.data?.detail || error.message || 'Failed to fetch geo grid');
+      }
+      throw error;
+    }
+  },
 };
 
 export default api;
@@ -23,6 +23,7 @@ export interface AlertsResponse {
   limit: number;
   offset: number;
   items: Alert[];
+  next_cursor: string | null;
 }
 
 export interface StatsResponse {
@@ -96,5 +97,20 @@ export interface PredictiveAnalyticsResponse {
     average_risk: Record<string, number>;
     cost: Record<string, number>;
   };
+  window?: {
+    start: string;
+    end: string;
+    granularity: 'hour' | 'day' | 'week';
+  };
 }
 
+
+export interface GeoGridResponse {
+  zoom: number;
+  cell_size: number;
+  // Names of the values in each cell: lat, lon, count, then one per severity
+  columns: string[];
+  total: number;
+  // [lat, lon, count, ...severity counts], (lat, lon) being the cell's south-west corner
+  cells: number[][];
+}
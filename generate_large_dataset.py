@@ -1,12 +1,54 @@
 """
-Generate large-scale alert data (1M+ records) for advanced analytics.
-Uses JSONL format for efficient generation and loading.
+Generate alert datasets, from the 1,000-alert sample to 100M+ records for
+benchmarks. Uses JSONL format for efficient generation and loading.
+
+Usage:
+    python generate_large_dataset.py [--profile NAME] [--count N] [--output PATH] [--seed N]
+                                     [--end ISO] [--days N] [skew options]
+                                     [--workers N] [--gzip [--gzip-level N]] [--snapshot]
+    python generate_large_dataset.py --list-profiles
+
+A profile (see PROFILES) names a complete, seeded set of settings; options
+given on the command line override it. The benchmark profiles (10k, 1m, 10m,
+100m) end at the fixed REFERENCE_END rather than at the current time, so a
+profile gives the same file on any machine and any day, and performance
+numbers measured on it can be compared. Without a profile the seed is fresh
+(and printed) and the data ends now.
+
+Skew options make the data less uniform, like real alert streams:
+  --campaigns N        hot correlation campaigns that correlated alerts join,
+  --campaign-share F   with probability F, picking a campaign with Zipf
+  --campaign-skew S    weights 1 / rank**S (the others get a fresh ID)
+  --bursts N           bursts of activity, N at random times, each lasting
+  --burst-minutes M    M minutes on average, that hold a share
+  --burst-share F      F of the alerts
+  --resource-names N   distinct resource numbers per resource type
+
+Alerts are generated in shards of SHARD_SIZE: each shard draws every field
+for all of its alerts at once with NumPy, from its own random generator
+seeded with (seed, shard number), and renders them to JSONL from those
+columns. The campaigns and bursts come from one more generator shared by
+every shard. Shards run in a process pool and are written in order, so a
+given seed and count give the same file whatever the number of workers.
+
+--gzip also writes <output>.gz (each shard compressed by its worker, as one
+gzip member), and --snapshot writes the binary snapshot the server would
+otherwise build on its first start (see snapshot.py): the workers parse
+their own shard into store columns as they go. The settings used are written
+next to the data, to <output>.params.json.
 """
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+import argparse
+import gzip
 import json
-from datetime import datetime, timedelta
-import random
-import uuid
-from collections import defaultdict
+import multiprocessing
+import os
+import secrets
+import time
+
+import numpy as np
 
 # Extended alert types with threat intelligence
 ALERT_TYPES = [
@@ -64,211 +106,455 @@ THREAT_ACTORS = [
 # Compliance frameworks
 COMPLIANCE_FRAMEWORKS = ["SOC2", "PCI-DSS", "HIPAA", "GDPR", "ISO27001", "NIST", "CIS"]
 
-def generate_ip_address():
-    """Generate realistic IP address."""
-    return f"{random.randint(1, 255)}.{random.randint(1, 255)}.{random.randint(1, 255)}.{random.randint(1, 255)}"
-
-def generate_risk_score(severity, confidence, threat_actor_risk):
-    """Calculate risk score (0-100)."""
-    base_scores = {"low": 20, "medium": 50, "high": 75, "critical": 95}
-    risk_scores = {"low": 10, "high": 30, "critical": 40}
-    return min(100, base_scores.get(severity, 50) + (confidence - 70) * 0.3 + risk_scores.get(threat_actor_risk, 0))
-
-def generate_cost_impact(severity, resource_type):
-    """Estimate cost impact in USD."""
-    base_costs = {"low": 10, "medium": 100, "high": 1000, "critical": 10000}
-    multipliers = {
-        "S3-Bucket": 1.5, "RDS-Database": 2.0, "Lambda-Function": 0.5,
-        "EC2-Instance": 1.0, "EKS-Cluster": 3.0
-    }
-    return base_costs.get(severity, 100) * multipliers.get(resource_type, 1.0) * random.uniform(0.5, 2.0)
-
-def generate_alert(index, start_date, end_date):
-    """Generate a single alert with rich metadata."""
-    alert_type = random.choice(ALERT_TYPES)
-    severity = random.choices(SEVERITIES, weights=[0.3, 0.3, 0.25, 0.15])[0]
-    status = random.choices(STATUSES, weights=[0.3, 0.2, 0.3, 0.2])[0]
-    source = random.choice(SOURCES)
-    region_data = random.choice(REGIONS)
-    resource_type = random.choice(RESOURCE_TYPES)
-    threat_actor = random.choice(THREAT_ACTORS)
-    
-    # Generate timestamp within date range
-    time_range = (end_date - start_date).total_seconds()
-    random_seconds = random.randint(0, int(time_range))
-    timestamp = (start_date + timedelta(seconds=random_seconds)).isoformat() + "Z"
-    
-    # Generate IP addresses
-    source_ip = generate_ip_address()
-    destination_ip = generate_ip_address()
-    
-    # Generate metadata
-    confidence = random.randint(70, 100)
-    risk_score = generate_risk_score(severity, confidence, threat_actor["risk"])
-    cost_impact = generate_cost_impact(severity, resource_type)
-    
-    # Generate attack chain stage
-    attack_stages = ["Reconnaissance", "Weaponization", "Delivery", "Exploitation", 
-                     "Installation", "CommandControl", "ActionsOnObjectives"]
-    attack_stage = random.choice(attack_stages)
-    
-    # Generate compliance violations
-    compliance_violations = random.sample(COMPLIANCE_FRAMEWORKS, random.randint(0, 3))
-    
-    # Generate user/account info
-    user_id = f"user_{random.randint(1, 10000)}"
-    account_id = f"{random.randint(100000000000, 999999999999)}"
-    
-    # Generate resource info
-    resource_name = f"{resource_type.lower().replace('-', '_')}_{random.randint(1000, 99999)}"
-    resource_id = f"{resource_type.lower()}-{random.randint(100000, 999999)}"
-    
-    # Generate alert message
-    messages = {
-        "UnauthorizedAccessAttempt": f"Unauthorized access attempt from {source_ip} targeting {resource_name}",
-        "SuspiciousAPICall": f"Suspicious API call: {random.choice(['DeleteBucket', 'ModifySecurityGroup', 'ChangeIAMPolicy'])} from {user_id}",
-        "DataExfiltration": f"Potential data exfiltration: {random.randint(100, 100000)} MB transferred from {source_ip} to {destination_ip}",
-        "PrivilegeEscalation": f"Privilege escalation attempt by {user_id} in account {account_id}",
-        "MaliciousIPConnection": f"Connection from known malicious IP {source_ip} (Threat Actor: {threat_actor['name']})",
-        "AnomalousTraffic": f"Anomalous network traffic: {random.randint(1000, 1000000)} requests/minute from {source_ip}",
-        "CryptocurrencyMining": f"Cryptocurrency mining activity detected on {resource_name}",
-        "RansomwareActivity": f"Potential ransomware activity: {random.randint(10, 1000)} files encrypted",
-        "LateralMovement": f"Lateral movement detected: {user_id} accessing {random.randint(5, 50)} resources",
-        "CommandAndControl": f"C2 communication detected from {source_ip} to {destination_ip}",
-        "DataBreach": f"Potential data breach: {random.randint(100, 100000)} records potentially exposed",
-        "AccountTakeover": f"Account takeover attempt on {user_id} from {source_ip}"
-    }
-    
-    alert_id = str(uuid.uuid4())
-    
+# Alerts per shard: the unit of work of one worker, and of seeding
+SHARD_SIZE = 100_000
+
+# Reference clock of the benchmark profiles: their data ends here, whenever it is generated
+REFERENCE_END = datetime(2025, 1, 1, tzinfo=timezone.utc)
+
+# Settings without a profile: a fresh seed, data ending now, no skew
+DEFAULTS = {
+    "count": 1_200_000,
+    "output": "aws_like_alerts_10000.jsonl",
+    "format": "jsonl",
+    "seed": None,
+    "end": None,
+    "days": 90,
+    "campaigns": 0,
+    "campaign_share": 0.0,
+    "campaign_skew": 1.0,
+    "bursts": 0,
+    "burst_share": 0.0,
+    "burst_minutes": 30.0,
+    "resource_names": 99_000,
+}
+
+# Skew shared by the benchmark profiles: half the correlated alerts join a hot
+# campaign, a fifth of all alerts fall in bursts
+_BENCHMARK = {
+    "end": REFERENCE_END,
+    "campaign_share": 0.5,
+    "campaign_skew": 1.2,
+    "burst_share": 0.2,
+    "burst_minutes": 30.0,
+}
+
+PROFILES = {
+    # The small dataset the dashboard runs on locally (see generate_sample_data.py)
+    "sample": {"count": 1000, "output": "aws_like_alerts_10000.json", "format": "json", "seed": 1,
+               "resource_names": 9000},
+    "10k": dict(_BENCHMARK, count=10_000, seed=10_000, campaigns=20, bursts=5, resource_names=99_000),
+    "1m": dict(_BENCHMARK, count=1_000_000, seed=1_000_000, campaigns=200, bursts=50, resource_names=1_000_000),
+    "10m": dict(_BENCHMARK, count=10_000_000, seed=10_000_000, campaigns=1000, bursts=200,
+                resource_names=10_000_000),
+    "100m": dict(_BENCHMARK, count=100_000_000, seed=100_000_000, campaigns=5000, bursts=1000,
+                 resource_names=100_000_000),
+}
+
+# Stream number of the generator shared by every shard (shards use 0, 1, ...)
+_SHARED_STREAM = 2 ** 32 - 1
+
+ATTACK_STAGES = ["Reconnaissance", "Weaponization", "Delivery", "Exploitation",
+                 "Installation", "CommandControl", "ActionsOnObjectives"]
+PROTOCOLS = ["TCP", "UDP", "HTTP", "HTTPS", "SSH"]
+PORTS = [22, 80, 443, 3389, 5432, 3306, 8080]
+IOC_TYPES = ["IP", "Domain", "Hash", "URL"]
+IOC_NAMES = ["malicious", "suspicious", "compromised"]
+IOC_DOMAINS = ["com", "net", "org"]
+ATTACK_COMPLEXITIES = ["low", "medium", "high"]
+EXPLOITABILITIES = ["none", "low", "medium", "high", "critical"]
+DATA_CLASSIFICATIONS = ["Public", "Internal", "Confidential", "Restricted"]
+USER_ROLES = ["admin", "developer", "viewer", "operator"]
+RULE_CATEGORIES = ["Network", "Identity", "Data", "Compliance", "Threat"]
+API_CALLS = ["DeleteBucket", "ModifySecurityGroup", "ChangeIAMPolicy"]
+
+# Message per alert type, and the range of the number ({n}) it mentions
+MESSAGES = {
+    "UnauthorizedAccessAttempt": ("Unauthorized access attempt from {ip} targeting {name}", None),
+    "SuspiciousAPICall": ("Suspicious API call: {api} from {user}", None),
+    "DataExfiltration": ("Potential data exfiltration: {n} MB transferred from {ip} to {dst}", (100, 100000)),
+    "PrivilegeEscalation": ("Privilege escalation attempt by {user} in account {account}", None),
+    "MaliciousIPConnection": ("Connection from known malicious IP {ip} (Threat Actor: {actor})", None),
+    "AnomalousTraffic": ("Anomalous network traffic: {n} requests/minute from {ip}", (1000, 1000000)),
+    "CryptocurrencyMining": ("Cryptocurrency mining activity detected on {name}", None),
+    "RansomwareActivity": ("Potential ransomware activity: {n} files encrypted", (10, 1000)),
+    "LateralMovement": ("Lateral movement detected: {user} accessing {n} resources", (5, 50)),
+    "CommandAndControl": ("C2 communication detected from {ip} to {dst}", None),
+    "DataBreach": ("Potential data breach: {n} records potentially exposed", (100, 100000)),
+    "AccountTakeover": ("Account takeover attempt on {user} from {ip}", None),
+}
+
+# One alert, in the key order and formatting of json.dumps() of the alert as a dict
+ALERT_TEMPLATE = (
+    '{"id": "%s", "alert_id": "%s", "uuid": "%s", "severity": "%s", "status": "%s", "source": "%s", '
+    '"type": "%s", "message": "%s", "timestamp": "%s", "time": "%s", '
+    '"resource": {"name": "%s", "type": "%s", "id": "%s", %s}, '
+    '"network": {"source_ip": "%s", "destination_ip": "%s", "protocol": "%s", "port": %d}, '
+    '"threat_intelligence": {%s, "attack_stage": "%s", "ioc_type": "%s", "ioc_value": "%s"}, '
+    '"risk_analysis": {"risk_score": %r, "confidence": %d, "threat_level": "%s", '
+    '"attack_complexity": "%s", "exploitability": "%s"}, '
+    '"compliance": {"frameworks": %s, "violation_severity": "%s", "data_classification": "%s"}, '
+    '"cost_impact": {"estimated_cost_usd": %r, "downtime_minutes": %d, "data_loss_mb": %d}, '
+    '"user_context": {"user_id": "user_%d", "account_id": "%d", "user_role": "%s", "is_privileged": %s}, '
+    '"metadata": {"detection_rule": "rule_%d", "rule_category": "%s", "affected_accounts": %d, '
+    '"affected_resources": %d, "correlation_id": %s}}'
+)
+
+
+def _pick(rng, values: list, count: int, p=None) -> list:
+    """`count` values drawn from `values` (with probabilities `p`), as a list."""
+    return np.array(values, dtype=object)[rng.choice(len(values), count, p=p)].tolist()
+
+
+def _uuids(rng, count: int) -> list:
+    """`count` random (version 4) UUID strings."""
+    raw = rng.integers(0, 256, (count, 16), dtype=np.uint8)
+    raw[:, 6] = (raw[:, 6] & 0x0F) | 0x40
+    raw[:, 8] = (raw[:, 8] & 0x3F) | 0x80
+    digits = raw.tobytes().hex()
+    return [
+        f"{digits[i:i + 8]}-{digits[i + 8:i + 12]}-{digits[i + 12:i + 16]}-{digits[i + 16:i + 20]}-{digits[i + 20:i + 32]}"
+        for i in range(0, 32 * count, 32)
+    ]
+
+
+def _ips(rng, count: int) -> list:
+    octets = rng.integers(1, 256, (count, 4)).tolist()
+    return ["%d.%d.%d.%d" % tuple(ip) for ip in octets]
+
+
+def _frameworks(rng, count: int) -> list:
+    """Like random.sample(COMPLIANCE_FRAMEWORKS, randint(0, 3)) per alert, as JSON arrays."""
+    sizes = rng.integers(0, 4, count)
+    picks = np.argsort(rng.random((count, len(COMPLIANCE_FRAMEWORKS))), axis=1)[:, :3]
+    picks = np.where(np.arange(3) < sizes[:, None], picks + 1, 0)
+    keys, inverse = np.unique(picks @ np.array([64, 8, 1]), return_inverse=True)
+    rendered = [
+        json.dumps([COMPLIANCE_FRAMEWORKS[(key >> shift & 7) - 1] for shift in (6, 3, 0) if key >> shift & 7])
+        for key in keys.tolist()
+    ]
+    return np.array(rendered, dtype=object)[inverse.ravel()].tolist()
+
+
+def hot_spots(options: dict) -> dict:
+    """
+    The hot campaigns (correlation IDs and their Zipf weights) and bursts
+    (start offsets and lengths, in seconds) of a dataset: the same for every
+    shard, as they come from the generator shared by all of them.
+    """
+    rng = np.random.default_rng([options["seed"], _SHARED_STREAM])
+    campaigns = _uuids(rng, options["campaigns"])
+    weights = np.arange(1, len(campaigns) + 1) ** -float(options["campaign_skew"])
+    span = (options["end"] - options["start"]).total_seconds()
+    burst_starts = rng.uniform(0, span, options["bursts"])
+    burst_lengths = rng.exponential(options["burst_minutes"] * 60, options["bursts"])
     return {
-        "id": alert_id,
-        "alert_id": alert_id,
-        "uuid": alert_id,
-        "severity": severity,
-        "status": status,
-        "source": source,
-        "type": alert_type,
-        "message": messages.get(alert_type, f"Security alert: {alert_type}"),
-        "timestamp": timestamp,
-        "time": timestamp,
-        "resource": {
-            "name": resource_name,
-            "type": resource_type,
-            "id": resource_id,
-            "region": region_data["code"],
-            "country": region_data["country"],
-            "latitude": region_data["lat"],
-            "longitude": region_data["lon"]
-        },
-        "network": {
-            "source_ip": source_ip,
-            "destination_ip": destination_ip,
-            "protocol": random.choice(["TCP", "UDP", "HTTP", "HTTPS", "SSH"]),
-            "port": random.choice([22, 80, 443, 3389, 5432, 3306, 8080])
-        },
-        "threat_intelligence": {
-            "threat_actor": threat_actor["name"],
-            "threat_actor_country": threat_actor["country"],
-            "threat_actor_risk": threat_actor["risk"],
-            "attack_stage": attack_stage,
-            "ioc_type": random.choice(["IP", "Domain", "Hash", "URL"]),
-            "ioc_value": f"{random.choice(['malicious', 'suspicious', 'compromised'])}.{random.choice(['com', 'net', 'org'])}"
-        },
-        "risk_analysis": {
-            "risk_score": round(risk_score, 2),
-            "confidence": confidence,
-            "threat_level": "critical" if risk_score > 80 else "high" if risk_score > 60 else "medium" if risk_score > 40 else "low",
-            "attack_complexity": random.choice(["low", "medium", "high"]),
-            "exploitability": random.choice(["none", "low", "medium", "high", "critical"])
-        },
-        "compliance": {
-            "frameworks": compliance_violations,
-            "violation_severity": "high" if compliance_violations else "none",
-            "data_classification": random.choice(["Public", "Internal", "Confidential", "Restricted"])
-        },
-        "cost_impact": {
-            "estimated_cost_usd": round(cost_impact, 2),
-            "downtime_minutes": random.randint(0, 1440) if severity in ["high", "critical"] else 0,
-            "data_loss_mb": random.randint(0, 10000) if "Data" in alert_type else 0
-        },
-        "user_context": {
-            "user_id": user_id,
-            "account_id": account_id,
-            "user_role": random.choice(["admin", "developer", "viewer", "operator"]),
-            "is_privileged": random.choice([True, False])
-        },
-        "metadata": {
-            "detection_rule": f"rule_{random.randint(1, 500)}",
-            "rule_category": random.choice(["Network", "Identity", "Data", "Compliance", "Threat"]),
-            "affected_accounts": random.randint(1, 10),
-            "affected_resources": random.randint(1, 50),
-            "correlation_id": str(uuid.uuid4()) if random.random() > 0.7 else None
-        }
+        "campaigns": campaigns,
+        "weights": weights / weights.sum() if len(weights) else weights,
+        "burst_starts": burst_starts,
+        "burst_lengths": burst_lengths,
     }
 
-def main():
-    """Generate large-scale alert data."""
-    import sys
-    
-    # Configuration
-    num_alerts = 1_200_000  # 1.2M records
-    output_file = "aws_like_alerts_10000.jsonl"  # Use JSONL for large files
-    
-    print(f"🚀 Generating {num_alerts:,} alerts...")
-    print("This may take several minutes. Please wait...")
-    
-    # Date range: Last 90 days
-    end_date = datetime.now()
-    start_date = end_date - timedelta(days=90)
-    
-    # Statistics tracking
-    stats = {
-        "severities": defaultdict(int),
-        "statuses": defaultdict(int),
-        "sources": defaultdict(int),
-        "regions": defaultdict(int),
-        "alert_types": defaultdict(int)
-    }
-    
-    # Generate and write in batches
-    batch_size = 10000
+
+def generate_lines(rng, count: int, options: dict, spots: dict) -> list:
+    """
+    `count` alerts with timestamps in [options["start"], options["end"]], as
+    JSON lines, drawing every field for all of them at once. `spots` are the
+    dataset's hot_spots(options).
+    """
+    start, end = options["start"], options["end"]
+    severity = rng.choice(len(SEVERITIES), count, p=[0.3, 0.3, 0.25, 0.15])
+    alert_type = rng.integers(0, len(ALERT_TYPES), count)
+    region = rng.integers(0, len(REGIONS), count)
+    resource_type = rng.integers(0, len(RESOURCE_TYPES), count)
+    actor = rng.integers(0, len(THREAT_ACTORS), count)
+
+    span = int((end - start).total_seconds())
+    seconds = rng.integers(0, span + 1, count)
+    if len(spots["burst_starts"]) and options["burst_share"]:
+        # A share of the alerts fall at a random point of a random burst
+        bursty = np.flatnonzero(rng.random(count) < options["burst_share"])
+        burst = rng.integers(0, len(spots["burst_starts"]), len(bursty))
+        offsets = spots["burst_starts"][burst] + rng.random(len(bursty)) * spots["burst_lengths"][burst]
+        seconds[bursty] = np.minimum(offsets, span).astype(np.int64)
+    timestamps = (np.datetime64(start.replace(tzinfo=None), "s") + seconds).astype(str).tolist()
+
+    confidence = rng.integers(70, 101, count)
+    base_scores = np.array([20, 50, 75, 95])
+    actor_bonus = np.array([{"low": 10, "high": 30, "critical": 40}.get(a["risk"], 0) for a in THREAT_ACTORS])
+    risk_score = np.minimum(100, base_scores[severity] + (confidence - 70) * 0.3 + actor_bonus[actor])
+    threat_level = np.select([risk_score > 80, risk_score > 60, risk_score > 40], [3, 2, 1], 0)
+
+    base_costs = np.array([10, 100, 1000, 10000])
+    multipliers = {"S3-Bucket": 1.5, "RDS-Database": 2.0, "Lambda-Function": 0.5, "EC2-Instance": 1.0, "EKS-Cluster": 3.0}
+    multiplier = np.array([multipliers.get(r, 1.0) for r in RESOURCE_TYPES])
+    cost = base_costs[severity] * multiplier[resource_type] * rng.uniform(0.5, 2.0, count)
+
+    downtime = np.where(severity >= 2, rng.integers(0, 1441, count), 0)
+    is_data = np.array(["Data" in t for t in ALERT_TYPES])[alert_type]
+    data_loss = np.where(is_data, rng.integers(0, 10001, count), 0)
+
+    ids = _uuids(rng, count)
+    source_ips = _ips(rng, count)
+    destination_ips = _ips(rng, count)
+    user_ids = rng.integers(1, 10001, count).tolist()
+    account_ids = rng.integers(100000000000, 1000000000000, count).tolist()
+    resource_numbers = rng.integers(1000, 1000 + options["resource_names"], count).tolist()
+    resource_ids = rng.integers(100000, 1000000, count).tolist()
+
+    templates = [MESSAGES.get(t, (f"Security alert: {t}", None)) for t in ALERT_TYPES]
+    lows = np.array([bounds[0] if bounds else 0 for _, bounds in templates])
+    highs = np.array([bounds[1] if bounds else 0 for _, bounds in templates])
+    message_numbers = rng.integers(lows[alert_type], highs[alert_type] + 1).tolist()
+    api_calls = _pick(rng, API_CALLS, count)
+
+    # Correlated alerts join a hot campaign (with probability campaign_share) or start their own
+    correlated = rng.random(count) > 0.7
+    hot = np.zeros(count, dtype=bool)
+    if spots["campaigns"] and options["campaign_share"]:
+        hot = correlated & (rng.random(count) < options["campaign_share"])
+    fresh = iter(_uuids(rng, int(np.count_nonzero(correlated & ~hot))))
+    joined = iter(_pick(rng, spots["campaigns"], int(np.count_nonzero(hot)), p=spots["weights"]) if hot.any() else ())
+    correlation_ids = [
+        f'"{next(joined)}"' if h else f'"{next(fresh)}"' if c else "null"
+        for c, h in zip(correlated.tolist(), hot.tolist())
+    ]
+
+    # Parts that only depend on one choice, rendered once per choice
+    region_parts = [
+        f'"region": "{r["code"]}", "country": "{r["country"]}", "latitude": {r["lat"]!r}, "longitude": {r["lon"]!r}'
+        for r in REGIONS
+    ]
+    actor_parts = [
+        f'"threat_actor": "{a["name"]}", "threat_actor_country": "{a["country"]}", "threat_actor_risk": "{a["risk"]}"'
+        for a in THREAT_ACTORS
+    ]
+    resource_prefixes = [r.lower().replace("-", "_") for r in RESOURCE_TYPES]
+    frameworks = _frameworks(rng, count)
+
+    columns = zip(
+        ids, severity.tolist(), _pick(rng, STATUSES, count, p=[0.3, 0.2, 0.3, 0.2]), _pick(rng, SOURCES, count),
+        alert_type.tolist(), timestamps, region.tolist(), resource_type.tolist(), resource_numbers, resource_ids,
+        source_ips, destination_ips, _pick(rng, PROTOCOLS, count), _pick(rng, PORTS, count),
+        actor.tolist(), _pick(rng, ATTACK_STAGES, count), _pick(rng, IOC_TYPES, count),
+        _pick(rng, IOC_NAMES, count), _pick(rng, IOC_DOMAINS, count),
+        np.round(risk_score, 2).tolist(), confidence.tolist(), threat_level.tolist(),
+        _pick(rng, ATTACK_COMPLEXITIES, count), _pick(rng, EXPLOITABILITIES, count),
+        frameworks, _pick(rng, DATA_CLASSIFICATIONS, count),
+        np.round(cost, 2).tolist(), downtime.tolist(), data_loss.tolist(),
+        user_ids, account_ids, _pick(rng, USER_ROLES, count), _pick(rng, ["true", "false"], count),
+        rng.integers(1, 501, count).tolist(), _pick(rng, RULE_CATEGORIES, count),
+        rng.integers(1, 11, count).tolist(), rng.integers(1, 51, count).tolist(),
+        correlation_ids, message_numbers, api_calls,
+    )
+    threat_levels = ["low", "medium", "high", "critical"]
+    lines = []
+    for (alert_id, sev, status, source, t, timestamp, r, rt, resource_number, resource_id,
+         ip, dst, protocol, port, a, stage, ioc_type, ioc_name, ioc_domain,
+         score, conf, level, complexity, exploitability, fw, classification,
+         cost_usd, downtime_minutes, data_loss_mb, user, account, role, privileged,
+         rule, category, accounts, resources, correlation_id, n, api) in columns:
+        name = f"{resource_prefixes[rt]}_{resource_number}"
+        message = templates[t][0].format(
+            ip=ip, dst=dst, name=name, user=f"user_{user}", account=account,
+            actor=THREAT_ACTORS[a]["name"], n=n, api=api,
+        )
+        timestamp += "Z"
+        lines.append(ALERT_TEMPLATE % (
+            alert_id, alert_id, alert_id, SEVERITIES[sev], status, source,
+            ALERT_TYPES[t], message, timestamp, timestamp,
+            name, RESOURCE_TYPES[rt], f"{RESOURCE_TYPES[rt].lower()}-{resource_id}", region_parts[r],
+            ip, dst, protocol, port,
+            actor_parts[a], stage, ioc_type, f"{ioc_name}.{ioc_domain}",
+            score, conf, threat_levels[level], complexity, exploitability,
+            fw, "high" if fw != "[]" else "none", classification,
+            cost_usd, downtime_minutes, data_loss_mb,
+            user, account, role, privileged,
+            rule, category, accounts, resources, correlation_id,
+        ))
+    return lines
+
+
+
+
+def generate_shard(options: dict, shard: int, count: int, compress: int = 0, parse: bool = False):
+    """
+    Generate shard number `shard` (`count` alerts). Returns its data (JSONL,
+    or the items of a JSON array if options["format"] is "json"), their gzip
+    member if `compress` (the gzip level), and a store builder of its alerts
+    if `parse`.
+    """
+    rng = np.random.default_rng([options["seed"], shard])
+    lines = generate_lines(rng, count, options, hot_spots(options))
+    if options["format"] == "json":
+        data = ",\n".join(lines).encode("utf-8")
+    else:
+        data = ("\n".join(lines) + "\n").encode("utf-8")
+    compressed = gzip.compress(data, compresslevel=compress) if compress else None
+    builder = None
+    if parse:
+        from ingest import parse_lines
+        builder, _ = parse_lines(data)
+    return data, compressed, builder
+
+
+def _shards(options: dict, shard_size: int, compress: int, parse: bool, workers: int):
+    """(alerts, generate_shard() result) of every shard, in order, with at most 2 * workers shards in flight."""
+    count = options["count"]
+    sizes = [min(shard_size, count - first) for first in range(0, count, shard_size)]
+    if workers <= 1 or len(sizes) <= 1:
+        for shard, size in enumerate(sizes):
+            yield size, generate_shard(options, shard, size, compress, parse)
+        return
+
+    # "spawn" as in ingest.py: workers don't inherit the parent's state
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=min(workers, len(sizes)), mp_context=context) as pool:
+        pending = []
+        for shard, size in enumerate(sizes):
+            pending.append((size, pool.submit(generate_shard, options, shard, size, compress, parse)))
+            if len(pending) >= 2 * workers:
+                size, future = pending.pop(0)
+                yield size, future.result()
+        for size, future in pending:
+            yield size, future.result()
+
+
+def generate(output: Path, options: dict, workers: int = 1, shard_size: int = SHARD_SIZE,
+             compress: int = 0, snapshot: bool = False) -> None:
+    """
+    Write the alerts described by `options` (see resolve_options) to
+    `output`, plus <output>.gz if `compress` (the gzip level) and the
+    snapshot if `snapshot`.
+    """
+    count = options["count"]
+    builder = None
     written = 0
-    
-    with open(output_file, "w", encoding="utf-8") as f:
-        for i in range(0, num_alerts, batch_size):
-            batch_end = min(i + batch_size, num_alerts)
-            batch = []
-            
-            for j in range(i, batch_end):
-                alert = generate_alert(j, start_date, end_date)
-                batch.append(alert)
-                
-                # Update statistics
-                stats["severities"][alert["severity"]] += 1
-                stats["statuses"][alert["status"]] += 1
-                stats["sources"][alert["source"]] += 1
-                stats["regions"][alert["resource"]["region"]] += 1
-                stats["alert_types"][alert["type"]] += 1
-            
-            # Write batch to file
-            for alert in batch:
-                f.write(json.dumps(alert) + "\n")
-            
-            written = batch_end
-            progress = (written / num_alerts) * 100
-            print(f"Progress: {written:,}/{num_alerts:,} ({progress:.1f}%)", end="\r")
-    
-    print(f"\n✅ Generated {written:,} alerts in {output_file}")
-    print(f"\n📊 Statistics:")
-    print(f"   - Severities: {dict(stats['severities'])}")
-    print(f"   - Statuses: {dict(stats['statuses'])}")
-    print(f"   - Sources: {len(stats['sources'])} unique sources")
-    print(f"   - Regions: {len(stats['regions'])} unique regions")
-    print(f"   - Alert Types: {len(stats['alert_types'])} unique types")
-    print(f"\n🚀 You can now run: python main.py")
-    print(f"⚠️  Note: Loading {written:,} records may take 1-2 minutes on first startup")
+    gz_path = output.with_name(output.name + ".gz")
+    as_array = options["format"] == "json"
+    with output.open("wb") as f, (gz_path.open("wb") if compress else open(os.devnull, "wb")) as gz:
+        if as_array:
+            f.write(b"[\n")
+        for size, (data, compressed, chunk) in _shards(options, shard_size, compress, snapshot, workers):
+            if as_array and written:
+                f.write(b",\n")
+            f.write(data)
+            if compressed is not None:
+                gz.write(compressed)
+            if chunk is not None:
+                if builder is None:
+                    builder = chunk
+                else:
+                    builder.extend(chunk)
+            written += size
+            print(f"Progress: {written:,}/{count:,} ({written / count * 100:.1f}%)", end="\r")
+        if as_array:
+            f.write(b"\n]\n")
+    print()
+
+    if snapshot and builder is not None:
+        from snapshot import save_snapshot
+        print("Writing snapshot...")
+        save_snapshot(builder.build(), output)
+
+
+def resolve_options(profile: str = None, **overrides) -> dict:
+    """
+    Settings of a dataset: DEFAULTS, then those of `profile`, then
+    `overrides` (None values are ignored). Fills in the seed if none is set
+    and turns "end" and "days" into the datetimes "start" and "end".
+    """
+    options = dict(DEFAULTS)
+    if profile is not None:
+        options.update(PROFILES[profile])
+    options.update((key, value) for key, value in overrides.items() if value is not None)
+    options["profile"] = profile
+    if options["seed"] is None:
+        options["seed"] = secrets.randbits(32)
+    end = options["end"]
+    if end is None:
+        end = datetime.now(timezone.utc).replace(microsecond=0)
+    elif isinstance(end, str):
+        end = datetime.fromisoformat(end.replace("Z", "+00:00"))
+        if end.tzinfo is None:
+            end = end.replace(tzinfo=timezone.utc)
+    options["end"] = end
+    options["start"] = end - timedelta(days=options["days"])
+    return options
+
+
+def dataset_params(options: dict) -> dict:
+    """`options` as recorded in <output>.params.json (JSON types only)."""
+    return dict(options, start=options["start"].isoformat(), end=options["end"].isoformat())
+
+
+def write_params(output: Path, options: dict) -> Path:
+    """Record the settings a dataset was generated with next to it, as <output>.params.json."""
+    path = output.with_name(output.name + ".params.json")
+    path.write_text(json.dumps(dataset_params(options), indent=2) + "\n", encoding="utf-8")
+    return path
+
+
+def main(argv=None):
+    """Generate alert data."""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--profile", choices=sorted(PROFILES), help="named, seeded settings (see --list-profiles)")
+    parser.add_argument("--list-profiles", action="store_true", help="print the profiles and exit")
+    parser.add_argument("--count", type=int, help="number of alerts (default: 1.2M)")
+    parser.add_argument("--output", help="file to write (default: aws_like_alerts_10000.jsonl)")
+    parser.add_argument("--format", choices=["jsonl", "json"], help="JSONL (default) or one JSON array")
+    parser.add_argument("--seed", type=int, help="random seed (default: a fresh one, printed)")
+    parser.add_argument("--end", help="ISO time the data ends at (default: now, or the profile's reference clock)")
+    parser.add_argument("--days", type=float, help="days of data before --end (default: 90)")
+    parser.add_argument("--campaigns", type=int, help="hot correlation campaigns")
+    parser.add_argument("--campaign-share", type=float, help="share of correlated alerts joining a hot campaign")
+    parser.add_argument("--campaign-skew", type=float, help="Zipf exponent of hot campaign sizes")
+    parser.add_argument("--bursts", type=int, help="bursts of activity")
+    parser.add_argument("--burst-share", type=float, help="share of alerts falling in bursts")
+    parser.add_argument("--burst-minutes", type=float, help="mean burst length, in minutes")
+    parser.add_argument("--resource-names", type=int, help="distinct resource numbers per resource type")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="worker processes")
+    parser.add_argument("--shard-size", type=int, default=SHARD_SIZE, help="alerts per shard")
+    parser.add_argument("--gzip", action="store_true", help="also write <output>.gz")
+    parser.add_argument("--gzip-level", type=int, default=1, help="gzip compression level (default: 1, fastest)")
+    parser.add_argument("--snapshot", action="store_true", help="also write the server's binary snapshot")
+    args = parser.parse_args(argv)
+
+    if args.list_profiles:
+        for name, profile in PROFILES.items():
+            end = profile.get("end")
+            settings = dict(profile, end=end.isoformat() if end else "now")
+            print(f"{name}: " + ", ".join(f"{key}={value}" for key, value in settings.items()))
+        return
+
+    options = resolve_options(
+        args.profile, count=args.count, output=args.output, format=args.format, seed=args.seed,
+        end=args.end, days=args.days, campaigns=args.campaigns, campaign_share=args.campaign_share,
+        campaign_skew=args.campaign_skew, bursts=args.bursts, burst_share=args.burst_share,
+        burst_minutes=args.burst_minutes, resource_names=args.resource_names,
+    )
+    if options["format"] == "json" and (args.gzip or args.snapshot):
+        parser.error("--gzip and --snapshot need the JSONL format")
+    output = Path(options["output"])
+    count = options["count"]
+
+    label = f"profile {args.profile}, " if args.profile else ""
+    print(f"🚀 Generating {count:,} alerts ({label}seed {options['seed']}, "
+          f"{options['start'].isoformat()} to {options['end'].isoformat()}, {args.workers} workers)...")
+    began = time.perf_counter()
+    compress = args.gzip_level if args.gzip else 0
+    generate(output, options, args.workers, args.shard_size, compress, args.snapshot)
+    elapsed = time.perf_counter() - began
+    params = write_params(output, options)
+
+    print(f"✅ Generated {count:,} alerts in {output} in {elapsed:.1f}s "
+          f"({count / elapsed:,.0f} alerts/s)")
+    print(f"   - Settings: {params.name}")
+    if args.gzip:
+        print(f"   - Compressed copy: {output.name}.gz")
+    if args.snapshot:
+        print(f"   - Snapshot: {output.name}.snapshot/")
+    print("\n🚀 You can now run: python main.py")
 
 if __name__ == "__main__":
     main()
-
@@ -0,0 +1,121 @@
+"""
+Geographic grid of alert counts for /geo/grid.
+
+Alerts with coordinates are binned into a latitude/longitude grid at every
+zoom level from 0 to MAX_ZOOM. At zoom z a cell is 180 / 2**z degrees on a
+side (2**(z + 1) columns by 2**z rows), so every cell splits into four at the
+next level. Each level keeps per-severity counts for its non-empty cells. The
+grid is built with the store and updated as alerts are added: alerts are
+binned once at MAX_ZOOM and the coarser levels are summed from those cells,
+so a request reads only the cells of one level, however many alerts there are.
+"""
+from threading import Lock
+from typing import Optional, Tuple
+
+import numpy as np
+
+MAX_ZOOM = 12
+
+
+def cell_size(zoom: int) -> float:
+    """Side of a cell at `zoom`, in degrees."""
+    return 180.0 / (1 << zoom)
+
+
+class _Level:
+    """Non-empty cells of one zoom level: cell key -> row of per-severity counts."""
+
+    def __init__(self):
+        # Cell keys in sorted order and their rows, to look rows up
+        self._sorted_keys = np.empty(0, dtype=np.int64)
+        self._sorted_rows = np.empty(0, dtype=np.int64)
+        # Swapped as one tuple when the arrays grow, so readers never see
+        # keys and counts of different sizes
+        self._state = (0, np.empty(0, dtype=np.int64), np.zeros((0, 1), dtype=np.int64))
+
+    def add(self, keys: np.ndarray, counts: np.ndarray) -> None:
+        """Add `counts` (one row per key, one column per severity code) to the cells `keys` (sorted, distinct)."""
+        size, all_keys, all_counts = self._state
+        at = np.searchsorted(self._sorted_keys, keys)
+        found = at < len(self._sorted_keys)
+        found[found] = self._sorted_keys[at[found]] == keys[found]
+        rows = np.empty(len(keys), dtype=np.int64)
+        rows[found] = self._sorted_rows[at[found]]
+        new = np.flatnonzero(~found)
+        rows[new] = np.arange(size, size + len(new))
+        self._sorted_keys = np.insert(self._sorted_keys, at[new], keys[new])
+        self._sorted_rows = np.insert(self._sorted_rows, at[new], rows[new])
+        size += len(new)
+
+        width = max(all_counts.shape[1], counts.shape[1])
+        if size > len(all_keys) or width > all_counts.shape[1]:
+            capacity = max(size, 2 * len(all_keys)) if size > len(all_keys) else len(all_keys)
+            grown_keys = np.empty(capacity, dtype=np.int64)
+            grown_keys[:len(all_keys)] = all_keys
+            grown_counts = np.zeros((capacity, width), dtype=np.int64)
+            grown_counts[:len(all_counts), :all_counts.shape[1]] = all_counts
+            all_keys, all_counts = grown_keys, grown_counts
+        all_keys[rows] = keys
+        # In place: readers may see part of this batch, as with /stats
+        all_counts[rows, :counts.shape[1]] += counts
+        self._state = (size, all_keys, all_counts)
+
+    def cells(self) -> Tuple[np.ndarray, np.ndarray]:
+        size, keys, counts = self._state
+        return keys[:size], counts[:size]
+
+
+class GeoGrid:
+    """Per-severity alert counts per grid cell, at every zoom level up to MAX_ZOOM."""
+
+    def __init__(self):
+        self._levels = [_Level() for _ in range(MAX_ZOOM + 1)]
+        self._lock = Lock()
+
+    @classmethod
+    def build(cls, latitude: np.ndarray, longitude: np.ndarray, severity: np.ndarray) -> "GeoGrid":
+        grid = cls()
+        grid.add(latitude, longitude, severity)
+        return grid
+
+    def add(self, latitude: np.ndarray, longitude: np.ndarray, severity: np.ndarray) -> None:
+        """Account for more alerts, given their coordinates and severity codes."""
+        if not len(latitude):
+            return
+        size = cell_size(MAX_ZOOM)
+        rows = np.clip(((latitude + 90) // size).astype(np.int64), 0, (1 << MAX_ZOOM) - 1)
+        columns = np.clip(((longitude + 180) // size).astype(np.int64), 0, (1 << (MAX_ZOOM + 1)) - 1)
+        width = int(severity.max()) + 1
+
+        # Distinct (finest cell, severity) pairs, from which every level is summed
+        cells, counts = np.unique(
+            ((rows << (MAX_ZOOM + 1)) | columns) * width + severity.astype(np.int64), return_counts=True
+        )
+        severity = cells % width
+        rows, columns = np.divmod(cells // width, 1 << (MAX_ZOOM + 1))
+
+        with self._lock:
+            for zoom, level in enumerate(self._levels):
+                shift = MAX_ZOOM - zoom
+                keys, inverse = np.unique(
+                    ((rows >> shift) << (zoom + 1)) | (columns >> shift), return_inverse=True
+                )
+                totals = np.bincount(inverse * width + severity, weights=counts, minlength=len(keys) * width)
+                level.add(keys, totals.reshape(len(keys), width).astype(np.int64))
+
+    def cells(self, zoom: int, bbox: Optional[Tuple[float, float, float, float]] = None):
+        """
+        (south-west corners as (lat, lon) arrays, per-severity counts) of the
+        non-empty cells at `zoom`, optionally only those intersecting
+        bbox = (min_lon, min_lat, max_lon, max_lat).
+        """
+        keys, counts = self._levels[zoom].cells()
+        size = cell_size(zoom)
+        rows, columns = np.divmod(keys, 1 << (zoom + 1))
+        lat = rows * size - 90
+        lon = columns * size - 180
+        if bbox is not None:
+            min_lon, min_lat, max_lon, max_lat = bbox
+            keep = (lat + size > min_lat) & (lat <= max_lat) & (lon + size > min_lon) & (lon <= max_lon)
+            lat, lon, counts = lat[keep], lon[keep], counts[keep]
+        return lat, lon, counts
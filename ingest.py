@@ -0,0 +1,108 @@
+"""
+Parallel JSONL ingestion.
+
+The file is cut into byte ranges that start and end on line boundaries. Each
+range is parsed by a worker process into its own AlertStoreBuilder, i.e. into
+compact column buffers rather than a list of dicts, so what travels back to
+the parent is a handful of arrays and byte strings per chunk. The parent merges
+the chunks in file order, so alert positions are the same as with a
+sequential load.
+
+Lines that are not valid JSON objects (or that the store can't ingest) are
+skipped and counted instead of aborting the load.
+"""
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Iterator, List, Optional, Tuple
+import json
+import multiprocessing
+import os
+
+from alert_store import AlertStoreBuilder
+from loading import LoadProgress
+
+CHUNK_BYTES = 16 * 1024 * 1024
+
+# Files smaller than this are parsed in-process: starting workers would cost
+# more than it saves
+MIN_PARALLEL_BYTES = 4 * CHUNK_BYTES
+
+
+def chunk_ranges(path: Path, chunk_bytes: int = CHUNK_BYTES) -> List[Tuple[int, int]]:
+    """Split `path` into [start, end) byte ranges of about `chunk_bytes`, each ending after a newline."""
+    size = path.stat().st_size
+    ranges = []
+    with path.open("rb") as f:
+        start = 0
+        while start < size:
+            f.seek(min(start + chunk_bytes, size))
+            f.readline()  # finish the line the cut landed in
+            end = min(f.tell(), size)
+            ranges.append((start, end))
+            start = end
+    return ranges
+
+
+def parse_chunk(path: str, start: int, end: int) -> Tuple[AlertStoreBuilder, int]:
+    """Parse the lines in [start, end) of a JSONL file. Returns (builder, malformed line count)."""
+    with open(path, "rb") as f:
+        f.seek(start)
+        data = f.read(end - start)
+    return parse_lines(data)
+
+
+def parse_lines(data: bytes) -> Tuple[AlertStoreBuilder, int]:
+    """Parse a block of JSONL. Returns (builder, malformed line count)."""
+    builder = AlertStoreBuilder()
+    malformed = 0
+    for line in data.split(b"\n"):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            builder.add(json.loads(line), raw=line)
+        except (ValueError, TypeError, OverflowError):
+            malformed += 1
+    return builder, malformed
+
+
+def _parse_chunks(path: Path, ranges, workers: int) -> Iterator[Tuple[AlertStoreBuilder, int]]:
+    if workers <= 1:
+        for start, end in ranges:
+            yield parse_chunk(str(path), start, end)
+        return
+
+    # "spawn" keeps workers from inheriting the server's threads and locks
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+        starts, ends = zip(*ranges)
+        yield from pool.map(parse_chunk, [str(path)] * len(ranges), starts, ends)
+
+
+def load_jsonl(
+    path: Path,
+    workers: Optional[int] = None,
+    progress: Optional[LoadProgress] = None,
+) -> Tuple[AlertStoreBuilder, int]:
+    """
+    Parse a JSONL file with up to `workers` processes (default: one per CPU).
+    Returns the merged builder and the number of malformed lines skipped.
+    """
+    ranges = chunk_ranges(path)
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if path.stat().st_size < MIN_PARALLEL_BYTES:
+        workers = 1
+    workers = min(workers, len(ranges))
+
+    builder = AlertStoreBuilder()
+    malformed = 0
+    for (start, end), (chunk, chunk_malformed) in zip(ranges, _parse_chunks(path, ranges, workers)):
+        if len(builder):
+            builder.extend(chunk)
+        else:
+            builder = chunk
+        malformed += chunk_malformed
+        if progress is not None:
+            progress.advance(len(chunk), end - start, chunk_malformed)
+    return builder, malformed
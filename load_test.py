@@ -0,0 +1,453 @@
+"""
+Load-test a local API server with the dashboard's traffic mix.
+
+Usage:
+    python load_test.py [--profile 10k | --url http://127.0.0.1:8000] [--concurrency N]
+                        [--duration S] [--warmup S] [--think MS]
+                        [--mix VIEW=WEIGHT,...] [--ingest N] [--starvation] [--output FILE]
+
+Unless --url names a running server, the seeded dataset of --profile (see
+generate_large_dataset.py) is prepared in --data-dir as for
+benchmark_endpoints.py, and uvicorn is started on it: a single process,
+since a dataset has one writer (see wal.py). Exact analytics run in that
+process's worker pool (see analytics_pool.py).
+
+--concurrency virtual users then replay what the frontend does, picking
+views at random with the --mix weights (see VIEWS):
+  dashboard   Dashboard.tsx: GET /stats
+  analytics   EnhancedDashboard.tsx: /stats, /analytics/advanced and
+              /analytics/predictive at once
+  alerts      AlertsList.tsx: pages of 20 /alerts, with the list's filters
+  detail      AlertDetail.tsx: GET /alerts/{id} of a listed alert
+with --think milliseconds (exponentially distributed) between views, 0 for
+back-to-back. --ingest N also posts N new alerts per second, like a live
+feed: each batch changes the dataset version, so the analytics caches are
+recomputed as they would be in production.
+
+Throughput, p50/p95/p99/max latency and the error rate of every endpoint
+are reported for the --duration seconds after --warmup. --starvation first
+runs the same load with only the alerts and detail views, then the full
+mix, and compares the /alerts latencies of the two: how much the analytics
+endpoints slow the cheap ones down.
+
+The load generator shares the machine with the server; on a small machine,
+leave it a core (e.g. ALERT_ANALYTICS_WORKERS = cores - 2).
+"""
+from collections import Counter, defaultdict, deque
+from pathlib import Path
+from urllib.parse import urlencode, urlsplit
+import argparse
+import asyncio
+import json
+import os
+import random
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.error
+import urllib.request
+
+import numpy as np
+
+from generate_large_dataset import PROFILES, SEVERITIES, SOURCES, STATUSES, generate_lines, hot_spots, resolve_options
+
+# Alerts per /alerts page, as in AlertsList.tsx
+PAGE_SIZE = 20
+
+# Most further pages an alerts view reads after the first
+MAX_EXTRA_PAGES = 3
+
+# Words typed into the alerts list's search box
+SEARCHES = ["ransomware", "exfiltration", "unauthorized", "lateral", "s3_bucket", "user_42"]
+
+DEFAULT_MIX = {"dashboard": 2, "analytics": 2, "alerts": 4, "detail": 2}
+
+# Views of --starvation's first run
+CHEAP_VIEWS = ("alerts", "detail")
+
+# Alert IDs seen in listings, for the detail view
+KNOWN_IDS = 10_000
+
+
+class _Connection:
+    """One HTTP/1.1 keep-alive connection (just enough HTTP for this API)."""
+
+    def __init__(self, host: str, port: int):
+        self.host, self.port = host, port
+        self.reader = self.writer = None
+
+    async def request(self, method: str, path: str, body: bytes = b""):
+        """(status, headers, body, keep-alive) of one request."""
+        if self.writer is None:
+            self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+        head = f"{method} {path} HTTP/1.1\r\nHost: {self.host}:{self.port}\r\nAccept: application/json\r\n"
+        if body:
+            head += f"Content-Type: application/json\r\nContent-Length: {len(body)}\r\n"
+        self.writer.write(head.encode("latin-1") + b"\r\n" + body)
+        await self.writer.drain()
+
+        status_line = await self.reader.readline()
+        if not status_line:
+            raise ConnectionError("connection closed by the server")
+        status = int(status_line.split()[1])
+        headers = {}
+        while True:
+            line = await self.reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+
+        if "content-length" in headers:
+            data = await self.reader.readexactly(int(headers["content-length"]))
+        elif headers.get("transfer-encoding", "").lower() == "chunked":
+            parts = []
+            while True:
+                size = int((await self.reader.readline()).split(b";")[0], 16)
+                parts.append(await self.reader.readexactly(size + 2))
+                if not size:
+                    break
+            data = b"".join(part[:-2] for part in parts)
+        else:
+            data = await self.reader.read()
+        return status, headers, data, headers.get("connection", "").lower() != "close"
+
+    def close(self) -> None:
+        if self.writer is not None:
+            self.writer.close()
+            self.writer = None
+
+
+class _Session:
+    """A virtual user's connections: one per request in flight, kept alive like a browser's."""
+
+    def __init__(self, host: str, port: int, recorder: "Recorder"):
+        self.host, self.port = host, port
+        self.recorder = recorder
+        self._idle = []
+
+    async def request(self, endpoint: str, path: str, method: str = "GET", body: bytes = b""):
+        """Body of the response, or None on errors. Recorded under `endpoint`."""
+        began = time.perf_counter()
+        connection = self._idle.pop() if self._idle else _Connection(self.host, self.port)
+        try:
+            try:
+                status, _, data, keep = await connection.request(method, path, body)
+            except (ConnectionError, asyncio.IncompleteReadError):
+                # A kept-alive connection the server has closed in the meantime
+                connection.close()
+                connection = _Connection(self.host, self.port)
+                status, _, data, keep = await connection.request(method, path, body)
+        except (OSError, asyncio.IncompleteReadError, ValueError, IndexError):
+            connection.close()
+            self.recorder.record(endpoint, time.perf_counter() - began, 0)
+            return None
+        self.recorder.record(endpoint, time.perf_counter() - began, status)
+        if keep:
+            self._idle.append(connection)
+        else:
+            connection.close()
+        return data if 200 <= status < 300 else None
+
+    def close(self) -> None:
+        for connection in self._idle:
+            connection.close()
+
+
+class Recorder:
+    """Latencies and statuses per endpoint, of the requests that finish while measuring."""
+
+    def __init__(self):
+        self.measuring = False
+        self.latencies = defaultdict(list)
+        self.statuses = defaultdict(Counter)
+
+    def record(self, endpoint: str, seconds: float, status: int) -> None:
+        if self.measuring:
+            self.latencies[endpoint].append(seconds)
+            self.statuses[endpoint][status] += 1
+
+    def summary(self, duration: float) -> dict:
+        endpoints = {}
+        for endpoint in sorted(self.latencies):
+            latencies = np.array(self.latencies[endpoint]) * 1000
+            statuses = self.statuses[endpoint]
+            errors = sum(count for status, count in statuses.items() if not 200 <= status < 400)
+            p50, p95, p99 = np.percentile(latencies, [50, 95, 99]).tolist()
+            endpoints[endpoint] = {
+                "requests": len(latencies),
+                "throughput_rps": round(len(latencies) / duration, 2),
+                "p50_ms": round(p50, 2),
+                "p95_ms": round(p95, 2),
+                "p99_ms": round(p99, 2),
+                "max_ms": round(float(latencies.max()), 2),
+                "error_rate": round(errors / len(latencies), 4),
+                # 0: no response (connection error)
+                "statuses": {str(status): count for status, count in sorted(statuses.items())},
+            }
+        requests = sum(e["requests"] for e in endpoints.values())
+        errors = sum(e["error_rate"] * e["requests"] for e in endpoints.values())
+        return {
+            "duration_s": round(duration, 2),
+            "requests": requests,
+            "throughput_rps": round(requests / duration, 2),
+            "error_rate": round(errors / requests, 4) if requests else 0.0,
+            "endpoints": endpoints,
+        }
+
+
+async def _dashboard(session: _Session, rng: random.Random, ids: deque) -> None:
+    await session.request("GET /stats", "/stats")
+
+
+async def _analytics(session: _Session, rng: random.Random, ids: deque) -> None:
+    # Promise.all in EnhancedDashboard.tsx
+    await asyncio.gather(
+        session.request("GET /stats", "/stats"),
+        session.request("GET /analytics/advanced", "/analytics/advanced"),
+        session.request("GET /analytics/predictive", "/analytics/predictive"),
+    )
+
+
+async def _alerts(session: _Session, rng: random.Random, ids: deque) -> None:
+    filters = {}
+    if rng.random() < 0.3:
+        filters["severity"] = rng.choice(SEVERITIES)
+    if rng.random() < 0.2:
+        filters["status"] = rng.choice(STATUSES)
+    if rng.random() < 0.15:
+        filters["source"] = rng.choice(SOURCES)
+    if rng.random() < 0.15:
+        filters["search"] = rng.choice(SEARCHES)
+    for page in range(1 + rng.randint(0, MAX_EXTRA_PAGES)):
+        query = urlencode(dict(limit=PAGE_SIZE, offset=page * PAGE_SIZE, **filters))
+        data = await session.request("GET /alerts", f"/alerts?{query}")
+        if data is None:
+            return
+        if page == 0:
+            ids.extend(item.get("id") for item in json.loads(data).get("items", ()) if item.get("id"))
+
+
+async def _detail(session: _Session, rng: random.Random, ids: deque) -> None:
+    if not ids:
+        await _alerts(session, rng, ids)
+    if ids:
+        await session.request("GET /alerts/{id}", f"/alerts/{ids[rng.randrange(len(ids))]}")
+
+
+VIEWS = {"dashboard": _dashboard, "analytics": _analytics, "alerts": _alerts, "detail": _detail}
+
+
+async def _user(number: int, host: str, port: int, mix: dict, think: float, recorder: Recorder,
+                ids: deque, stop: asyncio.Event) -> None:
+    rng = random.Random(number)
+    session = _Session(host, port, recorder)
+    names, weights = list(mix), list(mix.values())
+    try:
+        while not stop.is_set():
+            await VIEWS[rng.choices(names, weights)[0]](session, rng, ids)
+            if think:
+                await asyncio.sleep(rng.expovariate(1000 / think))
+    finally:
+        session.close()
+
+
+async def _ingest(rate: int, host: str, port: int, recorder: Recorder, stop: asyncio.Event) -> None:
+    """Post `rate` new alerts every second, in one batch."""
+    session = _Session(host, port, recorder)
+    rng = np.random.default_rng()
+    while not stop.is_set():
+        began = time.perf_counter()
+        options = resolve_options(None, count=rate, days=1 / 24)
+        lines = generate_lines(rng, rate, options, hot_spots(options))
+        body = ("[" + ",".join(lines) + "]").encode("utf-8")
+        await session.request("POST /alerts/batch", "/alerts/batch", "POST", body)
+        await asyncio.sleep(max(0.0, 1 - (time.perf_counter() - began)))
+    session.close()
+
+
+async def run_load(url: str, concurrency: int, duration: float, warmup: float, mix: dict,
+                   think: float = 0.0, ingest: int = 0) -> dict:
+    """Apply the load to the server at `url` for warmup + duration seconds; the summary of the measured part."""
+    parts = urlsplit(url)
+    host, port = parts.hostname, parts.port or 80
+    recorder = Recorder()
+    ids = deque(maxlen=KNOWN_IDS)
+    stop = asyncio.Event()
+    tasks = [
+        asyncio.create_task(_user(number, host, port, mix, think, recorder, ids, stop))
+        for number in range(concurrency)
+    ]
+    if ingest:
+        tasks.append(asyncio.create_task(_ingest(ingest, host, port, recorder, stop)))
+    await asyncio.sleep(warmup)
+    recorder.measuring = True
+    began = time.perf_counter()
+    await asyncio.sleep(duration)
+    recorder.measuring = False
+    measured = time.perf_counter() - began
+    stop.set()
+    await asyncio.gather(*tasks)
+    return recorder.summary(measured)
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _clear_writes(directory: Path) -> None:
+    """Drop the alerts posted to a benchmark dataset (its write-ahead log and compacted store)."""
+    (directory / "alerts.wal").unlink(missing_ok=True)
+    shutil.rmtree(directory / "alerts.store", ignore_errors=True)
+
+
+def start_server(port: int, data_dir: Path, log):
+    """uvicorn serving main:app from `data_dir` (see ALERT_DATA_DIR) on `port`."""
+    env = dict(os.environ, ALERT_DATA_DIR=str(data_dir))
+    command = [
+        sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(port),
+        "--no-access-log", "--log-level", "warning",
+    ]
+    return subprocess.Popen(command, cwd=Path(__file__).parent, env=env, stdout=log, stderr=subprocess.STDOUT)
+
+
+def wait_ready(url: str, process, timeout: float) -> None:
+    """Wait until /readyz succeeds a few times in a row."""
+    deadline = time.monotonic() + timeout
+    ready = 0
+    while ready < 3:
+        if process is not None and process.poll() is not None:
+            raise RuntimeError(f"the server exited with code {process.returncode}")
+        if time.monotonic() > deadline:
+            raise RuntimeError(f"the server wasn't ready after {timeout:.0f}s")
+        try:
+            with urllib.request.urlopen(f"{url}/readyz", timeout=5):
+                ready += 1
+                continue
+        except (urllib.error.URLError, OSError):
+            ready = 0
+        time.sleep(0.5)
+
+
+def _parse_mix(value: str) -> dict:
+    mix = {}
+    for part in value.split(","):
+        name, _, weight = part.partition("=")
+        if name.strip() not in VIEWS:
+            raise argparse.ArgumentTypeError(f"unknown view {name.strip()!r} (views: {', '.join(VIEWS)})")
+        mix[name.strip()] = float(weight or 1)
+    return mix
+
+
+def _print_summary(title: str, summary: dict) -> None:
+    print(f"\n{title}: {summary['requests']:,} requests in {summary['duration_s']}s, "
+          f"{summary['throughput_rps']:,.1f} req/s, {summary['error_rate']:.2%} errors")
+    print(f"   {'endpoint':<28}{'requests':>9}{'req/s':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}"
+          f"{'max ms':>9}{'errors':>9}")
+    for endpoint, e in summary["endpoints"].items():
+        print(f"   {endpoint:<28}{e['requests']:>9,}{e['throughput_rps']:>9.1f}{e['p50_ms']:>9.1f}"
+              f"{e['p95_ms']:>9.1f}{e['p99_ms']:>9.1f}{e['max_ms']:>9.1f}{e['error_rate']:>9.2%}")
+        failed = {status: count for status, count in e["statuses"].items() if not 200 <= int(status) < 400}
+        if failed:
+            print(f"   {'':<28}statuses: {failed}")
+
+
+def _starvation(cheap: dict, mixed: dict) -> dict:
+    """How much slower the endpoints of the cheap views got with the analytics views added."""
+    slowdown = {}
+    for endpoint, alone in cheap["endpoints"].items():
+        together = mixed["endpoints"].get(endpoint)
+        if together is None or not endpoint.startswith("GET "):
+            continue
+        slowdown[endpoint] = {
+            metric: round(together[metric] / alone[metric], 2) if alone[metric] else None
+            for metric in ("p50_ms", "p95_ms", "p99_ms")
+        }
+    return slowdown
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", help="test this running server instead of starting one")
+    parser.add_argument("--profile", default="10k", choices=sorted(PROFILES), help="dataset to serve (default: 10k)")
+    parser.add_argument("--data-dir", default="benchmark_data", help="where datasets are generated")
+    parser.add_argument("--concurrency", type=int, default=16, help="virtual users (default: 16)")
+    parser.add_argument("--duration", type=float, default=30.0, help="measured seconds (default: 30)")
+    parser.add_argument("--warmup", type=float, default=5.0, help="unmeasured seconds first (default: 5)")
+    parser.add_argument("--think", type=float, default=0.0, help="mean milliseconds between a user's views")
+    parser.add_argument("--mix", type=_parse_mix, default=DEFAULT_MIX,
+                        help="view weights (default: dashboard=2,analytics=2,alerts=4,detail=2)")
+    parser.add_argument("--ingest", type=int, default=0, help="alerts posted per second (default: 0)")
+    parser.add_argument("--starvation", action="store_true",
+                        help="also run the cheap views alone and compare their latencies")
+    parser.add_argument("--ready-timeout", type=float, default=600.0, help="seconds to wait for the data to load")
+    parser.add_argument("--output", help="JSON file to write the results to")
+    args = parser.parse_args()
+
+    process = log = directory = None
+    url = args.url
+    try:
+        if url is None:
+            from benchmark_endpoints import prepare_dataset
+
+            directory = Path(args.data_dir) / args.profile
+            prepare_dataset(args.profile, Path(args.data_dir), os.cpu_count() or 1)
+            _clear_writes(directory)
+            port = _free_port()
+            url = f"http://127.0.0.1:{port}"
+            log = tempfile.NamedTemporaryFile("w+b", prefix="load_test_server_", suffix=".log", delete=False)
+            print(f"Starting uvicorn on {url}, log: {log.name}")
+            process = start_server(port, directory, log)
+        url = url.rstrip("/")
+        wait_ready(url, process, args.ready_timeout)
+
+        print(f"🚀 {args.concurrency} users, {args.duration:.0f}s (+{args.warmup:.0f}s warmup), "
+              f"mix {args.mix}, think {args.think:.0f} ms, ingest {args.ingest}/s")
+        results = {
+            "settings": {
+                "url": url, "profile": None if args.url else args.profile,
+                "concurrency": args.concurrency, "duration": args.duration, "warmup": args.warmup,
+                "think_ms": args.think, "mix": args.mix, "ingest": args.ingest,
+            },
+            "runs": {},
+        }
+        runs = []
+        if args.starvation:
+            runs.append(("cheap", {view: w for view, w in args.mix.items() if view in CHEAP_VIEWS}))
+        runs.append(("mixed", args.mix))
+        for name, mix in runs:
+            summary = asyncio.run(
+                run_load(url, args.concurrency, args.duration, args.warmup, mix, args.think, args.ingest)
+            )
+            results["runs"][name] = summary
+            _print_summary(f"{name} ({', '.join(mix)})", summary)
+
+        if args.starvation:
+            results["starvation"] = _starvation(results["runs"]["cheap"], results["runs"]["mixed"])
+            print("\nSlowdown of the cheap endpoints with the analytics views added (mixed / cheap):")
+            for endpoint, ratios in results["starvation"].items():
+                print(f"   {endpoint:<28}" + "   ".join(f"{m[:3]} x{r}" for m, r in ratios.items()))
+
+        if args.output:
+            Path(args.output).write_text(json.dumps(results, indent=2) + "\n", encoding="utf-8")
+            print(f"\nWrote {args.output}")
+    finally:
+        if process is not None:
+            process.terminate()
+            try:
+                process.wait(10)
+            except subprocess.TimeoutExpired:
+                process.kill()
+        if log is not None:
+            log.close()
+        if directory is not None:
+            _clear_writes(directory)
+
+
+if __name__ == "__main__":
+    main()
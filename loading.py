@@ -0,0 +1,95 @@
+"""
+Background dataset loading and its progress, for the readiness endpoints.
+
+The app binds its port right away and loads the alerts in a daemon thread;
+/readyz and the data endpoints consult the shared LoadProgress to decide
+whether to serve or to answer 503 with Retry-After.
+"""
+from threading import Lock, Thread
+from typing import Callable, Optional
+import time
+import traceback
+
+LOADING = "loading"
+READY = "ready"
+FAILED = "failed"
+
+
+class LoadProgress:
+    """Progress of the current dataset load, safe to read from any thread."""
+
+    def __init__(self):
+        self._lock = Lock()
+        self.state = LOADING
+        self.source = None
+        self.alerts_loaded = 0
+        self.bytes_read = 0
+        self.bytes_total = 0
+        self.malformed_lines = 0
+        self.started_at = time.time()
+        self.finished_at: Optional[float] = None
+        self.error: Optional[str] = None
+
+    @property
+    def ready(self) -> bool:
+        return self.state == READY
+
+    def start(self, source: str, bytes_total: int) -> None:
+        with self._lock:
+            self.state = LOADING
+            self.source = source
+            self.alerts_loaded = 0
+            self.bytes_read = 0
+            self.bytes_total = bytes_total
+            self.malformed_lines = 0
+            self.started_at = time.time()
+            self.finished_at = None
+            self.error = None
+
+    def advance(self, alerts: int, bytes_read: int, malformed: int = 0) -> None:
+        """Record `alerts` more alerts (and `malformed` skipped lines) parsed from `bytes_read` more bytes."""
+        self.alerts_loaded += alerts
+        self.bytes_read += bytes_read
+        self.malformed_lines += malformed
+
+    def finish(self, alerts: int) -> None:
+        with self._lock:
+            self.alerts_loaded = alerts
+            self.bytes_read = self.bytes_total
+            self.finished_at = time.time()
+            self.state = READY
+
+    def fail(self, error: BaseException) -> None:
+        with self._lock:
+            self.finished_at = time.time()
+            self.error = f"{type(error).__name__}: {error}"
+            self.state = FAILED
+
+    def as_dict(self) -> dict:
+        with self._lock:
+            end = self.finished_at or time.time()
+            percent = 100.0 * self.bytes_read / self.bytes_total if self.bytes_total else 0.0
+            return {
+                "state": self.state,
+                "source": self.source,
+                "alerts_loaded": self.alerts_loaded,
+                "malformed_lines": self.malformed_lines,
+                "percent": round(min(percent, 100.0), 1),
+                "elapsed_seconds": round(end - self.started_at, 2),
+                "error": self.error,
+            }
+
+
+def load_in_background(load: Callable[[], None], progress: LoadProgress) -> Thread:
+    """Run `load()` in a daemon thread, recording a failure in `progress`."""
+
+    def run():
+        try:
+            load()
+        except BaseException as error:
+            traceback.print_exc()
+            progress.fail(error)
+
+    thread = Thread(target=run, name="alert-loader", daemon=True)
+    thread.start()
+    return thread
@@ -1,12 +1,71 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import Depends, FastAPI, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
-from collections import Counter, defaultdict
-from datetime import datetime
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from collections import Counter
+from contextlib import asynccontextmanager
+from datetime import datetime, timezone
 from pathlib import Path
-from typing import Optional
+from threading import Lock, Thread
+from typing import Callable, List, Optional
 import json
+import os
+import shutil
+import time
+import traceback
+import uuid
 
-app = FastAPI(title="Cloud Alert API")
+import numpy as np
+
+from alert_store import (
+    AlertStore,
+    AlertStoreBuilder,
+    alert_identifier,
+    to_epoch,
+)
+from analytics import advanced_analytics, distinct_counts
+from analytics_pool import AnalyticsBusy, AnalyticsPool
+from bitmaps import Bitmap
+from campaigns import TOP_CAMPAIGNS
+from cold_storage import (
+    DEFAULT_CACHE_SEGMENTS,
+    ColdStore,
+    read_manifest,
+    remove_id_index,
+    segment_groups,
+    segment_ids,
+    write_id_index,
+    write_lines,
+    write_manifest,
+    write_segments,
+)
+from export import EXPORT_FORMATS, MEDIA_TYPES, csv_chunks, gzip_chunks, iter_positions, ndjson_chunks
+from fast_json import FastJSONResponse, decode_json, encode_json, encode_with, json_array
+from geo_grid import MAX_ZOOM, cell_size
+from ingest import load_jsonl
+from loading import LoadProgress, load_in_background
+from response_cache import ResponseCache
+from rollups import GRANULARITIES, bucket_label, bucket_totals
+from snapshot import load_snapshot, save_snapshot, snapshot_dir
+from wal import CheckpointGate, WriteAheadLog, lock_writer
+from sort_index import SEVERITY_ORDER, SORT_FIELDS, SORT_ORDERS, InvalidCursor, decode_cursor, encode_cursor
+from time_index import NO_TIMESTAMP, SECONDS_PER_DAY, iso_time
+
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    global _WRITER_LOCK
+    # Refuse to start next to another server process on the same data (see wal.py)
+    _WRITER_LOCK = lock_writer(DATA_DIR / "alerts.lock")
+    # Load the dataset in the background so the server can bind its port
+    # (and answer /healthz, /readyz) right away
+    load_in_background(load_alerts, LOAD_PROGRESS)
+    yield
+    ANALYTICS_POOL.close()
+
+
+app = FastAPI(title="Cloud Alert API", lifespan=lifespan, default_response_class=FastJSONResponse)
 
 # Allow frontend / tools to call to API 
 app.add_middleware(
@@ -15,46 +74,176 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Retry-After"],
 )
 
-ALERTS = []
-ALERTS_BY_ID = {}
+STORE = AlertStore.from_alerts([])
+
+# Progress of the background load; data endpoints answer 503 until it's ready
+LOAD_PROGRESS = LoadProgress()
+
+# Seconds clients are told to wait before retrying while data is loading
+RETRY_AFTER_SECONDS = 5
+
+# Encoded responses of the analytics endpoints, keyed on the dataset version
+RESPONSE_CACHE = ResponseCache()
+
+# The predictive window slides with the clock, so cached results expire
+PREDICTIVE_CACHE_TTL = 60
+
+# Processes computing exact advanced analytics (0: in the request thread), and
+# how many more requests may wait for one before the rest get 429 (see
+# analytics_pool.py)
+ANALYTICS_WORKERS = int(os.environ.get("ALERT_ANALYTICS_WORKERS", str(min(2, os.cpu_count() or 1))))
+ANALYTICS_QUEUE = int(os.environ.get("ALERT_ANALYTICS_QUEUE", "4"))
+ANALYTICS_POOL = AnalyticsPool(ANALYTICS_WORKERS, ANALYTICS_QUEUE)
+
+# Directory of the dataset and of the files kept next to it (snapshots, the
+# write-ahead log, compacted segments); set ALERT_DATA_DIR to serve another one
+DATA_DIR = Path(os.environ.get("ALERT_DATA_DIR") or Path(__file__).parent)
+
+# Set ALERT_SNAPSHOTS=0 to always parse the source file (see snapshot.py)
+USE_SNAPSHOTS = os.environ.get("ALERT_SNAPSHOTS", "1") != "0"
+
+# Alerts added through the API, replayed after the base dataset on startup
+WAL_PATH = DATA_DIR / "alerts.wal"
+WAL: Optional[WriteAheadLog] = None
+
+# Writers hold this shared while they log a change; compaction holds it alone
+GATE = CheckpointGate()
+
+# Held while the server runs: one process writes a dataset
+_WRITER_LOCK = None
+
+# Set ALERT_RETENTION_DAYS=N to keep only the last N days in memory; older
+# alerts are compacted into cold segments (see cold_storage.py), checked
+# every COMPACT_INTERVAL_SECONDS
+RETENTION_DAYS = int(os.environ.get("ALERT_RETENTION_DAYS", "0"))
+COMPACT_INTERVAL_SECONDS = 3600
+
+# Checkpoint, write-ahead log and cold segments once alerts have been compacted
+STORE_DIR = DATA_DIR / "alerts.store"
+
+# Parsed cold segments kept in memory
+COLD_CACHE_SEGMENTS = int(os.environ.get("ALERT_COLD_CACHE_SEGMENTS", str(DEFAULT_CACHE_SEGMENTS)))
+
+COLD = ColdStore(STORE_DIR / "segments", [])
+
+# Held while STORE and COLD are swapped together, so no reader sees an alert
+# in both or in neither
+_TIERS_LOCK = Lock()
+_COMPACTOR: Optional[Thread] = None
+
+# One compaction at a time
+_COMPACTION_LOCK = Lock()
+
+# Key marking WAL records that aren't alerts (status changes)
+OP_KEY = "$op"
+
+# Fingerprint of the base store (the dataset, or the last checkpoint) that
+# the positions in logged status changes refer to; see _base_fingerprint()
+BASE_FINGERPRINT: Optional[str] = None
+
+# Values PATCH requests can set the status to
+ALERT_STATUSES = ("open", "in_progress", "closed", "resolved")
+
+# Largest POST /alerts/batch request
+MAX_BATCH_ALERTS = 10_000
+
+# IDs of alerts accepted but not yet in STORE, so concurrent requests can't
+# add the same ID twice
+_PENDING_IDS = set()
+_PENDING_LOCK = Lock()
 
 
 def load_alerts() -> None:
     """
-    Load alerts into memory.
+    Load alerts into the columnar store: the base dataset (or, once alerts
+    have been compacted, the checkpoint of the in-memory ones), then every
+    change made through the API since (replayed from the write-ahead log).
+    """
+    global STORE, WAL, COLD, BASE_FINGERPRINT
 
-    Tries aws_like_alerts_10000.json first (JSON array),
-    then falls back to aws_like_alerts_10000.jsonl (JSONL, one object per line).
+    manifest = read_manifest(STORE_DIR)
+    if manifest is None:
+        store = _load_base()
+        wal_path = WAL_PATH
+        cold = ColdStore(STORE_DIR / "segments", [], COLD_CACHE_SEGMENTS)
+    else:
+        store = _load_base(STORE_DIR / manifest["checkpoint"])
+        wal_path = STORE_DIR / manifest["wal"]
+        cold = ColdStore(STORE_DIR / "segments", manifest["segments"], COLD_CACHE_SEGMENTS, manifest.get("id_index"))
+        print(f"✅ {len(cold):,} older alerts in {len(cold.segments):,} cold segments")
+
+    base = _base_fingerprint(store)
+    if wal_path.exists() and wal_path.stat().st_size:
+        print(f"Replaying {wal_path.name}...")
+        payloads, malformed, stale = _read_log(wal_path, base)
+        if malformed:
+            print(f"⚠️ Skipped {malformed:,} malformed lines in {wal_path.name}")
+        if stale:
+            print(f"⚠️ Skipped {stale:,} status changes in {wal_path.name} logged against other base data")
+        store = _apply_payloads(store, payloads)
+        print(f"✅ Replayed {wal_path.name}: {len(store):,} alerts")
+
+    if WAL is not None:
+        WAL.close()
+    ANALYTICS_POOL.share(store)
+    with _TIERS_LOCK:
+        STORE, COLD = store, cold
+    BASE_FINGERPRINT = base
+    WAL = WriteAheadLog(wal_path, _apply_logged)
+    if RETENTION_DAYS:
+        moved = compact_alerts()
+        if moved:
+            print(f"✅ Moved {moved:,} alerts older than {RETENTION_DAYS} days to cold segments")
+        _start_compactor()
+    RESPONSE_CACHE.clear()
+    LOAD_PROGRESS.finish(len(STORE))
+
+
+def _load_base(checkpoint: Optional[Path] = None) -> AlertStore:
     """
-    global ALERTS, ALERTS_BY_ID
+    Load the base dataset, or the JSONL `checkpoint` written by the last
+    compaction.
 
-    base = Path(__file__).parent
+    Tries aws_like_alerts_10000.jsonl in DATA_DIR first (JSONL, one object
+    per line), then falls back to aws_like_alerts_10000.json (JSON array). A binary
+    snapshot of a previous load of the same file is mapped instead of parsing
+    it again, and one is written after every full parse.
+    """
+    base = DATA_DIR
     json_path = base / "aws_like_alerts_10000.json"
-    jsonl_path = base / "aws_like_alerts_10000.jsonl"
+    jsonl_path = checkpoint if checkpoint is not None else base / "aws_like_alerts_10000.jsonl"
 
-    ALERTS = []
+    source = jsonl_path if jsonl_path.exists() else json_path
+    if USE_SNAPSHOTS and source.exists():
+        LOAD_PROGRESS.start(source.name, source.stat().st_size)
+        store = load_snapshot(source)
+        if store is not None:
+            print(f"✅ Loaded {len(store):,} alerts from the {source.name} snapshot")
+            return store
+
+    builder = AlertStoreBuilder()
 
     if jsonl_path.exists():
-        # JSONL: one JSON object per line (preferred for large files)
+        # JSONL: one JSON object per line (preferred for large files), parsed
+        # in parallel chunks. The raw line is kept as the alert's stored JSON.
         print(f"Loading alerts from {jsonl_path.name}...")
-        with jsonl_path.open("r", encoding="utf-8") as f:
-            count = 0
-            for line in f:
-                line = line.strip()
-                if line:
-                    ALERTS.append(json.loads(line))
-                    count += 1
-                    if count % 100000 == 0:
-                        print(f"  Loaded {count:,} alerts...")
+        LOAD_PROGRESS.start(jsonl_path.name, jsonl_path.stat().st_size)
+        builder, malformed = load_jsonl(jsonl_path, progress=LOAD_PROGRESS)
+        if malformed:
+            print(f"⚠️ Skipped {malformed:,} malformed lines in {jsonl_path.name}")
         source_name = jsonl_path.name
 
     elif json_path.exists():
         # Normal JSON array
         print(f"Loading alerts from {json_path.name}...")
+        LOAD_PROGRESS.start(json_path.name, json_path.stat().st_size)
         with json_path.open("r", encoding="utf-8") as f:
-            ALERTS = json.load(f)
+            for alert in json.load(f):
+                builder.add(alert)
+                LOAD_PROGRESS.advance(1, 0)
         source_name = json_path.name
 
     else:
@@ -62,23 +251,275 @@ def load_alerts() -> None:
             f"Could not find aws_like_alerts_10000.json or aws_like_alerts_10000.jsonl in {base}"
         )
 
-    # Build quick lookup by ID.
-    print("Building alert index...")
-    ALERTS_BY_ID = {}
-    for alert in ALERTS:
-        alert_id = alert.get("id") or alert.get("alert_id") or alert.get("uuid")
-        if alert_id is not None:
-            ALERTS_BY_ID[alert_id] = alert
+    print("Building columnar store...")
+    store = builder.build()
 
     # Helpful debug print to see if it worked
-    print(f"✅ Loaded {len(ALERTS):,} alerts from {source_name}")
+    print(f"✅ Loaded {len(store):,} alerts from {source_name}")
+
+    if USE_SNAPSHOTS:
+        try:
+            print(f"Wrote snapshot {save_snapshot(store, source).name}")
+        except OSError as error:
+            print(f"⚠️ Could not write a snapshot of {source_name}: {error}")
+    return store
+
+
+def _base_fingerprint(store: AlertStore) -> str:
+    """
+    Identifies a freshly loaded base store by which alert is at which
+    position. Status changes are logged by position, which only means the
+    same alerts over the same base data: records stamped with another
+    fingerprint (e.g. after the dataset was regenerated) are skipped on replay.
+    """
+    return f"{len(store)}:{store.ids.fingerprint()}"
+
+
+def _read_log(path: Path, base: str):
+    """
+    The WAL's records as payloads for _apply_payloads(): alert lines become
+    AlertStoreBuilders, status change records dicts. Status changes not
+    logged against the `base` fingerprint are dropped. Returns (payloads,
+    malformed line count, dropped status change count).
+    """
+    payloads = []
+    malformed = 0
+    stale = 0
+    builder = AlertStoreBuilder()
+    with path.open("rb") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = decode_json(line)
+                if isinstance(record, dict) and record.get(OP_KEY) == "status":
+                    if record.get("base") != base:
+                        stale += 1
+                        continue
+                    change = {"status": record["status"], "positions": np.array(record["positions"], dtype=np.int64)}
+                    if len(builder):
+                        payloads.append(builder)
+                        builder = AlertStoreBuilder()
+                    payloads.append(change)
+                else:
+                    builder.add(record, raw=line)
+            except (ValueError, TypeError, OverflowError, KeyError):
+                malformed += 1
+    if len(builder):
+        payloads.append(builder)
+    return payloads, malformed, stale
+
+
+def _apply_payloads(store: AlertStore, payloads) -> AlertStore:
+    """
+    Apply logged changes to `store`, in log order: AlertStoreBuilders of new
+    alerts, and status changes {"status", "positions"} (which get "changed",
+    the number of alerts whose status actually changed).
+    """
+    pending = None
+    for payload in payloads:
+        if isinstance(payload, AlertStoreBuilder):
+            if pending is None:
+                pending = payload
+            else:
+                pending.extend(payload)
+            continue
+        if pending is not None:
+            store = store.append(pending)
+            pending = None
+        # Positions come from the store the change was made against; a log
+        # replayed over a different dataset may point past its end
+        positions = payload["positions"]
+        store, payload["changed"] = store.update_status(positions[positions < len(store)], payload["status"])
+    if pending is not None:
+        store = store.append(pending)
+    return store
+
+
+def _apply_logged(payloads) -> None:
+    """Publish the changes of one WAL group commit (called by the WAL, one batch at a time)."""
+    global STORE
+    STORE = _apply_payloads(STORE, payloads)
+
+
+def _tiers():
+    """(STORE, COLD), consistent with each other."""
+    with _TIERS_LOCK:
+        return STORE, COLD
+
+
+def compact_alerts() -> int:
+    """
+    Move the alerts older than the retention window from memory into cold
+    segments. The remaining alerts are written out as a new checkpoint, and
+    a new write-ahead log is started; the manifest switch commits all of it.
+    The checkpoint is written and parsed while writers go on; they only wait
+    while the segments are written and what they changed meanwhile is carried
+    over. Readers never wait. Returns the number of alerts moved.
+    """
+    global STORE, WAL, COLD, BASE_FINGERPRINT
+    cutoff = (int(time.time()) // SECONDS_PER_DAY - RETENTION_DAYS) * SECONDS_PER_DAY
+    with _COMPACTION_LOCK:
+        store = STORE
+        old = np.sort(store.time_index.range(None, cutoff - 1))
+        if not len(old):
+            return 0
+
+        manifest = read_manifest(STORE_DIR) or {"generation": 0, "checkpoint": None, "segments": []}
+        generation = manifest["generation"] + 1
+
+        # Positions never move (alerts are only appended), so the alerts that
+        # stay can be checkpointed from this store while writers go on
+        STORE_DIR.mkdir(parents=True, exist_ok=True)
+        checkpoint = STORE_DIR / f"hot.{generation}.jsonl"
+        hot = np.setdiff1d(np.arange(len(store)), old, assume_unique=True)
+        write_lines(checkpoint, (store.raw(position) for position in hot.tolist()))
+        builder, _ = load_jsonl(checkpoint)
+        hot_store = builder.build()
+        if USE_SNAPSHOTS:
+            save_snapshot(hot_store, checkpoint)
+        base = _base_fingerprint(hot_store)
+        # So are the IDs of the alerts going cold, merged into the ID index
+        segments_dir = STORE_DIR / "segments"
+        groups = segment_groups(store, old)
+        ids = [segment_ids(store, group) for _, group in groups]
+        id_index = write_id_index(segments_dir, manifest["segments"], ids, manifest.get("id_index"), generation)
+
+        with GATE.exclusive():
+            current = STORE
+            segments = write_segments(current, groups, ids, segments_dir, generation)
+            # The new log starts with the changes made since the checkpoint
+            # was written, replayed onto it like on startup
+            wal_path = STORE_DIR / f"wal.{generation}"
+            write_lines(wal_path, _changes_since(current, hot, len(store), hot_store, base))
+            payloads, _, _ = _read_log(wal_path, base)
+            hot_store = _apply_payloads(hot_store, payloads)
+            ANALYTICS_POOL.share(hot_store)
+
+            write_manifest(STORE_DIR, {
+                "generation": generation,
+                "checkpoint": checkpoint.name,
+                "wal": wal_path.name,
+                "segments": manifest["segments"] + segments,
+                "id_index": id_index,
+            })
+            cold = ColdStore(segments_dir, manifest["segments"] + segments, COLD_CACHE_SEGMENTS, id_index)
+            old_wal = WAL
+            WAL = WriteAheadLog(wal_path, _apply_logged)
+            with _TIERS_LOCK:
+                STORE, COLD = hot_store, cold
+            BASE_FINGERPRINT = base
+            RESPONSE_CACHE.clear()
+
+        # Superseded by the new manifest
+        old_wal.close()
+        old_wal.path.unlink(missing_ok=True)
+        if manifest["checkpoint"]:
+            (STORE_DIR / manifest["checkpoint"]).unlink(missing_ok=True)
+            shutil.rmtree(snapshot_dir(STORE_DIR / manifest["checkpoint"]), ignore_errors=True)
+        if manifest.get("id_index"):
+            remove_id_index(segments_dir, manifest["id_index"])
+    return len(old)
+
+
+def _changes_since(current: AlertStore, hot: np.ndarray, size: int, checkpointed: AlertStore, base: str):
+    """
+    WAL lines of what writers changed in `current` after its alerts at `hot`
+    (out of the first `size`) were checkpointed as `checkpointed`: status
+    changes of those alerts, then the alerts added since.
+    """
+    statuses = current.dictionaries["status"]
+    remap = np.array([statuses.codes.get(value, -1) for value in checkpointed.dictionaries["status"].values])
+    now = current.column("status")[hot]
+    changed = np.flatnonzero(now != remap[checkpointed.column("status")])
+    for code in np.unique(now[changed]).tolist():
+        positions = changed[now[changed] == code]
+        record = {OP_KEY: "status", "status": statuses.values[code], "positions": positions.tolist(), "base": base}
+        yield encode_json(record)
+    for position in range(size, len(current)):
+        yield current.raw(position)
+
+
+def _start_compactor() -> None:
+    """Compact every COMPACT_INTERVAL_SECONDS in a daemon thread, so the retention window slides."""
+    global _COMPACTOR
+
+    def run():
+        while True:
+            time.sleep(COMPACT_INTERVAL_SECONDS)
+            try:
+                compact_alerts()
+            except Exception:
+                traceback.print_exc()
+
+    if _COMPACTOR is None:
+        _COMPACTOR = Thread(target=run, name="alert-compactor", daemon=True)
+        _COMPACTOR.start()
+
+
+def require_ready() -> None:
+    """
+    Dependency of every data endpoint: answer 503 with Retry-After while the
+    dataset is still loading (or failed to load).
+    """
+    if not LOAD_PROGRESS.ready:
+        raise HTTPException(
+            status_code=503,
+            detail=f"Alert data is still loading ({LOAD_PROGRESS.as_dict()['percent']}%), see /readyz",
+            headers={"Retry-After": str(RETRY_AFTER_SECONDS)},
+        )
+
+
+@app.get("/healthz")
+def healthz():
+    """
+    Liveness probe: the process is up and serving requests.
+    """
+    return {"status": "ok"}
+
+
+@app.get("/readyz")
+def readyz():
+    """
+    Readiness probe: 200 once the dataset is loaded, otherwise 503 with the
+    load progress and a Retry-After header.
+    """
+    progress = LOAD_PROGRESS.as_dict()
+    if LOAD_PROGRESS.ready:
+        return {"status": "ready", "progress": progress}
+    return JSONResponse(
+        status_code=503,
+        content={"status": progress["state"], "progress": progress},
+        headers={"Retry-After": str(RETRY_AFTER_SECONDS)},
+    )
+
+
+def _filter_alerts(store: AlertStore, severity, status, source, search, start, end):
+    """
+    Apply the /alerts filters. Returns (selected, matched): the bitmap of
+    alerts passing the field and time filters (None if there are none), and
+    the ascending positions of those also matching `search` (None without one).
+    """
+    selected = None
+    for name, value in (("severity", severity), ("status", status), ("source", source)):
+        if value:
+            bitmap = store.bitmap(name, value)
+            selected = bitmap if selected is None else selected & bitmap
 
+    if start or end:
+        bitmap = store.time_range(to_epoch(start), to_epoch(end))
+        selected = bitmap if selected is None else selected & bitmap
 
-# Load alerts when the app starts (import time)
-load_alerts()
+    matched = None
+    if search:
+        matched = store.search(search)
+        if selected is not None:
+            matched = matched[selected.contains(matched)]
+    return selected, matched
 
 
-@app.get("/alerts")
+@app.get("/alerts", dependencies=[Depends(require_ready)])
 def get_alerts(
     limit: int = 100,
     offset: int = 0,
@@ -86,6 +527,11 @@ def get_alerts(
     status: Optional[str] = None,
     source: Optional[str] = None,
     search: Optional[str] = None,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    sort: Optional[str] = None,
+    order: Optional[str] = None,
+    cursor: Optional[str] = None,
 ):
     """
     Return a list of alerts with optional filtering and pagination.
@@ -97,52 +543,374 @@ def get_alerts(
     - status: filter by status (e.g. open|in_progress|closed)
     - source: filter by source (e.g. AWS-CloudTrail, GCP-CloudLogging)
     - search: simple text search in message/type/resource.name
+    - start / end: only alerts with start <= timestamp <= end (ISO-8601, UTC if no offset)
+    - sort: timestamp|risk_score|estimated_cost_usd|severity (default: load order)
+    - order: desc (default) or asc, when sorting
+    - cursor: `next_cursor` of the previous page, to continue a sorted listing
+      (`offset` then skips alerts after the cursor)
     """
-    filtered = ALERTS
+    store = STORE
+    after = None
+    if cursor:
+        try:
+            cursor_sort, cursor_order, *after = decode_cursor(cursor)
+        except InvalidCursor as error:
+            raise HTTPException(status_code=400, detail=str(error))
+        if (sort or cursor_sort) != cursor_sort or (order or cursor_order) != cursor_order:
+            raise HTTPException(status_code=400, detail="Cursor was issued for a different sort order")
+        sort, order = cursor_sort, cursor_order
+    if sort is not None and sort not in SORT_FIELDS:
+        raise HTTPException(status_code=400, detail=f"sort must be one of: {', '.join(SORT_FIELDS)}")
+    if order is not None and order not in SORT_ORDERS:
+        raise HTTPException(status_code=400, detail=f"order must be one of: {', '.join(SORT_ORDERS)}")
 
-    if severity:
-        filtered = [a for a in filtered if a.get("severity") == severity]
+    selected, matched = _filter_alerts(store, severity, status, source, search, start, end)
+    if matched is not None:
+        total = len(matched)
+    elif selected is not None:
+        total = selected.count()
+    else:
+        total = len(store)
 
-    if status:
-        filtered = [a for a in filtered if a.get("status") == status]
+    next_cursor = None
+    if sort is not None:
+        # Walk the presorted index from the cursor; one extra alert tells
+        # whether there is a next page
+        order = order or "desc"
+        descending = order == "desc"
+        index = store.sort_index(sort)
+        first = index.start_after(*after, descending) if after else 0
+        skip, size = max(offset, 0), max(limit, 0)
+        if matched is not None:
+            paged = index.top(matched, first, skip, size + 1, descending)
+        else:
+            paged = index.walk(selected, first, skip, size + 1, descending)
+        has_more = len(paged) > size
+        paged = paged[:size]
+        if has_more and size:
+            last = int(paged[-1])
+            next_cursor = encode_cursor(sort, order, index.key(last), last)
+    elif matched is not None:
+        paged = matched[offset: offset + limit]
+    elif selected is not None:
+        paged = selected.select(offset, limit)
+    else:
+        paged = range(len(store))[offset: offset + limit]
 
-    if source:
-        filtered = [a for a in filtered if a.get("source") == source]
+    # The items are the alerts' stored JSON, spliced in without re-encoding
+    body = encode_with(
+        {"total": total, "limit": limit, "offset": offset, "next_cursor": next_cursor},
+        "items",
+        json_array(store.raw(int(position)) for position in paged),
+    )
+    return Response(content=body, media_type="application/json")
 
-    if search:
-        needle = search.lower()
-        def matches(a):
-            msg = str(a.get("message", "")).lower()
-            typ = str(a.get("type", "")).lower()
-            res = a.get("resource") or {}
-            res_name = str(res.get("name", "")).lower()
-            return (needle in msg) or (needle in typ) or (needle in res_name)
 
-        filtered = [a for a in filtered if matches(a)]
+@app.get("/alerts/export", dependencies=[Depends(require_ready)])
+def export_alerts(
+    format: str = "ndjson",
+    gzip: bool = False,
+    severity: Optional[str] = None,
+    status: Optional[str] = None,
+    source: Optional[str] = None,
+    search: Optional[str] = None,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    sort: Optional[str] = None,
+    order: str = "desc",
+    cold: bool = True,
+):
+    """
+    Stream every alert matching the /alerts filters, for bulk export.
 
-    paged = filtered[offset: offset + limit]
+    Query params:
+    - format: ndjson (default, one alert JSON per line) or csv (flattened columns)
+    - gzip: compress the stream (served as a .gz file)
+    - severity, status, source, search, start, end: as for /alerts
+    - sort / order: as for /alerts (default: load order)
+    - cold: also export alerts past the retention window (default: true)
+
+    The response is written as alerts are read, so memory use doesn't grow
+    with the number of alerts exported.
+    """
+    if format not in EXPORT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"format must be one of: {', '.join(EXPORT_FORMATS)}")
+    if sort is not None and sort not in SORT_FIELDS:
+        raise HTTPException(status_code=400, detail=f"sort must be one of: {', '.join(SORT_FIELDS)}")
+    if order not in SORT_ORDERS:
+        raise HTTPException(status_code=400, detail=f"order must be one of: {', '.join(SORT_ORDERS)}")
+
+    store, cold_store = _tiers()
+    names = cold_store.names(to_epoch(start), to_epoch(end)) if cold else []
+    if names and sort not in (None, "timestamp"):
+        raise HTTPException(
+            status_code=400,
+            detail="Alerts past the retention window can only be exported in load or timestamp order; pass cold=false",
+        )
+    descending = order == "desc"
+
+    # Cold segments hold older alerts than the store, in day order
+    if sort is not None and descending:
+        tiers = [lambda: store] + [lambda name=name: cold_store.segment(name) for name in reversed(names)]
+    else:
+        tiers = [lambda name=name: cold_store.segment(name) for name in names] + [lambda: store]
+
+    def chunks():
+        for i, tier in enumerate(tiers):
+            tier = tier()
+            selected, matched = _filter_alerts(tier, severity, status, source, search, start, end)
+            if matched is not None:
+                selected = Bitmap.from_positions(matched, len(tier))
+            blocks = iter_positions(tier, selected, sort, descending)
+            if format == "ndjson":
+                yield from ndjson_chunks(tier, blocks)
+            else:
+                yield from csv_chunks(tier, blocks, header=i == 0)
+
+    body = chunks()
+    filename = f"alerts.{format}"
+    media_type = MEDIA_TYPES[format]
+    if gzip:
+        body = gzip_chunks(body)
+        filename += ".gz"
+        media_type = "application/gzip"
+    return StreamingResponse(
+        body,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+
+def _ingest(alerts: List[dict]) -> List[str]:
+    """
+    Validate, log and publish new alerts. Returns their IDs once they are on
+    disk and visible to readers.
+    """
+    builder = AlertStoreBuilder()
+    lines = []
+    ids = []
+    now = datetime.now(timezone.utc).isoformat().replace("+00:00", "Z")
+    for index, alert in enumerate(alerts):
+        if not isinstance(alert, dict):
+            raise HTTPException(status_code=422, detail=f"Alert {index} is not a JSON object")
+        if OP_KEY in alert:
+            raise HTTPException(status_code=422, detail=f"Alert {index} has the reserved key {OP_KEY}")
+        # An alert_id or uuid is the alert's ID as much as an id is
+        if alert_identifier(alert) is None:
+            alert["id"] = str(uuid.uuid4())
+        alert.setdefault("timestamp", now)
+        alert_id = alert_identifier(alert)
+        if not isinstance(alert_id, str):
+            raise HTTPException(status_code=422, detail=f"Alert {index} has a non-string id")
+        line = encode_json(alert)
+        try:
+            builder.add(alert, raw=line)
+        except (ValueError, TypeError, OverflowError) as error:
+            raise HTTPException(status_code=422, detail=f"Alert {index} is invalid: {error}")
+        lines.append(line)
+        ids.append(alert_id)
+
+    if len(set(ids)) < len(ids):
+        raise HTTPException(status_code=409, detail="Duplicate alert IDs in the request")
+    with GATE.shared():
+        store, cold = _tiers()
+        try:
+            store.check_append(builder)
+        except OverflowError as error:
+            raise HTTPException(status_code=422, detail=f"Too many distinct values: {error}")
+        # Cold segments don't change while the gate is held, so they can be
+        # checked before taking the lock other writers wait on
+        taken = [alert_id for alert_id, name in zip(ids, cold.find_many(ids)) if name is not None]
+        if taken:
+            raise HTTPException(status_code=409, detail=f"Alert {taken[0]} already exists")
+        with _PENDING_LOCK:
+            taken = [alert_id for alert_id in ids
+                     if alert_id in _PENDING_IDS or store.position(alert_id) is not None]
+            if taken:
+                raise HTTPException(status_code=409, detail=f"Alert {taken[0]} already exists")
+            _PENDING_IDS.update(ids)
+        try:
+            WAL.append(lines, builder)
+        finally:
+            with _PENDING_LOCK:
+                _PENDING_IDS.difference_update(ids)
+    return ids
+
+
+async def _read_json(request: Request):
+    try:
+        return decode_json(await request.body())
+    except ValueError:
+        raise HTTPException(status_code=422, detail="Request body is not valid JSON")
 
-    return {
-        "total": len(filtered),
-        "limit": limit,
-        "offset": offset,
-        "items": paged,
-    }
 
+@app.post("/alerts", status_code=201, dependencies=[Depends(require_ready)])
+async def create_alert(request: Request):
+    """
+    Add one alert (a JSON object in the alert format). `timestamp` is filled
+    in when missing, and `id` when the alert has no id, alert_id or uuid. Returns once the alert is durably logged and
+    visible in every endpoint.
+    """
+    alert = await _read_json(request)
+    ids = await run_in_threadpool(_ingest, [alert])
+    return {"id": ids[0]}
 
-@app.get("/alerts/{alert_id}")
+
+@app.post("/alerts/batch", status_code=201, dependencies=[Depends(require_ready)])
+async def create_alerts(request: Request):
+    """
+    Add a JSON array of alerts, all or nothing, as one log write.
+    """
+    alerts = await _read_json(request)
+    if not isinstance(alerts, list):
+        raise HTTPException(status_code=422, detail="Request body must be a JSON array of alerts")
+    if len(alerts) > MAX_BATCH_ALERTS:
+        raise HTTPException(status_code=413, detail=f"At most {MAX_BATCH_ALERTS:,} alerts per batch")
+    ids = await run_in_threadpool(_ingest, alerts) if alerts else []
+    return {"ids": ids, "count": len(ids)}
+
+
+@app.get("/alerts/{alert_id}", dependencies=[Depends(require_ready)])
 def get_alert(alert_id: str):
     """
     Return a single alert by its ID.
     """
-    alert = ALERTS_BY_ID.get(alert_id)
-    if not alert:
+    store, cold = _tiers()
+    position = store.position(alert_id)
+    if position is not None:
+        return Response(content=store.raw(position), media_type="application/json")
+    raw = cold.raw(alert_id)
+    if raw is None:
         raise HTTPException(status_code=404, detail="Alert not found")
-    return alert
+    return Response(content=raw, media_type="application/json")
+
+
+def _change_status(select: Callable[[AlertStore], np.ndarray], status: str):
+    """
+    Log and apply a status change of the alerts `select(store)` picks.
+    Positions are only stable between compactions, so they are chosen and
+    logged while holding the gate, stamped with the base they refer to. Returns (positions, number of alerts
+    whose status changed).
+    """
+    with GATE.shared():
+        positions = select(STORE)
+        if not len(positions):
+            return positions, 0
+        change = {"status": status, "positions": positions}
+        record = {OP_KEY: "status", "status": status, "positions": positions.tolist(), "base": BASE_FINGERPRINT}
+        WAL.append([encode_json(record)], change)
+        return positions, change["changed"]
+
+
+def _read_status(body) -> str:
+    status = body.get("status") if isinstance(body, dict) else None
+    if status not in ALERT_STATUSES:
+        raise HTTPException(status_code=422, detail=f"status must be one of: {', '.join(ALERT_STATUSES)}")
+    return status
+
+
+def _parse_time(value) -> Optional[datetime]:
+    if value is None:
+        return None
+    try:
+        return datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    except ValueError:
+        raise HTTPException(status_code=422, detail=f"Invalid timestamp: {value}")
+
+
+@app.patch("/alerts/{alert_id}", dependencies=[Depends(require_ready)])
+async def update_alert(alert_id: str, request: Request):
+    """
+    Change the status of one alert: body {"status": "in_progress"}. Returns
+    the updated alert.
+    """
+    body = await _read_json(request)
+    status = _read_status(body)
+    if set(body) - {"status"}:
+        raise HTTPException(status_code=422, detail="Only status can be updated")
+
+    def select(store: AlertStore) -> np.ndarray:
+        position = store.position(alert_id)
+        if position is None:
+            if COLD.find(alert_id) is not None:
+                raise HTTPException(status_code=409, detail="Alert is past the retention window and read-only")
+            raise HTTPException(status_code=404, detail="Alert not found")
+        return np.array([position], dtype=np.int64)
+
+    await run_in_threadpool(_change_status, select, status)
+    return get_alert(alert_id)
+
+
+@app.patch("/alerts", dependencies=[Depends(require_ready)])
+async def update_alerts(request: Request):
+    """
+    Change the status of many alerts at once. The body names the new status
+    and either a filter (same fields as the /alerts query parameters) or a
+    list of IDs:
+
+        {"status": "closed", "filter": {"severity": "low", "status": "open"}}
+        {"status": "in_progress", "ids": ["...", "..."]}
+
+    The change is logged as one record and applied to the status bitmaps
+    and /stats counts in place.
+    """
+    body = await _read_json(request)
+    status = _read_status(body)
+    not_found = []
+    if isinstance(body.get("ids"), list):
+        ids = body["ids"]
+
+        def select(store: AlertStore) -> np.ndarray:
+            positions = []
+            for alert_id in ids:
+                position = store.position(alert_id)
+                if position is None:
+                    not_found.append(alert_id)
+                else:
+                    positions.append(position)
+            return np.array(positions, dtype=np.int64)
+
+    elif isinstance(body.get("filter"), dict) and body["filter"]:
+        expression = body["filter"]
+        unknown = set(expression) - {"severity", "status", "source", "search", "start", "end"}
+        if unknown:
+            raise HTTPException(status_code=422, detail=f"Unknown filter fields: {', '.join(sorted(unknown))}")
+        mistyped = [
+            name for name in ("severity", "status", "source", "search")
+            if expression.get(name) is not None and not isinstance(expression[name], str)
+        ]
+        if mistyped:
+            raise HTTPException(status_code=422, detail=f"Filter fields must be strings: {', '.join(mistyped)}")
+        # Empty values don't filter; a filter of only those would match every
+        # alert, which is too easy to send by mistake
+        if not any(expression.values()):
+            raise HTTPException(status_code=422, detail="The filter has no non-empty conditions")
+        start, end = _parse_time(expression.get("start")), _parse_time(expression.get("end"))
+
+        def select(store: AlertStore) -> np.ndarray:
+            selected, matched = _filter_alerts(
+                store,
+                expression.get("severity"),
+                expression.get("status"),
+                expression.get("source"),
+                expression.get("search"),
+                start,
+                end,
+            )
+            return matched if matched is not None else selected.positions()
 
+    else:
+        raise HTTPException(status_code=422, detail="Give either a non-empty filter or a list of ids")
+
+    positions, updated = await run_in_threadpool(_change_status, select, status)
+    result = {"status": status, "matched": len(positions), "updated": updated}
+    if not_found:
+        result["not_found"] = not_found
+    return result
 
-@app.get("/stats")
-def get_stats():
+
+@app.get("/stats", dependencies=[Depends(require_ready)])
+def get_stats(approx: bool = False):
     """
     Return statistics for the dashboard:
     - total alerts
@@ -150,36 +918,30 @@ def get_stats():
     - counts by status
     - counts by source
     - alerts per day (for charts)
+    - generation: bumped every time any of these numbers change
+
+    The counts are maintained incrementally by the store, so this is a read
+    of a ready-made response.
+
+    Query params:
+    - approx: also return distinct source IP / user counts, estimated from
+      HyperLogLog sketches, with their error bounds (the counts above stay exact)
     """
-    severity_counts = Counter(a.get("severity") for a in ALERTS)
-    status_counts = Counter(a.get("status") for a in ALERTS)
-    source_counts = Counter(a.get("source") for a in ALERTS)
-    alerts_per_day = Counter()
+    store = STORE
+    if not approx:
+        return RESPONSE_CACHE.response("stats", (), store.version, store.stats.snapshot)
+    return RESPONSE_CACHE.response("stats", (True,), store.version, lambda: _approximate_stats(store))
 
-    for alert in ALERTS:
-        ts = alert.get("timestamp") or alert.get("time")
-        if not ts:
-            continue
-        try:
-            # Handle e.g. "2025-11-17T14:23:00Z"
-            dt = datetime.fromisoformat(ts.replace("Z", "+00:00"))
-            day = dt.date().isoformat()  # YYYY-MM-DD
-            alerts_per_day[day] += 1
-        except Exception:
-            # If any timestamp is weird, just skip it
-            continue
 
-    return {
-        "total_alerts": len(ALERTS),
-        "by_severity": severity_counts,
-        "by_status": status_counts,
-        "by_source": source_counts,
-        "by_day": alerts_per_day,
-    }
+def _approximate_stats(store: AlertStore) -> dict:
+    stats = dict(store.stats.snapshot())
+    stats["distinct_counts"] = distinct_counts(store)
+    stats["approximation"] = {"confidence_level": 0.95, "exact_counts": True}
+    return stats
 
 
-@app.get("/analytics/advanced")
-def get_advanced_analytics():
+@app.get("/analytics/advanced", dependencies=[Depends(require_ready)])
+def get_advanced_analytics(approx: bool = False):
     """
     Advanced analytics that AWS doesn't provide:
     - Threat intelligence correlations
@@ -189,223 +951,75 @@ def get_advanced_analytics():
     - Compliance scoring
     - Cost impact analysis
     - Anomaly detection metrics
+
+    Computed by the vectorized engine in analytics.py over the store's columns
+    and cached until the dataset changes. Exact results are computed in a
+    bounded worker pool (analytics_pool.py); when it's saturated the request
+    gets 429 with Retry-After.
+
+    Query params:
+    - approx: estimate from a fixed-size uniform sample and sketches instead
+      (cost independent of the dataset size); adds risk-score percentiles,
+      distinct counts and an "approximation" member with the error bounds
     """
-    from collections import defaultdict
-    
-    # Threat Intelligence Analysis
-    threat_actors = Counter()
-    threat_countries = Counter()
-    attack_stages = Counter()
-    ioc_types = Counter()
-    
-    # Risk Analysis
-    risk_scores = []
-    risk_by_severity = defaultdict(list)
-    exploitability_counts = Counter()
-    
-    # Geographic Analysis
-    country_counts = Counter()
-    region_counts = Counter()
-    geo_coords = []
-    
-    # Compliance Analysis
-    compliance_frameworks = Counter()
-    violation_severities = Counter()
-    data_classifications = Counter()
-    
-    # Cost Impact Analysis
-    total_cost = 0
-    cost_by_severity = defaultdict(float)
-    downtime_by_severity = defaultdict(int)
-    data_loss_by_severity = defaultdict(int)
-    
-    # Attack Chain Analysis
-    attack_chain_sequence = defaultdict(int)
-    
-    # Anomaly Detection
-    confidence_scores = []
-    correlation_ids = defaultdict(int)
-    
-    # Time-based patterns
-    alerts_by_hour = Counter()
-    alerts_by_day_of_week = Counter()
-    
-    for alert in ALERTS:
-        # Threat Intelligence
-        threat_info = alert.get("threat_intelligence", {})
-        if threat_info:
-            threat_actors[threat_info.get("threat_actor")] += 1
-            threat_countries[threat_info.get("threat_actor_country")] += 1
-            attack_stages[threat_info.get("attack_stage")] += 1
-            ioc_types[threat_info.get("ioc_type")] += 1
-        
-        # Risk Analysis
-        risk_info = alert.get("risk_analysis", {})
-        if risk_info:
-            risk_score = risk_info.get("risk_score", 0)
-            risk_scores.append(risk_score)
-            severity = alert.get("severity", "low")
-            risk_by_severity[severity].append(risk_score)
-            exploitability_counts[risk_info.get("exploitability")] += 1
-        
-        # Geographic
-        resource = alert.get("resource", {})
-        if resource:
-            country = resource.get("country")
-            region = resource.get("region")
-            if country:
-                country_counts[country] += 1
-            if region:
-                region_counts[region] += 1
-            lat = resource.get("latitude")
-            lon = resource.get("longitude")
-            if lat and lon:
-                geo_coords.append({"lat": lat, "lon": lon, "severity": alert.get("severity")})
-        
-        # Compliance
-        compliance = alert.get("compliance", {})
-        if compliance:
-            for framework in compliance.get("frameworks", []):
-                compliance_frameworks[framework] += 1
-            violation_severities[compliance.get("violation_severity")] += 1
-            data_classifications[compliance.get("data_classification")] += 1
-        
-        # Cost Impact
-        cost_info = alert.get("cost_impact", {})
-        if cost_info:
-            cost = cost_info.get("estimated_cost_usd", 0)
-            total_cost += cost
-            severity = alert.get("severity", "low")
-            cost_by_severity[severity] += cost
-            downtime_by_severity[severity] += cost_info.get("downtime_minutes", 0)
-            data_loss_by_severity[severity] += cost_info.get("data_loss_mb", 0)
-        
-        # Attack Chain
-        if threat_info:
-            stage = threat_info.get("attack_stage")
-            if stage:
-                attack_chain_sequence[stage] += 1
-        
-        # Anomaly Detection
-        metadata = alert.get("metadata", {})
-        confidence = risk_info.get("confidence", 0) if risk_info else 0
-        if confidence > 0:
-            confidence_scores.append(confidence)
-        
-        corr_id = metadata.get("correlation_id")
-        if corr_id:
-            correlation_ids[corr_id] += 1
-        
-        # Time patterns
-        ts = alert.get("timestamp") or alert.get("time")
-        if ts:
-            try:
-                dt = datetime.fromisoformat(ts.replace("Z", "+00:00"))
-                alerts_by_hour[dt.hour] += 1
-                alerts_by_day_of_week[dt.strftime("%A")] += 1
-            except:
-                pass
-    
-    # Calculate statistics
-    avg_risk_score = sum(risk_scores) / len(risk_scores) if risk_scores else 0
-    avg_confidence = sum(confidence_scores) / len(confidence_scores) if confidence_scores else 0
-    
-    # Risk distribution
-    risk_distribution = {
-        "critical": len([r for r in risk_scores if r >= 80]),
-        "high": len([r for r in risk_scores if 60 <= r < 80]),
-        "medium": len([r for r in risk_scores if 40 <= r < 60]),
-        "low": len([r for r in risk_scores if r < 40])
-    }
-    
-    # Top correlated alerts (potential attack campaigns)
-    top_correlations = dict(Counter(correlation_ids).most_common(10))
-    
-    return {
-        "threat_intelligence": {
-            "top_threat_actors": dict(threat_actors.most_common(10)),
-            "threat_actor_countries": dict(threat_countries),
-            "attack_stages": dict(attack_stages),
-            "ioc_types": dict(ioc_types),
-            "attack_chain_sequence": dict(attack_chain_sequence)
-        },
-        "risk_analysis": {
-            "average_risk_score": round(avg_risk_score, 2),
-            "risk_distribution": risk_distribution,
-            "risk_by_severity": {k: round(sum(v)/len(v), 2) if v else 0 for k, v in risk_by_severity.items()},
-            "exploitability_breakdown": dict(exploitability_counts),
-            "average_confidence": round(avg_confidence, 2)
-        },
-        "geographic": {
-            "countries": dict(country_counts),
-            "regions": dict(region_counts),
-            "heatmap_data": geo_coords[:10000]  # Limit for performance
-        },
-        "compliance": {
-            "framework_violations": dict(compliance_frameworks),
-            "violation_severities": dict(violation_severities),
-            "data_classifications": dict(data_classifications),
-            "compliance_score": round((1 - len([a for a in ALERTS if a.get("compliance", {}).get("frameworks")]) / len(ALERTS)) * 100, 2) if ALERTS else 0
-        },
-        "cost_impact": {
-            "total_cost_usd": round(total_cost, 2),
-            "cost_by_severity": {k: round(v, 2) for k, v in cost_by_severity.items()},
-            "total_downtime_minutes": sum(downtime_by_severity.values()),
-            "total_data_loss_mb": sum(data_loss_by_severity.values()),
-            "downtime_by_severity": dict(downtime_by_severity),
-            "data_loss_by_severity": dict(data_loss_by_severity)
-        },
-        "anomaly_detection": {
-            "correlated_alerts": len([c for c in correlation_ids.values() if c > 1]),
-            "top_correlations": top_correlations,
-            "high_confidence_alerts": len([c for c in confidence_scores if c >= 90]),
-            "low_confidence_alerts": len([c for c in confidence_scores if c < 80])
-        },
-        "time_patterns": {
-            "by_hour": dict(alerts_by_hour),
-            "by_day_of_week": dict(alerts_by_day_of_week)
-        }
-    }
+    store = STORE
+    if approx:
+        compute = lambda: advanced_analytics(store, approx=True)
+    else:
+        compute = lambda: ANALYTICS_POOL.advanced_analytics(store)
+    try:
+        return RESPONSE_CACHE.response("analytics/advanced", (approx,), store.version, compute)
+    except AnalyticsBusy as error:
+        raise HTTPException(status_code=429, detail=str(error), headers={"Retry-After": str(error.retry_after)})
 
 
-@app.get("/analytics/predictive")
-def get_predictive_analytics():
+@app.get("/analytics/predictive", dependencies=[Depends(require_ready)])
+def get_predictive_analytics(
+    granularity: str = "day",
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+):
     """
     Predictive analytics and trend analysis:
     - Alert trend prediction
     - Risk forecast
     - Attack pattern prediction
+
+    Query params:
+    - granularity: bucket size of the metrics and the trend, hour|day|week (default: day)
+    - start / end: the window (ISO-8601; default: the 30 days up to now)
+
+    Read from the hourly rollups, so the cost depends on the number of hours
+    in the window, not on the number of alerts.
     """
-    from datetime import timedelta
-    
-    # Get last 30 days of data
-    end_date = datetime.now()
-    start_date = end_date - timedelta(days=30)
-    
-    daily_counts = Counter()
-    daily_risk = defaultdict(list)
-    daily_cost = defaultdict(float)
-    
-    for alert in ALERTS:
-        ts = alert.get("timestamp") or alert.get("time")
-        if not ts:
-            continue
-        try:
-            dt = datetime.fromisoformat(ts.replace("Z", "+00:00"))
-            if start_date <= dt <= end_date:
-                day = dt.date().isoformat()
-                daily_counts[day] += 1
-                
-                risk_info = alert.get("risk_analysis", {})
-                if risk_info:
-                    daily_risk[day].append(risk_info.get("risk_score", 0))
-                
-                cost_info = alert.get("cost_impact", {})
-                if cost_info:
-                    daily_cost[day] += cost_info.get("estimated_cost_usd", 0)
-        except:
-            pass
-    
+    if granularity not in GRANULARITIES:
+        raise HTTPException(status_code=400, detail=f"granularity must be one of: {', '.join(GRANULARITIES)}")
+    store = STORE
+    params = (granularity, to_epoch(start), to_epoch(end))
+    return RESPONSE_CACHE.response(
+        "analytics/predictive", params, store.version, lambda: _predictive_analytics(store, *params),
+        ttl=PREDICTIVE_CACHE_TTL,
+    )
+
+
+def _predictive_analytics(
+    store: AlertStore,
+    granularity: str = "day",
+    start: Optional[int] = None,
+    end: Optional[int] = None,
+) -> dict:
+    """Compute the /analytics/predictive response (default: last 30 days, per day)."""
+    end_ts = int(time.time()) if end is None else end
+    start_ts = end_ts - 30 * SECONDS_PER_DAY if start is None else start
+
+    buckets, (counts, risk_sums, risk_counts, cost_sums, cost_counts) = bucket_totals(
+        store, start_ts, end_ts, granularity
+    )
+    labels = [bucket_label(bucket, granularity) for bucket in buckets.tolist()]
+    daily_counts = Counter(dict(zip(labels, counts.astype(np.int64).tolist())))
+    daily_risk = {label: (c, s) for label, c, s in zip(labels, risk_counts.tolist(), risk_sums.tolist()) if c}
+    daily_cost = {label: (c, s) for label, c, s in zip(labels, cost_counts.tolist(), cost_sums.tolist()) if c}
+
     # Calculate trends
     sorted_days = sorted(daily_counts.keys())
     if len(sorted_days) >= 7:
@@ -419,7 +1033,7 @@ def get_predictive_analytics():
         recent_avg = sum(daily_counts.values()) / len(daily_counts) if daily_counts else 0
     
     # Predict next 7 days (simple linear projection)
-    predicted_daily = round(recent_avg, 0)
+    predicted_daily = round(recent_avg * SECONDS_PER_DAY / GRANULARITIES[granularity], 0)
     predicted_next_7_days = predicted_daily * 7
     
     return {
@@ -436,9 +1050,121 @@ def get_predictive_analytics():
         },
         "daily_metrics": {
             "alerts": dict(daily_counts),
-            "average_risk": {k: round(sum(v)/len(v), 2) if v else 0 for k, v in daily_risk.items()},
-            "cost": {k: round(v, 2) for k, v in daily_cost.items()}
-        }
+            "average_risk": {k: round(s / c, 2) for k, (c, s) in daily_risk.items()},
+            "cost": {k: round(s, 2) for k, (c, s) in daily_cost.items()}
+        },
+        "window": {
+            "start": iso_time(start_ts),
+            "end": iso_time(end_ts),
+            "granularity": granularity,
+        },
+    }
+
+
+@app.get("/geo/grid", dependencies=[Depends(require_ready)])
+def get_geo_grid(zoom: int = 2, bbox: Optional[str] = None):
+    """
+    Alert density on a latitude/longitude grid, for map heatmaps: every
+    non-empty cell at `zoom` with its alert count and counts by severity.
+
+    Query params:
+    - zoom: 0-12; cells are 180 / 2**zoom degrees on a side (default 2)
+    - bbox: only cells intersecting min_lon,min_lat,max_lon,max_lat
+
+    Cells are sent as arrays, [lat, lon, count, <one count per severity>],
+    with (lat, lon) the cell's south-west corner and the severities named in
+    "columns". Read from the grid the store keeps up to date, so the cost
+    depends on the number of cells, not on the number of alerts.
+    """
+    if not 0 <= zoom <= MAX_ZOOM:
+        raise HTTPException(status_code=400, detail=f"zoom must be between 0 and {MAX_ZOOM}")
+    bounds = None
+    if bbox is not None:
+        try:
+            bounds = tuple(float(value) for value in bbox.split(","))
+        except ValueError:
+            bounds = ()
+        if len(bounds) != 4:
+            raise HTTPException(status_code=400, detail="bbox must be min_lon,min_lat,max_lon,max_lat")
+    store = STORE
+    return RESPONSE_CACHE.response("geo/grid", (zoom, bounds), store.version, lambda: _geo_grid(store, zoom, bounds))
+
+
+def _geo_grid(store: AlertStore, zoom: int, bbox) -> dict:
+    lat, lon, counts = store.geo_grid.cells(zoom, bbox)
+    # Severities present, most severe first, then any others
+    severities = store.dictionaries["severity"].values
+    present = np.flatnonzero(counts.sum(axis=0)).tolist()
+    rank = {name: i for i, name in enumerate(reversed(SEVERITY_ORDER))}
+    present.sort(key=lambda code: (rank.get(severities[code], len(rank)), code))
+    counts = counts[:, present]
+    return {
+        "zoom": zoom,
+        "cell_size": cell_size(zoom),
+        "columns": ["lat", "lon", "count"] + [severities[code] for code in present],
+        "total": int(counts.sum()),
+        "cells": [
+            [cell_lat, cell_lon, sum(cell), *cell]
+            for cell_lat, cell_lon, cell in zip(lat.tolist(), lon.tolist(), counts.tolist())
+        ],
+    }
+
+
+@app.get("/campaigns", dependencies=[Depends(require_ready)])
+def get_campaigns(limit: int = 10):
+    """
+    The largest correlation campaigns (alerts sharing a metadata.correlation_id),
+    largest first:
+    - correlation_id, alert_count
+    - first_seen / last_seen
+    - counts by severity
+
+    Query params:
+    - limit: number of campaigns (1-100, default 10)
+
+    Read from the campaign index, so only the listed campaigns' alerts are looked at.
+    """
+    if not 1 <= limit <= TOP_CAMPAIGNS:
+        raise HTTPException(status_code=400, detail=f"limit must be between 1 and {TOP_CAMPAIGNS}")
+    store = STORE
+    index = store.campaign_index()
+    return {
+        "correlated_campaigns": index.correlated,
+        "campaigns": [_campaign_summary(store, code, index.members(code, len(store))) for code in index.top(limit)],
+    }
+
+
+@app.get("/campaigns/{correlation_id}", dependencies=[Depends(require_ready)])
+def get_campaign(correlation_id: str, limit: int = 100, offset: int = 0):
+    """
+    One campaign: its summary (as in /campaigns) and its alerts in time order
+    (alerts without a timestamp last), paged with limit/offset.
+    """
+    store = STORE
+    code = store.code("correlation_id", correlation_id)
+    members = store.campaign_index().members(code, len(store)) if code else []
+    if not len(members):
+        raise HTTPException(status_code=404, detail="Campaign not found")
+
+    timestamps = store.column("timestamp")[members]
+    timestamps = np.where(timestamps == NO_TIMESTAMP, np.iinfo(np.int64).max, timestamps)
+    page = members[np.lexsort((members, timestamps))][max(offset, 0):max(offset, 0) + max(limit, 0)]
+
+    content = _campaign_summary(store, code, members)
+    content.update({"limit": limit, "offset": offset})
+    items = json_array(store.raw(position) for position in page.tolist())
+    return Response(content=encode_with(content, "items", items), media_type="application/json")
+
+
+def _campaign_summary(store: AlertStore, code: int, members: np.ndarray) -> dict:
+    timestamps = store.column("timestamp")[members]
+    timestamps = timestamps[timestamps != NO_TIMESTAMP]
+    return {
+        "correlation_id": store.dictionaries["correlation_id"].values[code],
+        "alert_count": len(members),
+        "first_seen": iso_time(timestamps.min()) if len(timestamps) else None,
+        "last_seen": iso_time(timestamps.max()) if len(timestamps) else None,
+        "by_severity": store.value_counts("severity", members),
     }
 
 
@@ -0,0 +1,122 @@
+"""
+Response cache for the analytics endpoints.
+
+/stats, /analytics/advanced and /analytics/predictive are pure functions of
+the loaded dataset, so their responses are cached as ready-to-send JSON bytes
+keyed on (endpoint, parameters, dataset version):
+
+- a hit returns the stored bytes directly, skipping both the computation and
+  FastAPI's encoder
+- entries are evicted least-recently-used once the cache exceeds its byte budget
+- concurrent misses for the same key share one computation (single flight)
+- when a newer dataset version shows up, every older entry is dropped
+"""
+from collections import OrderedDict
+from threading import Event, Lock
+from typing import Callable, Hashable, Optional
+import time
+
+from fastapi.responses import Response
+
+from fast_json import encode_json
+
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+
+class _Flight:
+    """One in-progress computation that other requests for the same key wait on."""
+
+    __slots__ = ("done", "body", "error")
+
+    def __init__(self):
+        self.done = Event()
+        self.body = None
+        self.error = None
+
+
+class ResponseCache:
+    """Bounded LRU cache of encoded JSON responses with single-flight misses."""
+
+    def __init__(self, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()  # key -> (body, expires_at)
+        self._bytes = 0
+        self._version = None
+        self._flights = {}
+        self._lock = Lock()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def get_or_compute(
+        self,
+        endpoint: str,
+        params: Hashable,
+        version: int,
+        compute: Callable[[], object],
+        ttl: Optional[float] = None,
+    ) -> bytes:
+        """
+        Return the encoded response for `endpoint`/`params` at dataset
+        `version` (increasing), computing it with `compute()` on a miss. `ttl` (seconds)
+        bounds how long an entry stays valid for responses that also depend
+        on the current time.
+        """
+        key = (endpoint, params, version)
+        with self._lock:
+            if self._version is None or version > self._version:
+                # The dataset changed: nothing cached so far can be served again
+                self._entries.clear()
+                self._bytes = 0
+                self._version = version
+
+            entry = self._entries.get(key)
+            if entry is not None and (entry[1] is None or entry[1] > time.monotonic()):
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+
+            self.misses += 1
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.body
+
+        try:
+            flight.body = encode_json(compute())
+        except BaseException as error:
+            flight.error = error
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+                if flight.error is None and version == self._version:
+                    self._put(key, flight.body, None if ttl is None else time.monotonic() + ttl)
+            flight.done.set()
+        return flight.body
+
+    def _put(self, key, body: bytes, expires_at: Optional[float]) -> None:
+        if len(body) > self.max_bytes:
+            return
+        old = self._entries.pop(key, None)
+        if old is not None:
+            self._bytes -= len(old[0])
+        self._entries[key] = (body, expires_at)
+        self._bytes += len(body)
+        while self._bytes > self.max_bytes:
+            _, (evicted, _) = self._entries.popitem(last=False)
+            self._bytes -= len(evicted)
+
+    def response(self, *args, **kwargs) -> Response:
+        """`get_or_compute()` wrapped in a JSON Response."""
+        return Response(content=self.get_or_compute(*args, **kwargs), media_type="application/json")
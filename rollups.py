@@ -0,0 +1,126 @@
+"""
+Hourly rollups for the time-series analytics.
+
+For every hour the table holds the alert count, the sum and count of risk
+scores, and the sum and count of estimated costs. It is built with the store
+and updated as alerts are added, so a trend over any window and granularity
+(hour, day, week) adds up whole hours of the table: the cost depends on the
+number of hours in the window, not on the number of alerts. Only the partial
+hours at the edges of a window are read from the alerts themselves.
+
+The table is sparse: sorted hour keys with one column per hour that has
+alerts, so an outlier timestamp (year 1 or 9999) costs one column rather than
+every hour in between.
+"""
+from datetime import datetime, timezone
+from threading import Lock
+from typing import Optional, Tuple
+
+import numpy as np
+
+from time_index import NO_TIMESTAMP, SECONDS_PER_DAY, SECONDS_PER_HOUR, iso_day
+
+# Rows of the table
+FIELDS = ("count", "risk_sum", "risk_count", "cost_sum", "cost_count")
+
+GRANULARITIES = {"hour": SECONDS_PER_HOUR, "day": SECONDS_PER_DAY, "week": 7 * SECONDS_PER_DAY}
+
+# Weeks start on Monday; the Unix epoch was a Thursday
+_BUCKET_OFFSETS = {"hour": 0, "day": 0, "week": 3 * SECONDS_PER_DAY}
+
+
+class HourlyRollups:
+    """Per-hour totals (rows: FIELDS) of the hours in `keys` (sorted), one column per hour."""
+
+    def __init__(self, keys: np.ndarray, table: np.ndarray):
+        # Swapped as one tuple when hours are added, so readers never see keys
+        # and columns that don't match
+        self._state = (keys, table)
+        self._lock = Lock()
+
+    @classmethod
+    def build(cls, timestamps: np.ndarray, values: np.ndarray) -> "HourlyRollups":
+        """Rollups of alerts with `timestamps` and rollup `values` (one column per alert)."""
+        rollups = cls(np.empty(0, dtype=np.int64), np.zeros((len(FIELDS), 0)))
+        rollups.add(timestamps, values)
+        return rollups
+
+    def add(self, timestamps: np.ndarray, values: np.ndarray) -> None:
+        """Account for more alerts (those without a timestamp are skipped)."""
+        keep = timestamps != NO_TIMESTAMP
+        if not keep.any():
+            return
+        hours, inverse = np.unique(timestamps[keep] // SECONDS_PER_HOUR, return_inverse=True)
+        values = values[:, keep]
+        batch = np.stack([np.bincount(inverse, weights=row, minlength=len(hours)) for row in values])
+        with self._lock:
+            keys, table = self._state
+            merged = np.union1d(keys, hours)
+            if len(merged) == len(keys):
+                # In place: readers may see part of this batch, as with /stats
+                totals = table
+            else:
+                totals = np.zeros((len(FIELDS), len(merged)))
+                totals[:, np.searchsorted(merged, keys)] = table
+            totals[:, np.searchsorted(merged, hours)] += batch
+            self._state = (merged, totals)
+
+    def span(self) -> Tuple[int, int]:
+        """[first, end) range of the hours recorded ((0, 0) while there are none)."""
+        keys, _ = self._state
+        if not len(keys):
+            return 0, 0
+        return int(keys[0]), int(keys[-1]) + 1
+
+    def hours(self, first: int, end: int) -> Tuple[np.ndarray, np.ndarray]:
+        """(hours, totals) of the hours in [first, end) that have any alerts recorded."""
+        keys, table = self._state
+        lo, hi = np.searchsorted(keys, [first, end])
+        return keys[lo:hi], table[:, lo:hi]
+
+
+def bucket_totals(store, start: Optional[int], end: Optional[int], granularity: str):
+    """
+    Totals of the alerts with start <= timestamp <= end (epoch seconds,
+    inclusive; None for open ends) per `granularity` bucket. Returns
+    (bucket start times, table with one column per non-empty bucket).
+    """
+    width = GRANULARITIES[granularity]
+    offset = _BUCKET_OFFSETS[granularity]
+    first_hour, end_hour = store.rollups.span()
+    if start is None:
+        start = first_hour * SECONDS_PER_HOUR
+    if end is None:
+        end = end_hour * SECONDS_PER_HOUR - 1
+
+    # Whole hours from the table, the partial ones at either edge from the alerts
+    first = -(-start // SECONDS_PER_HOUR)
+    last = (end + 1) // SECONDS_PER_HOUR
+    if first < last:
+        hours, hourly = store.rollups.hours(first, last)
+        parts = [(hours * SECONDS_PER_HOUR, hourly)]
+        edges = [(start, first * SECONDS_PER_HOUR - 1), (last * SECONDS_PER_HOUR, end)]
+    else:
+        parts = []
+        edges = [(start, end)]
+    for edge_start, edge_end in edges:
+        if edge_start <= edge_end:
+            positions = store.time_index.range(edge_start, edge_end)
+            if len(positions):
+                parts.append((store.column("timestamp")[positions], store.rollup_values(positions)))
+
+    if not parts:
+        return np.empty(0, dtype=np.int64), np.zeros((len(FIELDS), 0))
+    times = np.concatenate([times for times, _ in parts])
+    values = np.concatenate([values for _, values in parts], axis=1)
+    buckets, inverse = np.unique((times + offset) // width, return_inverse=True)
+    totals = np.stack([np.bincount(inverse, weights=row, minlength=len(buckets)) for row in values])
+    non_empty = totals[0] > 0
+    return buckets[non_empty] * width - offset, totals[:, non_empty]
+
+
+def bucket_label(start: int, granularity: str) -> str:
+    """Label of the bucket starting at `start`: ISO hour (YYYY-MM-DDTHH:00), or the ISO date of its first day."""
+    if granularity == "hour":
+        return datetime.fromtimestamp(start, timezone.utc).strftime("%Y-%m-%dT%H:00")
+    return iso_day(start // SECONDS_PER_DAY)
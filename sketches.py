@@ -0,0 +1,139 @@
+"""
+Samples and sketches behind the approximate (approx=true) analytics.
+
+- Reservoir: a uniform random sample of alert positions, of a fixed size,
+  kept uniform as alerts are appended (Algorithm R). Counts, sums and
+  percentiles over the sample, scaled up, estimate those over every alert,
+  at a cost that depends on the sample size, not on the number of alerts.
+- HyperLogLog: distinct-value counts (unique source IPs, users) from a few
+  KB of registers, updated as alerts are added.
+
+The margins returned alongside are 95% bounds: the normal approximation for
+sampled counts, the Dvoretzky-Kiefer-Wolfowitz bound for the ranks of sampled
+percentiles, and the standard error of HyperLogLog.
+"""
+from threading import Lock
+import hashlib
+import math
+
+import numpy as np
+
+# Positions kept by the reservoir
+SAMPLE_SIZE = 65536
+
+# The sample is seeded, so the same data gives the same estimates
+SAMPLE_SEED = 0
+
+# 2**HLL_PRECISION registers: a relative standard error of 1.04 / sqrt(2**p), ~0.8%
+HLL_PRECISION = 14
+
+Z_95 = 1.96
+
+
+def hash32(value) -> int:
+    """Stable 32-bit hash of a value (0 is reserved for missing values)."""
+    if value is None or value == "":
+        return 0
+    return int.from_bytes(hashlib.blake2b(str(value).encode("utf-8"), digest_size=4).digest(), "little") or 1
+
+
+class Reservoir:
+    """Uniform random sample of at most `size` alert positions."""
+
+    def __init__(self, count: int, size: int = SAMPLE_SIZE, seed: int = SAMPLE_SEED):
+        self.size = size
+        self._rng = np.random.default_rng(seed)
+        self._positions = np.empty(size, dtype=np.int64)
+        self._filled = min(count, size)
+        if count <= size:
+            self._positions[:count] = np.arange(count)
+        else:
+            self._positions[:] = self._rng.choice(count, size, replace=False)
+        self.seen = count
+        # Bumped whenever the sampled positions change
+        self.changes = 0
+        self._sorted = (-1, None)
+        self._lock = Lock()
+
+    def add(self, count: int) -> None:
+        """Offer the `count` positions after the ones seen so far."""
+        with self._lock:
+            first = self.seen
+            fill = min(count, self.size - self._filled)
+            self._positions[self._filled:self._filled + fill] = np.arange(first, first + fill)
+            self._filled += fill
+
+            # Position p (0-based) replaces a random slot with probability size / (p + 1)
+            positions = np.arange(first + fill, first + count)
+            slots = self._rng.integers(0, positions + 1) if len(positions) else positions
+            taken = slots < self.size
+            positions, slots = positions[taken], slots[taken]
+            # The last position drawn for a slot is the one that stays
+            slots, last = np.unique(slots[::-1], return_index=True)
+            self._positions[slots] = positions[::-1][last]
+            self.seen = first + count
+            if fill or len(slots):
+                self.changes += 1
+
+    def positions(self, size: int) -> np.ndarray:
+        """The sampled positions below `size` (a store's length), in ascending order."""
+        changes, positions = self._sorted
+        if changes != self.changes:
+            changes = self.changes
+            positions = np.sort(self._positions[:self._filled])
+            self._sorted = (changes, positions)
+        return positions[:np.searchsorted(positions, size)]
+
+
+class HyperLogLog:
+    """Distinct-count sketch over 32-bit hashes (see hash32)."""
+
+    def __init__(self, precision: int = HLL_PRECISION):
+        self.precision = precision
+        self.registers = np.zeros(1 << precision, dtype=np.uint8)
+
+    def add(self, hashes: np.ndarray) -> None:
+        """Account for more values, given their hashes (0 = missing, skipped)."""
+        hashes = hashes[hashes != 0].astype(np.uint32)
+        if not len(hashes):
+            return
+        bits = 32 - self.precision
+        buckets = (hashes >> bits).astype(np.int64)
+        rest = hashes & np.uint32((1 << bits) - 1)
+        # Position of the leftmost 1 bit in the remaining bits (bits + 1 if none)
+        ranks = np.where(rest > 0, bits - np.floor(np.log2(np.maximum(rest, 1))), bits + 1).astype(np.uint8)
+        np.maximum.at(self.registers, buckets, ranks)
+
+    def estimate(self) -> int:
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        raw = alpha * m * m / float(np.sum(np.ldexp(1.0, -self.registers.astype(np.int64))))
+        zeros = int(np.count_nonzero(self.registers == 0))
+        if raw <= 2.5 * m and zeros:
+            # Small range: linear counting
+            return int(round(m * math.log(m / zeros)))
+        if raw > (1 << 32) / 30:
+            # Large range: correct for 32-bit hash collisions
+            return int(round(-(1 << 32) * math.log(1 - raw / (1 << 32))))
+        return int(round(raw))
+
+    def relative_error(self) -> float:
+        """95% relative error bound of estimate()."""
+        return Z_95 * 1.04 / math.sqrt(len(self.registers))
+
+
+def count_margin(estimate: float, population: int, sample: int) -> int:
+    """95% margin of a count estimated as `estimate` from a uniform sample of `sample` out of `population`."""
+    if not sample or sample >= population:
+        return 0
+    p = min(max(estimate / population, 0.0), 1.0)
+    # Finite population correction: the margin vanishes as the sample covers everything
+    correction = math.sqrt((population - sample) / max(population - 1, 1))
+    return int(math.ceil(Z_95 * population * math.sqrt(p * (1 - p) / sample) * correction))
+
+
+def rank_margin(sample: int, population: int) -> float:
+    """95% bound on the rank error (as a fraction) of percentiles read from a sample (DKW)."""
+    if not sample or sample >= population:
+        return 0.0
+    return math.sqrt(math.log(2 / 0.05) / (2 * sample))
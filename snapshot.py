@@ -0,0 +1,176 @@
+"""
+Binary snapshots of the loaded store, for fast restarts.
+
+After the source file has been parsed once, every array of the AlertStore
+(columns, raw alert JSON, search text, token / ID / bitmap / time indexes) is
+written next to it in a `<source>.snapshot/` directory: one .npy file per
+array, plain binary blobs for the byte buffers, and meta.json for the string
+tables. Later startups memory-map those files instead of parsing JSON, so
+loading takes about as long as reading meta.json, and several worker processes
+serving the same snapshot share its pages through the OS page cache (the
+arrays are mapped copy-on-write, so in-place updates stay private).
+
+A snapshot is only used while the source file still has the size, mtime and
+content hash recorded in it. The hash covers a few fixed blocks of the file
+(start, middle, end) rather than all of it, so checking it stays cheap on
+multi-GB sources.
+"""
+from pathlib import Path
+from typing import Optional
+import hashlib
+import json
+import mmap
+import os
+import shutil
+
+import numpy as np
+
+from alert_store import AlertStore, Dictionary, IdIndex
+from bitmaps import BitmapIndex
+from text_index import TextIndex
+from time_index import TimeIndex
+
+# Bumped whenever the layout below changes, so old snapshots are rebuilt
+SNAPSHOT_FORMAT = 2
+
+SAMPLE_BLOCK_BYTES = 1 << 20
+
+
+def snapshot_dir(source: Path) -> Path:
+    return source.with_name(source.name + ".snapshot")
+
+
+def fingerprint(source: Path) -> dict:
+    """Size, mtime and sampled content hash of the source file."""
+    stat = source.stat()
+    digest = hashlib.blake2b(digest_size=16)
+    with source.open("rb") as f:
+        if stat.st_size <= 3 * SAMPLE_BLOCK_BYTES:
+            digest.update(f.read())
+        else:
+            for offset in (0, (stat.st_size - SAMPLE_BLOCK_BYTES) // 2, stat.st_size - SAMPLE_BLOCK_BYTES):
+                f.seek(offset)
+                digest.update(f.read(SAMPLE_BLOCK_BYTES))
+    return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "hash": digest.hexdigest()}
+
+
+def _write_blob(path: Path, data) -> None:
+    with path.open("wb") as f:
+        f.write(data)
+
+
+def _map_blob(path: Path):
+    """Read-only memory map of a blob (mmap can't map empty files)."""
+    with path.open("rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return b""
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+def _map_array(path: Path) -> np.ndarray:
+    return np.load(path, mmap_mode="c")
+
+
+def save_snapshot(store: AlertStore, source: Path) -> Path:
+    """
+    Write `store` as the snapshot of `source`. The snapshot is assembled in a
+    temporary directory and renamed into place, so readers never see half of one.
+    """
+    if store.size != store._docs.base_count:
+        raise ValueError("only a store as loaded from its source can be snapshotted")
+    target = snapshot_dir(source)
+    tmp = target.with_name(f"{target.name}.tmp-{os.getpid()}")
+    shutil.rmtree(tmp, ignore_errors=True)
+    (tmp / "columns").mkdir(parents=True)
+    (tmp / "bitmaps").mkdir()
+
+    for name, values in store.columns.items():
+        np.save(tmp / "columns" / f"{name}.npy", values)
+    for name, index in store.indexes.items():
+        codes = np.array(index.codes(), dtype=np.int64)
+        bits = np.empty((len(codes), (store.size + 7) >> 3), dtype=np.uint8)
+        for i, code in enumerate(codes.tolist()):
+            bits[i] = index.get(code, store.size).bits
+        np.save(tmp / "bitmaps" / f"{name}_codes.npy", codes)
+        np.save(tmp / "bitmaps" / f"{name}_bits.npy", bits)
+
+    _write_blob(tmp / "docs.bin", store._docs.base)
+    np.save(tmp / "doc_offsets.npy", store._docs.base_offsets)
+    _write_blob(tmp / "text.bin", store._text.base)
+    np.save(tmp / "text_offsets.npy", store._text.base_offsets)
+
+    text_index = store.text_index
+    _write_blob(tmp / "vocab.bin", text_index.vocab)
+    np.save(tmp / "vocab_offsets.npy", text_index.vocab_offsets)
+    np.save(tmp / "postings.npy", text_index.postings)
+    np.save(tmp / "posting_offsets.npy", text_index.posting_offsets)
+
+    np.save(tmp / "id_keys.npy", store.ids.keys)
+    np.save(tmp / "id_positions.npy", store.ids.positions)
+    np.save(tmp / "time_order.npy", store.time_index.order)
+    np.save(tmp / "time_sorted.npy", store.time_index.sorted)
+
+    # meta.json goes last: a directory without it is never loaded
+    meta = {
+        "format": SNAPSHOT_FORMAT,
+        "source": fingerprint(source),
+        "size": store.size,
+        "dictionaries": {name: dictionary.values for name, dictionary in store.dictionaries.items()},
+        "columns": list(store.columns),
+        "indexes": list(store.indexes),
+    }
+    with (tmp / "meta.json").open("w", encoding="utf-8") as f:
+        json.dump(meta, f)
+
+    shutil.rmtree(target, ignore_errors=True)
+    try:
+        tmp.rename(target)
+    except OSError:
+        # Another process put its snapshot there first; theirs is just as good
+        shutil.rmtree(tmp, ignore_errors=True)
+    return target
+
+
+def load_snapshot(source: Path) -> Optional[AlertStore]:
+    """
+    Map the snapshot of `source` into an AlertStore, or return None if there
+    is no snapshot or it no longer matches the source file.
+    """
+    directory = snapshot_dir(source)
+    try:
+        with (directory / "meta.json").open("r", encoding="utf-8") as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if meta.get("format") != SNAPSHOT_FORMAT or meta.get("source") != fingerprint(source):
+        return None
+
+    size = meta["size"]
+    columns = {name: _map_array(directory / "columns" / f"{name}.npy") for name in meta["columns"]}
+    indexes = {}
+    for name in meta["indexes"]:
+        codes = _map_array(directory / "bitmaps" / f"{name}_codes.npy")
+        bits = _map_array(directory / "bitmaps" / f"{name}_bits.npy")
+        indexes[name] = BitmapIndex({code: bits[i] for i, code in enumerate(codes.tolist())}, size)
+
+    return AlertStore(
+        columns=columns,
+        dictionaries={name: Dictionary(values) for name, values in meta["dictionaries"].items()},
+        docs=_map_blob(directory / "docs.bin"),
+        doc_offsets=_map_array(directory / "doc_offsets.npy"),
+        text=_map_blob(directory / "text.bin"),
+        text_offsets=_map_array(directory / "text_offsets.npy"),
+        text_index=TextIndex(
+            _map_blob(directory / "vocab.bin"),
+            _map_array(directory / "vocab_offsets.npy"),
+            _map_array(directory / "postings.npy"),
+            _map_array(directory / "posting_offsets.npy"),
+        ),
+        ids=IdIndex(_map_array(directory / "id_keys.npy"), _map_array(directory / "id_positions.npy")),
+        indexes=indexes,
+        time_index=TimeIndex(
+            columns["timestamp"],
+            _map_array(directory / "time_order.npy"),
+            _map_array(directory / "time_sorted.npy"),
+        ),
+    )
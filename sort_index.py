@@ -0,0 +1,140 @@
+"""
+Presorted indexes and keyset (cursor) pagination for sorted /alerts pages.
+
+A SortIndex holds every alert position ordered by one sort key (ties broken
+by position), built once per key. A sorted page is read by walking that order
+from where the previous page ended and keeping the positions that pass the
+filters, so its cost depends on the page size and the filter's selectivity,
+not on how deep the page is. The cursor handed to clients records the sort
+key value and position of the last alert returned, so it stays valid while
+alerts are added.
+"""
+from typing import Optional
+import base64
+import binascii
+import json
+
+import numpy as np
+
+from bitmaps import Bitmap
+
+# Severities from least to most severe; unknown values sort below "low"
+SEVERITY_ORDER = ("low", "medium", "high", "critical")
+
+SORT_FIELDS = ("timestamp", "risk_score", "estimated_cost_usd", "severity")
+SORT_ORDERS = ("asc", "desc")
+
+# First chunk of the sort order checked against the filters; doubled until
+# the page is full
+_MIN_WALK_CHUNK = 1024
+
+
+class InvalidCursor(ValueError):
+    """A cursor token that is malformed or doesn't match the request."""
+
+
+def encode_cursor(sort: str, order: str, value, position: int) -> str:
+    payload = json.dumps([sort, order, value, position], separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(payload).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str):
+    """(sort, order, value, position) of a cursor from encode_cursor()."""
+    try:
+        payload = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        sort, order, value, position = json.loads(payload)
+    except (binascii.Error, ValueError, TypeError):
+        raise InvalidCursor("Malformed cursor")
+    if sort not in SORT_FIELDS or order not in SORT_ORDERS or not isinstance(position, int) \
+            or not isinstance(value, (int, float)):
+        raise InvalidCursor("Malformed cursor")
+    return sort, order, value, position
+
+
+class SortIndex:
+    """Alert positions ordered by (key, position), with the keys in that order."""
+
+    def __init__(self, keys: np.ndarray):
+        self.order = np.argsort(keys, kind="stable")
+        self.sorted = keys[self.order]
+        self._ranks = None
+
+    def __len__(self) -> int:
+        return len(self.order)
+
+    def appended(self, keys: np.ndarray, first_position: int) -> "SortIndex":
+        """A new index that also holds alerts first_position, first_position + 1, ... with `keys`."""
+        order = np.argsort(keys, kind="stable")
+        keys, positions = keys[order], order + first_position
+        at = np.searchsorted(self.sorted, keys, side="right")
+        merged = SortIndex.__new__(SortIndex)
+        merged.order = np.insert(self.order, at, positions)
+        merged.sorted = np.insert(self.sorted, at, keys)
+        merged._ranks = None
+        return merged
+
+    @property
+    def ranks(self) -> np.ndarray:
+        """Rank of every position in `order` (the inverse permutation)."""
+        if self._ranks is None:
+            ranks = np.empty(len(self.order), dtype=np.int64)
+            ranks[self.order] = np.arange(len(self.order))
+            self._ranks = ranks
+        return self._ranks
+
+    def key(self, position: int):
+        """Sort key of the alert at `position`, as a plain Python number."""
+        return self.sorted[self.ranks[position]].item()
+
+    def start_after(self, value, position: int, descending: bool) -> int:
+        """Index, in walk order, of the first alert after the cursor (value, position)."""
+        lo = int(np.searchsorted(self.sorted, value, side="left"))
+        hi = int(np.searchsorted(self.sorted, value, side="right"))
+        # Within a run of equal keys the positions ascend
+        rank = lo + int(np.searchsorted(self.order[lo:hi], position, side="left"))
+        if descending:
+            return len(self.order) - rank
+        return rank + int(rank < hi and self.order[rank] == position)
+
+    def walk(self, selected: Optional[Bitmap], start: int, skip: int, limit: int, descending: bool) -> np.ndarray:
+        """
+        Positions in sort order (reversed if `descending`) from walk index
+        `start`, keeping those in `selected` (all if None), after skipping
+        the first `skip` of them, at most `limit`.
+        """
+        sequence = self.order[::-1] if descending else self.order
+        if selected is None:
+            return sequence[start + skip:start + skip + limit]
+
+        needed = skip + limit
+        found = []
+        count = 0
+        chunk = max(2 * needed, _MIN_WALK_CHUNK)
+        while start < len(sequence) and count < needed:
+            positions = sequence[start:start + chunk]
+            positions = positions[selected.contains(positions)]
+            found.append(positions)
+            count += len(positions)
+            start += chunk
+            chunk *= 2
+        if not found:
+            return np.empty(0, dtype=np.int64)
+        return np.concatenate(found)[skip:needed]
+
+    def top(self, positions: np.ndarray, start: int, skip: int, limit: int, descending: bool) -> np.ndarray:
+        """
+        Like walk() for an explicit set of `positions` (e.g. search matches):
+        only the `skip + limit` best are ordered, via a partial sort.
+        """
+        ranks = self.ranks[positions]
+        if descending:
+            ranks = len(self.order) - 1 - ranks
+        keep = ranks >= start
+        positions, ranks = positions[keep], ranks[keep]
+        needed = skip + limit
+        if needed <= 0:
+            return positions[:0]
+        if needed < len(ranks):
+            best = np.argpartition(ranks, needed - 1)[:needed]
+            positions, ranks = positions[best], ranks[best]
+        return positions[np.argsort(ranks)][skip:needed]
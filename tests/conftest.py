@@ -0,0 +1,46 @@
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+# The modules live at the repository root
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from analytics_pool import AnalyticsPool  # noqa: E402
+from loading import LoadProgress  # noqa: E402
+
+
+@pytest.fixture
+def server(tmp_path, monkeypatch):
+    """
+    start(alerts=None): load a dataset of `alerts` in tmp_path (synchronously,
+    with no analytics workers) and return a TestClient of the app. Called
+    again without alerts, it restarts over the same files: the dataset or
+    the checkpoint, then the write-ahead log.
+    """
+    from fastapi.testclient import TestClient
+
+    import main
+
+    monkeypatch.setattr(main, "DATA_DIR", tmp_path)
+    monkeypatch.setattr(main, "WAL_PATH", tmp_path / "alerts.wal")
+    monkeypatch.setattr(main, "STORE_DIR", tmp_path / "alerts.store")
+    monkeypatch.setattr(main, "USE_SNAPSHOTS", False)
+    monkeypatch.setattr(main, "ANALYTICS_POOL", AnalyticsPool(0, 4))
+    monkeypatch.setattr(main, "LOAD_PROGRESS", LoadProgress())
+    for name in ("STORE", "COLD", "WAL", "BASE_FINGERPRINT"):
+        monkeypatch.setattr(main, name, getattr(main, name))
+
+    def start(alerts=None):
+        if alerts is not None:
+            with (tmp_path / "aws_like_alerts_10000.jsonl").open("w") as f:
+                f.writelines(json.dumps(alert) + "\n" for alert in alerts)
+        main.load_alerts()
+        # No lifespan: the data is loaded above, and nothing is locked
+        return TestClient(main.app)
+
+    yield start
+    if main.WAL is not None:
+        main.WAL.close()
+    main.RESPONSE_CACHE.clear()
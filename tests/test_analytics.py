@@ -0,0 +1,34 @@
+from alert_store import AlertStore
+from analytics import advanced_analytics
+
+
+def test_alerts_without_a_severity_count_as_low():
+    store = AlertStore.from_alerts([
+        {"id": "a", "risk_analysis": {"risk_score": 50}, "cost_impact": {"estimated_cost_usd": 10, "downtime_minutes": 5}},
+        {"id": "b", "severity": "low", "risk_analysis": {"risk_score": 30}, "cost_impact": {"estimated_cost_usd": 1}},
+        {"id": "c", "severity": "high", "risk_analysis": {"risk_score": 70}, "cost_impact": {"estimated_cost_usd": 20}},
+    ])
+
+    result = advanced_analytics(store)
+
+    assert result["risk_analysis"]["risk_by_severity"] == {"low": 40.0, "high": 70.0}
+    assert result["cost_impact"]["cost_by_severity"] == {"low": 11.0, "high": 20.0}
+    assert result["cost_impact"]["downtime_by_severity"] == {"low": 5, "high": 0}
+
+
+def test_low_is_added_when_no_alert_names_it():
+    store = AlertStore.from_alerts([{"id": "a", "cost_impact": {"data_loss_mb": 3}}])
+
+    assert advanced_analytics(store)["cost_impact"]["data_loss_by_severity"] == {"low": 3}
+
+
+def test_time_patterns_count_utc_hours():
+    store = AlertStore.from_alerts([
+        {"id": "a", "timestamp": "2024-01-01T23:30:00+02:00"},
+        {"id": "b", "timestamp": "2024-01-01T21:10:00Z"},
+    ])
+
+    patterns = advanced_analytics(store)["time_patterns"]
+
+    assert patterns["by_hour"] == {21: 2}
+    assert patterns["by_day_of_week"] == {"Monday": 2}
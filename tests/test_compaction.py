@@ -0,0 +1,84 @@
+from datetime import datetime, timedelta, timezone
+
+from cold_storage import ColdStore
+import main
+
+
+def _stamp(days_ago: float) -> str:
+    return (datetime.now(timezone.utc) - timedelta(days=days_ago)).isoformat().replace("+00:00", "Z")
+
+
+def _alerts(prefix: str, days_ago: float, count: int, status: str = "open"):
+    return [
+        {"id": f"{prefix}-{i}", "severity": "low", "status": status, "timestamp": _stamp(days_ago + i)}
+        for i in range(count)
+    ]
+
+
+def _compact(monkeypatch, days: int = 30) -> int:
+    monkeypatch.setattr(main, "RETENTION_DAYS", days)
+    return main.compact_alerts()
+
+
+def test_compacted_alerts_are_found_in_one_id_index(server, monkeypatch):
+    client = server(_alerts("old", 100, 3) + _alerts("hot", 1, 2))
+
+    assert _compact(monkeypatch) == 3
+    manifest = main.read_manifest(main.STORE_DIR)
+
+    assert len(manifest["segments"]) == 3
+    assert main.COLD.find_many(["old-0", "hot-0", "old-2", "missing"]) == [
+        manifest["segments"][2]["name"], None, manifest["segments"][0]["name"], None
+    ]
+    assert client.get("/alerts/old-1").json()["id"] == "old-1"
+    assert client.get("/stats").json()["total_alerts"] == 2
+    response = client.post("/alerts/batch", json=[{"id": "new-1"}, {"id": "old-2"}])
+    assert response.status_code == 409
+    assert "old-2" in response.json()["detail"]
+
+
+def test_later_compactions_merge_into_the_index(server, monkeypatch):
+    client = server(_alerts("old", 100, 2) + _alerts("hot", 10, 2))
+
+    _compact(monkeypatch)
+    first_index = main.read_manifest(main.STORE_DIR)["id_index"]
+    _compact(monkeypatch, days=5)
+    manifest = main.read_manifest(main.STORE_DIR)
+
+    assert manifest["id_index"] != first_index
+    assert not (main.STORE_DIR / "segments" / f"{first_index}.npy").exists()
+    for alert_id in ("old-0", "old-1", "hot-0", "hot-1"):
+        assert client.get(f"/alerts/{alert_id}").status_code == 200
+        assert client.post("/alerts", json={"id": alert_id}).status_code == 409
+
+    # A restart maps the same index
+    client = server()
+    assert main.COLD.find("hot-1") is not None
+    assert client.get("/alerts/old-0").status_code == 200
+
+
+def test_cold_store_without_an_index_merges_the_segment_ids(server, monkeypatch):
+    server(_alerts("old", 100, 3) + _alerts("hot", 1, 1))
+
+    _compact(monkeypatch)
+    manifest = main.read_manifest(main.STORE_DIR)
+    cold = ColdStore(main.STORE_DIR / "segments", manifest["segments"])
+
+    assert cold.find_many(["old-0", "old-2", "hot-0"]) == main.COLD.find_many(["old-0", "old-2", "hot-0"])
+    assert cold.find("old-1") == manifest["segments"][1]["name"]
+
+
+def test_status_changes_land_on_the_same_alerts_after_compaction(server, monkeypatch):
+    client = server(_alerts("old", 100, 2) + _alerts("hot", 1, 4))
+
+    client.patch("/alerts/hot-1", json={"status": "closed"})
+    _compact(monkeypatch)
+    # Positions shifted by the compaction: hot-2 is now at position 2, not 4
+    client.patch("/alerts", json={"status": "resolved", "ids": ["hot-2"]})
+    client.patch("/alerts", json={"status": "in_progress", "filter": {"search": "", "status": "closed"}})
+    assert client.patch("/alerts/old-0", json={"status": "closed"}).status_code == 409
+
+    for client in (client, server()):
+        statuses = {f"hot-{i}": client.get(f"/alerts/hot-{i}").json()["status"] for i in range(4)}
+        assert statuses == {"hot-0": "open", "hot-1": "in_progress", "hot-2": "resolved", "hot-3": "open"}
+        assert client.get("/stats").json()["by_status"] == {"open": 2, "in_progress": 1, "resolved": 1}
@@ -0,0 +1,43 @@
+import pytest
+
+
+@pytest.mark.parametrize("key", ["alert_id", "uuid"])
+def test_alert_is_stored_under_its_alert_id_or_uuid(server, key):
+    client = server([])
+
+    response = client.post("/alerts", json={key: "X-1", "severity": "high"})
+
+    assert response.status_code == 201
+    assert response.json() == {"id": "X-1"}
+    alert = client.get("/alerts/X-1").json()
+    assert alert[key] == "X-1"
+    assert "id" not in alert
+    assert client.post("/alerts", json={key: "X-1"}).status_code == 409
+
+
+def test_alert_without_any_id_gets_one(server):
+    client = server([])
+
+    alert_id = client.post("/alerts", json={"severity": "low"}).json()["id"]
+
+    assert client.get(f"/alerts/{alert_id}").json()["id"] == alert_id
+
+
+def test_batch_rejects_an_alert_id_already_in_the_dataset(server):
+    client = server([{"alert_id": "base-1", "severity": "low"}])
+
+    response = client.post("/alerts/batch", json=[{"id": "new-1"}, {"id": "base-1"}])
+
+    assert response.status_code == 409
+    assert client.get("/alerts/new-1").status_code == 404
+
+
+def test_added_alerts_survive_a_restart(server):
+    client = server([{"id": "base-1", "severity": "low"}])
+    client.post("/alerts/batch", json=[{"alert_id": "new-1", "severity": "high"}, {"id": "new-2"}])
+
+    client = server()
+
+    assert client.get("/stats").json()["total_alerts"] == 3
+    assert client.get("/alerts/new-1").json()["severity"] == "high"
+    assert client.get("/alerts/new-2").status_code == 200
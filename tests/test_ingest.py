@@ -0,0 +1,78 @@
+import json
+
+import pytest
+
+from alert_store import AlertStoreBuilder, Dictionary
+from ingest import parse_lines
+
+
+def _line(alert: dict) -> str:
+    return json.dumps(alert)
+
+
+def test_out_of_range_number_skips_the_line_without_a_partial_row():
+    good = [_line({"id": f"alert-{i}", "severity": "high", "timestamp": "2025-01-01T00:00:00Z"}) for i in range(10)]
+    bad = _line({"id": "bad", "severity": "critical", "cost_impact": {"downtime_minutes": 1e20}})
+    builder, malformed = parse_lines("\n".join(good[:5] + [bad] + good[5:]).encode())
+
+    assert malformed == 1
+    assert len(builder) == 10
+    assert "critical" not in builder.dictionaries["severity"].values
+    store = builder.build()
+    assert len(store) == 10
+    assert store.position("bad") is None
+    assert store.position("alert-9") == 9
+
+
+def test_code_past_the_column_range_is_rejected_and_rolled_back():
+    builder = AlertStoreBuilder()
+    builder.dictionaries["type"] = Dictionary([None] + [f"type-{i}" for i in range(65535)])
+
+    with pytest.raises(OverflowError):
+        builder.add({"id": "new-type", "type": "one too many", "severity": "low"})
+    assert len(builder) == 0
+    assert len(builder.dictionaries["type"]) == 65536
+    assert "low" not in builder.dictionaries["severity"].values
+
+    builder.add({"id": "known-type", "type": "type-7"})
+    assert len(builder.build()) == 1
+
+
+def _full_type_dictionary(builder: AlertStoreBuilder) -> None:
+    builder.dictionaries["type"] = Dictionary([None] + [f"type-{i}" for i in range(65534)])
+
+
+def test_merging_chunks_past_the_column_range_is_rejected():
+    builder = AlertStoreBuilder()
+    _full_type_dictionary(builder)
+    builder.add({"id": "last-type", "type": "type-65535"})
+    chunk = AlertStoreBuilder()
+    chunk.add({"id": "new-type", "type": "one too many", "severity": "low"})
+
+    with pytest.raises(OverflowError):
+        builder.extend(chunk)
+    assert len(builder) == 1
+    assert len(builder.dictionaries["type"]) == 65536
+    assert "low" not in builder.dictionaries["severity"].values
+
+
+def test_appending_past_the_column_range_leaves_the_store_unchanged():
+    builder = AlertStoreBuilder()
+    _full_type_dictionary(builder)
+    builder.add({"id": "last-type", "type": "type-65535"})
+    store = builder.build()
+    new = AlertStoreBuilder()
+    new.add({"id": "new-type", "type": "one too many"})
+
+    with pytest.raises(OverflowError):
+        store.check_append(new)
+    with pytest.raises(OverflowError):
+        store.append(new)
+    assert len(store.dictionaries["type"]) == 65536
+    assert store.position("new-type") is None
+
+    known = AlertStoreBuilder()
+    known.add({"id": "known-type", "type": "type-9"})
+    store.check_append(known)
+    store = store.append(known)
+    assert store.column("type")[store.position("known-type")] == 10
@@ -0,0 +1,59 @@
+from datetime import datetime, timezone
+
+from alert_store import AlertStore
+from rollups import bucket_totals
+
+
+def _alert(i: int, timestamp: str) -> dict:
+    return {"id": f"alert-{i}", "timestamp": timestamp, "risk_analysis": {"risk_score": 5.0}}
+
+
+def _epoch(timestamp: str) -> int:
+    return int(datetime.fromisoformat(timestamp.replace("Z", "+00:00")).timestamp())
+
+
+def test_outlier_timestamps_cost_one_column_each():
+    store = AlertStore.from_alerts([
+        _alert(0, "2025-01-01T10:15:00Z"),
+        _alert(1, "2025-01-01T10:45:00Z"),
+        _alert(2, "0001-01-01T00:00:00Z"),
+        _alert(3, "9999-12-31T23:00:00Z"),
+    ])
+
+    keys, table = store.rollups.hours(*store.rollups.span())
+    assert keys.tolist() == [_epoch(t) // 3600 for t in ("0001-01-01T00:00:00Z", "2025-01-01T10:00:00Z", "9999-12-31T23:00:00Z")]
+    assert table.nbytes < 1024
+    assert table[0].tolist() == [1, 2, 1]
+    assert table[1].tolist() == [5.0, 10.0, 5.0]
+
+
+def test_bucket_totals_add_up_hours_around_outliers():
+    store = AlertStore.from_alerts([
+        _alert(0, "2025-01-01T10:15:00Z"),
+        _alert(1, "2025-01-01T11:45:00Z"),
+        _alert(2, "2025-01-02T00:30:00Z"),
+        _alert(3, "0001-01-01T00:00:00Z"),
+    ])
+
+    buckets, totals = bucket_totals(store, _epoch("2025-01-01T00:00:00Z"), _epoch("2025-01-02T23:59:59Z"), "day")
+    assert buckets.tolist() == [_epoch("2025-01-01T00:00:00Z"), _epoch("2025-01-02T00:00:00Z")]
+    assert totals[0].tolist() == [2, 1]
+    assert totals[1].tolist() == [10.0, 5.0]
+
+    buckets, totals = bucket_totals(store, None, None, "hour")
+    assert totals[0].sum() == 4
+
+
+def test_posted_alerts_are_added_to_the_rollups(server):
+    client = server([_alert(0, "2025-01-01T10:15:00Z")])
+    client.post("/alerts/batch", json=[
+        _alert(1, "2025-01-01T10:45:00Z"),
+        _alert(2, "2025-01-03T08:00:00Z"),
+        {"id": "alert-3", "timestamp": "9999-12-31T23:00:00Z"},
+    ])
+
+    window = {"start": "2025-01-01T00:00:00Z", "end": "2025-01-03T23:59:59Z"}
+    metrics = client.get("/analytics/predictive", params={**window, "granularity": "day"}).json()["daily_metrics"]
+
+    assert metrics["alerts"] == {"2025-01-01": 2, "2025-01-03": 1}
+    assert metrics["average_risk"] == {"2025-01-01": 5.0, "2025-01-03": 5.0}
@@ -0,0 +1,99 @@
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+
+
+@pytest.fixture
+def client():
+    # No lifespan: nothing is loaded or locked, and the empty store counts as ready
+    main.app.dependency_overrides[main.require_ready] = lambda: None
+    yield TestClient(main.app)
+    main.app.dependency_overrides.clear()
+
+
+@pytest.mark.parametrize("expression", [{"severity": ""}, {"start": None}, {"status": "", "search": None}])
+def test_filter_without_conditions_is_rejected(client, expression):
+    response = client.patch("/alerts", json={"status": "closed", "filter": expression})
+
+    assert response.status_code == 422
+    assert "no non-empty conditions" in response.json()["detail"]
+
+
+@pytest.mark.parametrize(
+    "expression",
+    [{"search": 5}, {"severity": 5}, {"source": ["aws", "gcp"]}, {"status": {"open": True}}, {"severity": True}],
+)
+def test_filter_values_that_are_not_strings_are_rejected(client, expression):
+    response = client.patch("/alerts", json={"status": "closed", "filter": expression})
+
+    assert response.status_code == 422
+    assert "must be strings" in response.json()["detail"]
+
+
+DATASET = [
+    {"id": "a-1", "severity": "high", "status": "open", "source": "aws", "message": "Root login", "timestamp": "2025-01-01T10:00:00Z"},
+    {"id": "a-2", "severity": "low", "status": "open", "source": "aws", "message": "Port scan", "timestamp": "2025-01-02T10:00:00Z"},
+    {"alert_id": "a-3", "severity": "low", "status": "closed", "source": "gcp", "message": "Port scan", "timestamp": "2025-01-03T10:00:00Z"},
+    {"uuid": "a-4", "severity": "high", "status": "open", "source": "gcp", "message": "Root login", "timestamp": "2025-01-04T10:00:00Z"},
+]
+
+
+def _statuses(client) -> dict:
+    return {f"a-{i}": client.get(f"/alerts/a-{i}").json()["status"] for i in range(1, 5)}
+
+
+def test_update_by_ids_reports_unknown_ones(server):
+    client = server(DATASET)
+
+    response = client.patch("/alerts", json={"status": "in_progress", "ids": ["a-1", "a-3", "nope"]})
+
+    assert response.json() == {"status": "in_progress", "matched": 2, "updated": 2, "not_found": ["nope"]}
+    assert _statuses(client) == {"a-1": "in_progress", "a-2": "open", "a-3": "in_progress", "a-4": "open"}
+    assert client.get("/alerts", params={"status": "in_progress"}).json()["total"] == 2
+
+
+def test_update_by_filter_combines_conditions(server):
+    client = server(DATASET)
+
+    response = client.patch("/alerts", json={"status": "closed", "filter": {"source": "aws", "search": "port"}})
+    assert response.json() == {"status": "closed", "matched": 1, "updated": 1}
+    response = client.patch(
+        "/alerts", json={"status": "resolved", "filter": {"severity": "high", "start": "2025-01-03T00:00:00Z"}}
+    )
+    assert response.json() == {"status": "resolved", "matched": 1, "updated": 1}
+
+    # Already closed: matched but not changed
+    response = client.patch("/alerts", json={"status": "closed", "filter": {"status": "closed"}})
+    assert response.json() == {"status": "closed", "matched": 2, "updated": 0}
+    assert _statuses(client) == {"a-1": "open", "a-2": "closed", "a-3": "closed", "a-4": "resolved"}
+    assert client.get("/stats").json()["by_status"] == {"open": 1, "closed": 2, "resolved": 1}
+
+
+@pytest.mark.parametrize(
+    "body",
+    [
+        {"status": "done", "ids": ["a-1"]},
+        {"status": "closed"},
+        {"status": "closed", "filter": {"colour": "red"}},
+        {"status": "closed", "filter": {"end": "yesterday"}},
+    ],
+)
+def test_invalid_updates_are_rejected_without_changes(server, body):
+    client = server(DATASET)
+
+    assert client.patch("/alerts", json=body).status_code == 422
+    assert _statuses(client) == {"a-1": "open", "a-2": "open", "a-3": "closed", "a-4": "open"}
+
+
+def test_status_changes_are_replayed_after_a_restart(server):
+    client = server(DATASET)
+    client.patch("/alerts/a-2", json={"status": "in_progress"})
+    client.post("/alerts", json={"id": "a-5", "status": "open", "severity": "low"})
+    client.patch("/alerts", json={"status": "resolved", "filter": {"severity": "low"}})
+
+    client = server()
+
+    assert _statuses(client) == {"a-1": "open", "a-2": "resolved", "a-3": "resolved", "a-4": "open"}
+    assert client.get("/alerts/a-5").json()["status"] == "resolved"
+    assert client.get("/stats").json()["by_status"] == {"open": 2, "resolved": 3}
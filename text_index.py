@@ -0,0 +1,128 @@
+"""
+Inverted token index for the /alerts `search` parameter.
+
+The searchable text of every alert (message, type and resource name, already
+lower-cased and UTF-8 encoded) is split into tokens: maximal runs of ASCII word
+characters, dots and dashes, so IPs like "10.0.0.1" and names like
+"s3_bucket_12345" are single tokens. Each distinct token maps to the sorted positions of the alerts that
+contain it.
+
+A substring query keeps its existing semantics: every token-character run of
+the needle has to sit inside one token of a matching alert, so the candidates
+are the alerts holding a token that contains that run. The distinct tokens
+are scanned as one string (far smaller than the dataset), and candidates are
+only re-checked against the full text when the needle spans more than one
+token.
+"""
+from array import array
+import re
+
+import numpy as np
+
+TOKEN_PATTERN = re.compile(rb"[\w.\-]+")
+
+# Needles whose longest token run is shorter than this match so many tokens
+# that a plain scan of the text is cheaper than merging their posting lists
+MIN_FRAGMENT_LENGTH = 3
+
+# Separator between distinct tokens in the vocabulary
+_VOCAB_SEPARATOR = b"\n"
+
+
+class TextIndexBuilder:
+    """Collects the tokens of each alert's text as alerts are added."""
+
+    def __init__(self):
+        self._token_ids = {}
+        self._occurrence_tokens = array("i")
+        self._occurrence_positions = array("i")
+
+    def add(self, position: int, text: bytes) -> None:
+        token_ids = self._token_ids
+        for token in set(TOKEN_PATTERN.findall(text)):
+            token_id = token_ids.get(token)
+            if token_id is None:
+                token_id = token_ids[token] = len(token_ids)
+            self._occurrence_tokens.append(token_id)
+            self._occurrence_positions.append(position)
+
+    def extend(self, other: "TextIndexBuilder", position_offset: int) -> None:
+        """Append the tokens collected by `other`, whose positions start at `position_offset`."""
+        token_ids = self._token_ids
+        remap = np.array([token_ids.setdefault(token, len(token_ids)) for token in other._token_ids], dtype=np.int32)
+        self._occurrence_tokens.frombytes(remap[np.frombuffer(other._occurrence_tokens, dtype=np.int32)].tobytes())
+        positions = np.frombuffer(other._occurrence_positions, dtype=np.int32) + np.int32(position_offset)
+        self._occurrence_positions.frombytes(positions.tobytes())
+
+    def build(self) -> "TextIndex":
+        token_ids = self._token_ids
+        tokens = np.frombuffer(self._occurrence_tokens, dtype=np.int32)
+        positions = np.frombuffer(self._occurrence_positions, dtype=np.int32)
+        # Stable sort keeps each posting list in ascending position order
+        order = np.argsort(tokens, kind="stable")
+        posting_offsets = np.zeros(len(token_ids) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(tokens, minlength=len(token_ids)), out=posting_offsets[1:])
+
+        vocab_offsets = np.zeros(len(token_ids) + 1, dtype=np.int64)
+        if token_ids:
+            lengths = np.fromiter((len(t) + 1 for t in token_ids), dtype=np.int64, count=len(token_ids))
+            np.cumsum(lengths, out=vocab_offsets[1:])
+        vocab = _VOCAB_SEPARATOR.join(token_ids) + _VOCAB_SEPARATOR
+
+        return TextIndex(vocab, vocab_offsets, positions[order].copy(), posting_offsets)
+
+
+class TextIndex:
+    """Token -> alert positions, stored as CSR arrays over a token vocabulary."""
+
+    def __init__(self, vocab: bytes, vocab_offsets: np.ndarray, postings: np.ndarray, posting_offsets: np.ndarray):
+        self.vocab = vocab
+        self.vocab_offsets = vocab_offsets
+        self.postings = postings
+        self.posting_offsets = posting_offsets
+
+    def __len__(self) -> int:
+        return len(self.vocab_offsets) - 1
+
+    def tokens_containing(self, fragment: bytes) -> np.ndarray:
+        """IDs of the distinct tokens that contain `fragment`."""
+        starts = []
+        vocab = self.vocab
+        start = vocab.find(fragment)
+        while start != -1:
+            starts.append(start)
+            # Skip the rest of this token, it only needs to be reported once
+            start = vocab.find(fragment, vocab.find(_VOCAB_SEPARATOR, start) + 1)
+        return np.searchsorted(self.vocab_offsets, starts, side="right") - 1
+
+    def candidates(self, fragment: bytes) -> np.ndarray:
+        """Sorted positions of alerts with a token containing `fragment`."""
+        token_ids = self.tokens_containing(fragment)
+        if len(token_ids) == 1:
+            return self.postings[self.posting_offsets[token_ids[0]]:self.posting_offsets[token_ids[0] + 1]]
+        slices = [self.postings[self.posting_offsets[t]:self.posting_offsets[t + 1]] for t in token_ids]
+        if not slices:
+            return np.empty(0, dtype=np.int32)
+        return np.unique(np.concatenate(slices))
+
+    def lookup(self, needle: bytes):
+        """
+        Candidate positions for a lower-cased substring query.
+
+        Returns (positions, exact). When `exact` is True every candidate is
+        known to contain the needle; otherwise the caller has to verify them.
+        Returns (None, False) when the needle has no token run long enough
+        for the index to narrow the search down.
+        """
+        fragments = sorted(set(TOKEN_PATTERN.findall(needle)), key=len, reverse=True)
+        if not fragments or len(fragments[0]) < MIN_FRAGMENT_LENGTH:
+            return None, False
+
+        positions = self.candidates(fragments[0])
+        for fragment in fragments[1:]:
+            if not len(positions) or len(fragment) < MIN_FRAGMENT_LENGTH:
+                break
+            positions = np.intersect1d(positions, self.candidates(fragment), assume_unique=True)
+
+        exact = fragments[0] == needle
+        return positions, exact
@@ -0,0 +1,122 @@
+"""
+Sorted time index over the pre-parsed timestamp column.
+
+Alert positions are kept in timestamp order, so a time range is two binary
+searches, and per-bucket counts (per day, per hour, ...) are the differences
+between the binary-search ranks of consecutive bucket edges instead of a pass
+over every alert.
+"""
+from datetime import date, datetime, timedelta, timezone
+from typing import Optional, Tuple
+
+import numpy as np
+
+# Marker stored in the timestamp column when an alert has no (parseable) timestamp
+NO_TIMESTAMP = np.iinfo(np.int64).min
+
+SECONDS_PER_HOUR = 3600
+SECONDS_PER_DAY = 86400
+EPOCH_DATE = date(1970, 1, 1)
+
+
+def iso_day(epoch_day: int) -> str:
+    """ISO date (YYYY-MM-DD) of a day number counted from the Unix epoch."""
+    return (EPOCH_DATE + timedelta(days=int(epoch_day))).isoformat()
+
+
+def iso_time(seconds: int) -> str:
+    """ISO-8601 UTC timestamp (YYYY-MM-DDTHH:MM:SSZ) of epoch seconds."""
+    return datetime.fromtimestamp(int(seconds), timezone.utc).isoformat().replace("+00:00", "Z")
+
+
+class TimeIndex:
+    """Permutation of alert positions sorted by timestamp (alerts without one are left out)."""
+
+    def __init__(
+        self,
+        timestamps: np.ndarray,
+        order: Optional[np.ndarray] = None,
+        sorted_timestamps: Optional[np.ndarray] = None,
+    ):
+        if order is None:
+            order = np.argsort(timestamps, kind="stable")
+            # NO_TIMESTAMP is the smallest int64, so those alerts sort first
+            order = order[int(np.count_nonzero(timestamps == NO_TIMESTAMP)):]
+        self.order = order
+        self.sorted = timestamps[order] if sorted_timestamps is None else sorted_timestamps
+
+    def __len__(self) -> int:
+        return len(self.order)
+
+    def appended(self, timestamps: np.ndarray, first_position: int) -> "TimeIndex":
+        """
+        A new index that also holds alerts first_position, first_position + 1, ...
+        with `timestamps`, merged in with one pass over this index.
+        """
+        positions = np.flatnonzero(timestamps != NO_TIMESTAMP)
+        timestamps = timestamps[positions]
+        order = np.argsort(timestamps, kind="stable")
+        timestamps, positions = timestamps[order], positions[order] + first_position
+        # New alerts go after existing ones with the same timestamp (higher positions)
+        at = np.searchsorted(self.sorted, timestamps, side="right")
+        merged = TimeIndex.__new__(TimeIndex)
+        merged.order = np.insert(self.order, at, positions)
+        merged.sorted = np.insert(self.sorted, at, timestamps)
+        return merged
+
+    def span(self, start: Optional[int] = None, end: Optional[int] = None) -> Tuple[int, int]:
+        """Rank range [lo, hi) of alerts with start <= timestamp <= end."""
+        lo = 0 if start is None else int(np.searchsorted(self.sorted, start, side="left"))
+        hi = len(self.sorted) if end is None else int(np.searchsorted(self.sorted, end, side="right"))
+        return lo, max(lo, hi)
+
+    def range(self, start: Optional[int] = None, end: Optional[int] = None) -> np.ndarray:
+        """Positions of alerts with start <= timestamp <= end, in time order."""
+        lo, hi = self.span(start, end)
+        return self.order[lo:hi]
+
+    def buckets(self, width: int, start: Optional[int] = None, end: Optional[int] = None):
+        """
+        Split the alerts in [start, end] into `width`-second buckets.
+
+        Returns (bucket_ids, bounds): bucket i holds the alerts ranked
+        bounds[i]..bounds[i + 1] in `order`, and its first second is
+        bucket_ids[i] * width. Only non-empty buckets are returned.
+        """
+        lo, hi = self.span(start, end)
+        if lo == hi:
+            return np.empty(0, dtype=np.int64), np.array([lo], dtype=np.int64)
+
+        first = int(self.sorted[lo]) // width
+        last = int(self.sorted[hi - 1]) // width
+        if last - first < hi - lo:
+            edges = np.arange(first, last + 2, dtype=np.int64) * width
+            bounds = np.searchsorted(self.sorted[lo:hi], edges[1:-1], side="left") + lo
+            bounds = np.concatenate(([lo], bounds, [hi]))
+            bucket_ids = np.arange(first, last + 1, dtype=np.int64)
+            non_empty = np.flatnonzero(np.diff(bounds))
+            return bucket_ids[non_empty], np.append(bounds[non_empty], hi)
+
+        # Sparse data over a very long span: bucket the alerts themselves
+        bucket_ids, starts = np.unique(self.sorted[lo:hi] // width, return_index=True)
+        return bucket_ids, np.append(starts + lo, hi)
+
+    def bucket_counts(self, width: int, start: Optional[int] = None, end: Optional[int] = None):
+        """(bucket_ids, counts) of non-empty `width`-second buckets in [start, end]."""
+        bucket_ids, bounds = self.buckets(width, start, end)
+        return bucket_ids, np.diff(bounds)
+
+    def window(self, bounds: np.ndarray) -> np.ndarray:
+        """Positions covered by the buckets returned by `buckets()`, in time order."""
+        return self.order[bounds[0]:bounds[-1]]
+
+    @staticmethod
+    def bucket_sums(bounds: np.ndarray, values: np.ndarray) -> np.ndarray:
+        """
+        Sum `values` over each bucket returned by `buckets()`. `values` must
+        line up with `window(bounds)`.
+        """
+        totals = np.zeros(len(values) + 1, dtype=np.float64)
+        np.cumsum(values, out=totals[1:])
+        offsets = bounds - bounds[0]
+        return totals[offsets[1:]] - totals[offsets[:-1]]
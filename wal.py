@@ -0,0 +1,188 @@
+"""
+Write-ahead log for alerts added through the API.
+
+Every accepted alert is appended to an NDJSON log (the same format as the
+JSONL dataset) and fsynced before the request is acknowledged. Writers use
+group commit: whoever finds the log idle becomes the leader and writes and
+fsyncs everything queued so far in one go, then applies it to the store,
+while the others wait for that batch. Under load, one fsync and one store
+update cover many requests.
+
+On startup the log is replayed after the base dataset, so acknowledged
+alerts survive restarts. A compaction (see cold_storage.py) checkpoints
+everything logged so far and starts a new log; CheckpointGate keeps writers
+out while it does.
+
+A dataset has a single writer process: the log, the duplicate-ID check and
+the store all live in the server process, so a second one (e.g. another
+uvicorn worker) would accept the same IDs again and serve different alerts.
+lock_writer() makes sure of it.
+"""
+from contextlib import contextmanager
+from pathlib import Path
+from threading import Condition
+from typing import BinaryIO, Callable, List
+import os
+
+try:
+    import fcntl
+except ImportError:  # Windows: no advisory locks, one process is up to the operator
+    fcntl = None
+
+
+class WriterLocked(RuntimeError):
+    """Another process is already the writer of a dataset."""
+
+
+def lock_writer(path: Path) -> BinaryIO:
+    """
+    Take an exclusive lock on `path` (created if missing) without waiting,
+    or raise WriterLocked. The lock lasts while the returned file is open,
+    and the OS releases it when the process exits.
+    """
+    lock = path.open("ab")
+    if fcntl is not None:
+        try:
+            fcntl.flock(lock.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            lock.close()
+            raise WriterLocked(
+                f"another server process is already serving {path.parent}; run a single worker per dataset"
+            ) from None
+    return lock
+
+
+class _Batch:
+    """Alerts queued for one group commit, and its outcome."""
+
+    __slots__ = ("lines", "payloads", "done", "error")
+
+    def __init__(self):
+        self.lines: List[bytes] = []
+        self.payloads = []
+        self.done = False
+        self.error = None
+
+
+class WriteAheadLog:
+    """Append-only NDJSON log with group commit."""
+
+    def __init__(self, path: Path, apply: Callable[[list], None]):
+        """
+        `apply(payloads)` is called by the leader, in log order, with the
+        payloads of every batch it made durable.
+        """
+        self.path = path
+        self._apply = apply
+        self._cond = Condition()
+        self._queued = _Batch()
+        self._flushing = False
+        self.commits = 0
+
+        self._truncate_partial_line()
+        self._file = path.open("ab")
+
+    def _truncate_partial_line(self) -> None:
+        """Drop a last line cut short by a crash, so new lines don't get glued to it."""
+        if not self.path.exists():
+            return
+        with self.path.open("r+b") as f:
+            end = f.seek(0, os.SEEK_END)
+            while end > 0:
+                start = max(end - 65536, 0)
+                f.seek(start)
+                newline = f.read(end - start).rfind(b"\n")
+                if newline != -1:
+                    end = start + newline + 1
+                    break
+                end = start
+            f.truncate(end)
+
+    def append(self, lines: List[bytes], payload) -> None:
+        """
+        Durably log `lines` (one encoded alert each) and return once they are
+        on disk and `payload` has been applied.
+        """
+        with self._cond:
+            batch = self._queued
+            batch.lines.extend(lines)
+            batch.payloads.append(payload)
+            while not batch.done:
+                if self._flushing:
+                    self._cond.wait()
+                else:
+                    self._flush_as_leader()
+        if batch.error is not None:
+            raise batch.error
+
+    def _flush_as_leader(self) -> None:
+        """Write, fsync and apply the queued batch. Called holding the lock."""
+        batch = self._queued
+        self._queued = _Batch()
+        self._flushing = True
+        self._cond.release()
+        try:
+            start = self._file.tell()
+            try:
+                self._file.write(b"".join(line + b"\n" for line in batch.lines))
+                self._file.flush()
+                os.fsync(self._file.fileno())
+            except OSError:
+                # Don't leave a half-written batch that was never acknowledged
+                self._file.truncate(start)
+                raise
+            self._apply(batch.payloads)
+        except Exception as error:
+            batch.error = error
+        finally:
+            self._cond.acquire()
+            batch.done = True
+            self._flushing = False
+            self.commits += 1
+            self._cond.notify_all()
+
+    def close(self) -> None:
+        with self._cond:
+            self._file.close()
+
+
+class CheckpointGate:
+    """
+    Lets any number of writers use the log at once (shared), or a checkpoint
+    run alone (exclusive) once the writers in flight have finished. Waiting
+    checkpoints go ahead of new writers.
+    """
+
+    def __init__(self):
+        self._cond = Condition()
+        self._writers = 0
+        self._checkpointing = False
+        self._waiting = 0
+
+    @contextmanager
+    def shared(self):
+        with self._cond:
+            while self._checkpointing or self._waiting:
+                self._cond.wait()
+            self._writers += 1
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._writers -= 1
+                self._cond.notify_all()
+
+    @contextmanager
+    def exclusive(self):
+        with self._cond:
+            self._waiting += 1
+            while self._checkpointing or self._writers:
+                self._cond.wait()
+            self._waiting -= 1
+            self._checkpointing = True
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._checkpointing = False
+                self._cond.notify_all()